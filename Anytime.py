@@ -0,0 +1,189 @@
+"""Anytime schedules within a wall-clock budget.
+
+The stages run one after the other until the budget runs out, each starting from the best schedule so far:
+    heuristic:        the best schedule of the heuristic portfolio, the upper limit t of the search.
+    search:           the Binary Search Procedure. Every LP solve is cut off at the deadline.
+    local_search:     moves and swaps on the best schedule.
+    branch_and_bound: the exact search of BranchAndBound.py, from the best schedule and the lower bound so far, on
+                      instances of at most EXACT_MAX_PAIRS pairs or once the gap is at most EXACT_MAX_GAP. On
+                      larger instances with a larger gap it rarely improves anything within a budget.
+The result always has a complete schedule, its makespan and a lower bound of the optimal makespan: the lower limit of
+the search, which rises with every proven 'no'. Once they meet, the schedule is optimal and the remaining stages are
+skipped.
+The stages check the deadline between steps, so the overrun is one step: a heuristic, the build of the LP, a rounding
+or a move of the local search. HiGHS stops its solves at the deadline, but CBC only applies its time limit to branch
+and bound, so with CBC the search runs in a worker process that is killed, together with CBC, at the deadline, the
+way BatchSolver.py kills its workers. The schedules of the worker come back through a pipe as it finds them, and every
+job on its fastest machine is the schedule until the first one arrives. The worker is not traced.
+
+Usage:
+    result = anytime_schedule(P, budget=2.0, progress=print)
+    result.makespan, result.xij, result.lower_bound, result.gap
+"""
+import multiprocessing
+import time
+import numpy as np
+from BranchAndBound import branch_and_bound
+from Heuristics import min_processing_schedule
+from LocalSearch import local_search
+from SearchProcedure import binary_search_procedure
+from Solution import Assignment
+from SolverBackends import get_backend
+from Tracing import span, count
+from Workers import kill_worker, own_process_group
+
+# The branch and bound runs on instances with at most this many pairs m x n, or when the gap is at most EXACT_MAX_GAP
+EXACT_MAX_PAIRS = 5000
+EXACT_MAX_GAP = 0.02
+
+
+class AnytimeResult:
+    __slots__ = ("makespan", "xij", "lower_bound", "stage", "elapsed", "start_time")
+
+    def __init__(self, start_time: float):
+        self.makespan = None  # Makespan of the best schedule so far
+        self.xij = None  # The machine of every job in the best schedule so far
+        self.lower_bound = 0  # Lower bound of the optimal makespan
+        self.stage = None  # The stage that found the best schedule
+        self.elapsed = 0.0  # Seconds from the start to the last improvement, or to the end
+        self.start_time = start_time
+
+    @property
+    def upper_bound(self) -> int:
+        return self.makespan
+
+    @property
+    def gap(self) -> float:
+        """
+        (makespan - lower bound) / makespan, 0 when the schedule is optimal.
+        """
+        return (self.makespan - min(self.lower_bound, self.makespan)) / self.makespan if self.makespan else 0.0
+
+    @property
+    def optimal(self) -> bool:
+        return self.makespan is not None and self.lower_bound >= self.makespan
+
+    def improve(self, stage: str, makespan: int, xij: Assignment, lower_bound: int) -> bool:
+        """
+        Keeps the schedule if it is better and the lower bound if it is larger.
+        :return: True if either changed.
+        """
+        improved = False
+        if self.makespan is None or makespan < self.makespan:
+            self.makespan, self.xij, self.stage = int(makespan), xij, stage
+            improved = True
+        if lower_bound > self.lower_bound:
+            self.lower_bound = int(lower_bound)
+            improved = True
+        if improved:
+            self.elapsed = time.perf_counter() - self.start_time
+        return improved
+
+    def __repr__(self):
+        return (f"AnytimeResult(makespan={self.makespan}, lower_bound={self.lower_bound}, gap={self.gap:.2%}, "
+                f"stage={self.stage}, elapsed={self.elapsed:.3f}s)")
+
+
+def _search_worker(connection, P, gap: float, backend, time_limit: float):
+    """
+    Entry point of the worker process of the search. Sends (stage, makespan, xij, lower_bound) for every improvement,
+    and None when the search is done.
+    """
+    own_process_group()  # CBC runs in our process group, so the deadline can kill both of us
+    deadline = time.perf_counter() + time_limit
+
+    def report(stage: str, makespan: int, xij: Assignment, lower_bound: int):
+        connection.send((stage, makespan, xij, lower_bound))
+
+    sch_problem = binary_search_procedure(P, gap=gap, backend=backend, graphs="none", deadline=deadline,
+                                          progress=report)
+    if sch_problem is not None:
+        report("search", sch_problem.makespan, sch_problem.xij, sch_problem.lower_bound)
+    connection.send(None)
+
+
+def search_in_worker(P: np.ndarray, gap: float, backend, deadline: float, improve):
+    """
+    Runs the Binary Search Procedure in a worker process, and kills it with its CBC process at the deadline.
+    :param improve: Called as improve(stage, makespan, xij, lower_bound) with every schedule the search reports.
+    """
+    connection, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_search_worker,
+                                      args=(child, P, gap, backend, deadline - time.perf_counter()), daemon=True)
+    process.start()
+    child.close()
+    try:
+        while connection.poll(max(deadline - time.perf_counter(), 0.0)):
+            try:
+                message = connection.recv()
+            except EOFError:
+                break
+            if message is None:
+                break
+            improve(*message)
+    finally:
+        kill_worker(process)
+        connection.close()
+
+
+def anytime_schedule(P: list[list[int]], budget: float, progress=None, gap: float = 0.0, backend=None,
+                     exact: bool = True) -> AnytimeResult:
+    """
+    The best schedule the stages find within the budget.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param budget: Seconds of wall-clock time.
+    :param progress: Called as progress(result) with the AnytimeResult after every improvement of the schedule or of
+    the lower bound.
+    :param gap: The gap of the Binary Search Procedure.
+    :param backend: The SolverBackend of the search, a backend name or None to pick one by the size of the model.
+    :param exact: Spend the time left after the local search on the branch and bound, on the instances and gaps where
+    it runs, see EXACT_MAX_PAIRS and EXACT_MAX_GAP.
+    :return: The AnytimeResult, with the best schedule, its makespan and the lower bound.
+    """
+    P = np.asarray(P)
+    start_time = time.perf_counter()
+    deadline = start_time + budget
+    result = AnytimeResult(start_time)
+
+    def improve(stage: str, makespan: int, xij: Assignment, lower_bound: int):
+        if result.improve(stage, makespan, xij, lower_bound):
+            count("anytime.improvements")
+            if progress:
+                progress(result)
+
+    def time_left() -> float:
+        return deadline - time.perf_counter()
+
+    with span("anytime", m=P.shape[0], n=P.shape[1], budget=budget) as anytime_span:
+        if get_backend(backend).name == "cbc":
+            improve("heuristic", *fastest_machine_schedule(P))  # Until the worker reports
+            search_in_worker(P, gap, backend, deadline, improve)
+        else:
+            sch_problem = binary_search_procedure(P, gap=gap, backend=backend, graphs="none", deadline=deadline,
+                                                  progress=improve)
+            if sch_problem is not None:
+                improve("search", sch_problem.makespan, sch_problem.xij, sch_problem.lower_bound)
+
+        if time_left() > 0 and not result.optimal:
+            makespan, xij = local_search(P, result.xij, time_limit=time_left())
+            improve("local_search", makespan, xij, result.lower_bound)
+
+        if exact and time_left() > 0 and not result.optimal and (P.size <= EXACT_MAX_PAIRS or
+                                                                 result.gap <= EXACT_MAX_GAP):
+            makespan, xij, lower_bound = branch_and_bound(P, time_left(), result.xij, result.lower_bound,
+                                                          lp_bound=False)
+            improve("branch_and_bound", makespan, xij, lower_bound)
+
+        result.elapsed = time.perf_counter() - start_time
+        anytime_span.set("makespan", result.makespan)
+        anytime_span.set("lower_bound", result.lower_bound)
+        anytime_span.set("stage", result.stage)
+    return result
+
+
+def fastest_machine_schedule(P: np.ndarray) -> (int, Assignment, int):
+    """
+    :return: The makespan of every job on its fastest machine, the schedule and the lower bound max_j min_i pij.
+    """
+    xij = min_processing_schedule(P)
+    return xij.makespan(P), xij, int(P.min(axis=0).max(initial=0))
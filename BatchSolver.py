@@ -0,0 +1,180 @@
+"""Batch solving of many instances.
+
+Every instance file runs the Binary Search Procedure in its own worker process, with at most `workers` processes at
+the same time. A worker that runs past the time limit is killed together with its CBC process, and a worker that
+fails only fails its own instance.
+Each instance produces one JSON Lines record as soon as it finishes:
+    {"instance": ..., "status": "ok" | "infeasible" | "error" | "timeout", "m": ..., "n": ..., "t": ..., "d": ...,
+     "lp_makespan": ..., "makespan": ..., "stage": "rounding" | "heuristic", "timings": {"read": ..., "search": ...,
+     "total": ..., "heuristics": ..., "lp_build": ..., "lp": ..., "rounding": ..., "matching": ...},
+     "assignment": [machine of job 0, ...]}
+The phases of the search are the totals of its tracing spans over all probes: lp is every LP update and solve, and
+rounding includes the matching of G'.
+
+Usage:
+    python BatchSolver.py instances/ --workers 4 --timeout 600 --output results.jsonl
+    python BatchSolver.py "instances/*.npy" --gap 0.01
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from multiprocessing.connection import wait
+from Workers import kill_worker, own_process_group
+
+# Timings of the phases of the search in a record -> the tracing spans they add up
+PHASES = {"heuristics": ("heuristic_schedule",), "lp_build": ("DecisionModel.build",), "lp": ("LP.update", "LP.solve"),
+          "rounding": ("rounding",), "matching": ("BipartiteGraphG2.matching",)}
+
+
+def instance_files(pattern: str) -> list[str]:
+    """
+    :param pattern: A directory, whose .csv and .npy files are the instances, or a glob pattern.
+    :return: The instance files, sorted.
+    """
+    if os.path.isdir(pattern):
+        return sorted(glob.glob(os.path.join(pattern, "*.csv")) + glob.glob(os.path.join(pattern, "*.npy")))
+    return sorted(glob.glob(pattern))
+
+
+def solve_instance(filename: str, gap: float = 0.0, time_limit: float = None) -> dict:
+    """
+    Reads an instance and runs the Binary Search Procedure on it.
+    :param filename: The instance file.
+    :param gap: The relative gap of the Binary Search Procedure.
+    :param time_limit: Seconds the reading and the search may take, None for no limit. See solve_matrix.
+    :return: The record of the instance.
+    """
+    # Imported here, so the parent process doesn't pay for the solver stack
+    from generate_data import read_instance
+
+    start_time = time.perf_counter()
+    P = read_instance(filename)
+    if P is None:
+        return {"instance": filename, "status": "error", "error": "File not Found"}
+    return solve_matrix(P, filename, gap, start_time, time_limit)
+
+
+def solve_matrix(P, instance: str, gap: float = 0.0, start_time: float = None, time_limit: float = None) -> dict:
+    """
+    Runs the Binary Search Procedure on an instance that is already in memory.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param instance: The name of the instance in the record.
+    :param gap: The relative gap of the Binary Search Procedure.
+    :param start_time: time.perf_counter() when the instance started to be read, if it was read.
+    :param time_limit: Seconds from start_time the search may run, None for no limit. The search stops at the
+    deadline with its best schedule so far, whose lower_bound is in the record, and "timeout" if it had none.
+    :return: The record of the instance.
+    """
+    from SearchProcedure import binary_search_procedure
+    from Tracing import tracing
+
+    read_time = time.perf_counter()
+    start_time = read_time if start_time is None else start_time
+    deadline = start_time + time_limit if time_limit is not None else None
+    with tracing() as tracer:
+        sch_problem = binary_search_procedure(P, gap=gap, graphs="none", deadline=deadline)
+    search_time = time.perf_counter()
+
+    status = "ok" if sch_problem else "timeout" if deadline is not None and search_time >= deadline else "infeasible"
+    record = {"instance": instance, "status": status, "m": len(P), "n": len(P[0])}
+    if sch_problem:
+        record.update(t=int(sch_problem.t), d=int(sch_problem.d), lp_makespan=float(sch_problem.lp_makespan),
+                      makespan=int(sch_problem.makespan), stage=sch_problem.stage)
+        if deadline is not None:
+            record["lower_bound"] = int(sch_problem.lower_bound)
+    record["timings"] = {"read": read_time - start_time, "search": search_time - read_time,
+                         "total": search_time - start_time}
+    spans = tracer.summary()
+    for phase, names in PHASES.items():
+        record["timings"][phase] = sum(spans[name]["total"] for name in names if name in spans)
+    if sch_problem:
+        record["assignment"] = sch_problem.xij.machines.tolist()
+    return record
+
+
+def _worker(filename: str, connection, gap: float = 0.0):
+    """
+    Entry point of a worker process. Sends the record of the instance through the connection.
+    """
+    own_process_group()  # CBC runs in our process group, so a timeout can kill both of us
+    try:
+        record = solve_instance(filename, gap)
+    except Exception as error:
+        record = {"instance": filename, "status": "error", "error": repr(error), "traceback": traceback.format_exc()}
+    connection.send(record)
+    connection.close()
+
+
+def run_batch(filenames: list[str], workers: int = None, timeout: float = None, gap: float = 0.0):
+    """
+    Solves the instances in worker processes and yields the record of every instance as soon as it finishes.
+    The records come in the order the instances finish.
+    :param filenames: The instance files.
+    :param workers: Maximum number of instances solved at the same time. Defaults to the number of CPUs.
+    :param timeout: Seconds an instance may run before it is killed. None for no limit.
+    :param gap: The relative gap of the Binary Search Procedure of every instance.
+    """
+    workers = workers or os.cpu_count() or 1
+    waiting = list(reversed(filenames))
+    running = {}  # connection -> (filename, process, start time)
+
+    while waiting or running:
+        while waiting and len(running) < workers:
+            filename = waiting.pop()
+            receiver, sender = multiprocessing.Pipe(duplex=False)
+            process = multiprocessing.Process(target=_worker, args=(filename, sender, gap), daemon=True)
+            process.start()
+            sender.close()  # Only the worker writes, so the receiver sees EOF if the worker dies
+            running[receiver] = (filename, process, time.monotonic())
+
+        wait_time = None
+        if timeout is not None:
+            oldest_start = min(start for _, _, start in running.values())
+            wait_time = max(0.0, oldest_start + timeout - time.monotonic())
+        for connection in wait(list(running), timeout=wait_time):
+            filename, process, start = running.pop(connection)
+            try:
+                record = connection.recv()
+            except EOFError:
+                record = {"instance": filename, "status": "error",
+                          "error": f"worker exited with code {process.exitcode}"}
+            connection.close()
+            process.join()
+            yield record
+
+        if timeout is not None:
+            now = time.monotonic()
+            for connection, (filename, process, start) in list(running.items()):
+                if now - start >= timeout:
+                    del running[connection]
+                    kill_worker(process)
+                    connection.close()
+                    yield {"instance": filename, "status": "timeout", "timings": {"total": now - start}}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve many instances and stream one JSON record per instance.")
+    parser.add_argument("instances", help="directory with .csv/.npy instances or a glob pattern")
+    parser.add_argument("--workers", type=int, default=None, help="instances solved at the same time")
+    parser.add_argument("--timeout", type=float, default=None, help="seconds allowed per instance")
+    parser.add_argument("--output", default=None, help="JSON Lines file, standard output by default")
+    parser.add_argument("--gap", type=float, default=0.0, help="relative gap of the search, 0.01 is 1%%")
+    args = parser.parse_args(argv)
+
+    output = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for record in run_batch(instance_files(args.instances), args.workers, args.timeout, args.gap):
+            output.write(json.dumps(record) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+"""Benchmark of every stage of the algorithm over a grid of instances.
+
+The stages are measured separately, each on its own:
+    greedy       greedy_schedule(P)
+    heuristics   heuristic_schedule(P), the portfolio of the upper limit t
+    lp_build     LinearModel and the PuLP problem of LP(P, d⃗,t), with the d of the Binary Search Procedure
+    lp_solve     solving that LP with CBC
+    lp_highs     solving that LP with HiGHS in this process, if highspy is installed
+    rounding     BipartiteGraphG and BipartiteGraphG2 of the LP solution, and the rounded schedule
+    search       the full binary_search_procedure
+    ip           IP(P, d⃗,t) with the d and the t of the Binary Search Procedure
+    optimal      optimal_schedule(P)
+    exact        exact_schedule(P), the dynamic programming, on instances with at most DP_MACHINES machines
+ip, optimal and exact take very long on large instances, so they only run on instances with at most --exact-limit
+pairs (i, j).
+
+For every stage we record the wall time of `repeat` runs, the peak memory of one more run under tracemalloc (the
+Python heap, including NumPy arrays, but not the CBC process) and the number of LP/IP solves.
+Results are written as JSON. Given a baseline file, stages whose median time or peak memory grew by more than the
+threshold are reported as regressions, and the exit code is 1.
+
+The grid is the shipped CSV instances plus larger instances generated with a fixed seed as .npy files.
+
+Usage:
+    python Benchmark.py --output results.json
+    python Benchmark.py --baseline results.json --threshold 0.2 --generate 600x2000 1000x3000
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+import numpy as np
+import pulp
+from pulp import LpProblem, PULP_CBC_CMD
+from generate_data import generate_filedata, read_instance
+from LinearModel import LinearModel
+from RoundingTheorem import IP
+from SolverBackends import HighsBackend, highs_available
+from SearchProcedure import greedy_schedule, round_lpSolution, binary_search_procedure
+from OptimalSchedule import optimal_schedule
+from BranchAndBound import DP_MACHINES, exact_schedule
+from Heuristics import heuristic_schedule
+
+SHIPPED_INSTANCES = ["3x10.csv", "3x100.csv", "2x100.csv", "30x100.csv", "100x30.csv", "100x100.csv",
+                     "300x1000.csv"]
+GENERATED_SIZES = ["600x2000"]
+STAGES = ["greedy", "heuristics", "lp_build", "lp_solve", "lp_highs", "rounding", "search", "ip", "optimal", "exact"]
+# Stages that run at the deadline d of the Binary Search Procedure, so they need its result
+SEARCH_STAGES = {"search", "lp_build", "lp_solve", "lp_highs", "rounding", "ip"}
+
+
+@contextmanager
+def count_lp_solves():
+    """
+    Counts the calls of LpProblem.solve, which is how LP, IP, DecisionModel and optimal_schedule reach CBC, and of
+    HighsBackend.run, which is how they reach HiGHS.
+    :return: A one item list with the count so far.
+    """
+    counter = [0]
+    solve, run = LpProblem.solve, HighsBackend.run
+
+    def counting_solve(self, *args, **kwargs):
+        counter[0] += 1
+        return solve(self, *args, **kwargs)
+
+    def counting_run(self, *args, **kwargs):
+        counter[0] += 1
+        return run(self, *args, **kwargs)
+
+    LpProblem.solve, HighsBackend.run = counting_solve, counting_run
+    try:
+        yield counter
+    finally:
+        LpProblem.solve, HighsBackend.run = solve, run
+
+
+def measure(function, repeat: int = 3, setup=None) -> (dict, object):
+    """
+    :param function: The stage, a function without arguments, or of the result of setup.
+    :param repeat: Number of timed runs.
+    :param setup: Prepares the input of every run outside of the measurements, or None.
+    :return: The measurements of the stage, and the result of its last run.
+    """
+    times = []
+    with count_lp_solves() as solves:
+        for _ in range(repeat):
+            argument = setup() if setup else None
+            start_time = time.perf_counter()
+            result = function(argument) if setup else function()
+            times.append(time.perf_counter() - start_time)
+        lp_solves = solves[0] // repeat
+    # tracemalloc slows the run down, so memory is measured on a run of its own
+    argument = setup() if setup else None
+    tracemalloc.start()
+    try:
+        function(argument) if setup else function()
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"wall": {"min": min(times), "median": statistics.median(times), "runs": times},
+            "peak_memory": peak_memory, "lp_solves": lp_solves}, result
+
+
+def benchmark_instance(filename: str, repeat: int = 3, exact_limit: int = 1000, stages=STAGES) -> list[dict]:
+    """
+    Runs the selected stages on one instance.
+    :param filename: The instance file.
+    :param repeat: Number of timed runs of every stage.
+    :param exact_limit: IP and optimal_schedule are skipped for instances with more than this many pairs (i, j).
+    :param stages: The stages to run, the others are skipped. A stage that needs the result of a skipped one, like
+    the deadline of the search, runs it once without measuring it.
+    :return: One record per stage.
+    """
+    P = read_instance(filename)
+    m, n = len(P), len(P[0])
+    stages = set(stages)
+    records = []
+
+    def record(stage, function, setup=None):
+        if stage not in stages:
+            return None
+        measurements, result = measure(function, repeat, setup)
+        records.append({"instance": os.path.basename(filename), "m": m, "n": n, "stage": stage, **measurements})
+        return result
+
+    record("greedy", lambda: greedy_schedule(P))
+    record("heuristics", lambda: heuristic_schedule(P))
+    if not stages & SEARCH_STAGES:
+        sch_problem = None
+    elif "search" in stages:
+        sch_problem = record("search", lambda: binary_search_procedure(P))
+    else:
+        sch_problem = binary_search_procedure(P)
+    if stages & SEARCH_STAGES and sch_problem is None:
+        print(f"{filename}: no solution from the Binary Search Procedure, skipping the stages at its deadline")
+    elif sch_problem is not None:
+        d, di, t = sch_problem.d, [sch_problem.d] * m, sch_problem.t
+
+        def build():
+            model = LinearModel(P, d)
+            return model, model.to_pulp("LP", di)
+
+        def solve(built):
+            model, (lp_prob, x, Cmax) = built
+            lp_prob.solve(PULP_CBC_CMD(msg=False))
+            return model.fractional_solution(x)
+
+        record("lp_build", build)
+        lp_xij = record("lp_solve", solve, setup=build)  # A fresh problem every run, only the solve is timed
+        if highs_available():
+            record("lp_highs", lambda model: HighsBackend().solve_lp(model, di), setup=lambda: LinearModel(P, d))
+        if "rounding" in stages and lp_xij is None:
+            lp_xij = solve(build())
+        record("rounding", lambda: round_lpSolution(lp_xij, m, n))
+        if m * n <= exact_limit:
+            record("ip", lambda: IP(P, di, t))
+    if m * n <= exact_limit:
+        record("optimal", lambda: optimal_schedule(P))
+        if m <= DP_MACHINES:
+            record("exact", lambda: exact_schedule(P))
+    return records
+
+
+def generate_instances(sizes: list[str], directory: str, seed: int = 0) -> list[str]:
+    """
+    Generates the instances of the grid that don't exist yet. Every size gets the same instance on every machine.
+    :param sizes: Sizes like "600x2000", machines x jobs.
+    :param directory: Where the .npy files are kept.
+    :return: The instance files.
+    """
+    os.makedirs(directory, exist_ok=True)
+    filenames = []
+    for size in sizes:
+        m, n = (int(value) for value in size.lower().split("x"))
+        filename = os.path.join(directory, f"{m}x{n}.npy")
+        np.random.seed(seed)
+        generate_filedata(filename, m, n)
+        filenames.append(filename)
+    return filenames
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(), "numpy": np.__version__,
+            "pulp": pulp.__version__, "highs": highs_available(), "cpus": os.cpu_count()}
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float = 0.2, min_seconds: float = 0.01):
+    """
+    :param results: The records of this run.
+    :param baseline: The records of the baseline run.
+    :param threshold: Allowed relative growth of the median time and of the peak memory.
+    :param min_seconds: Time differences below this are noise and never a regression.
+    :return: The regressions, one dict per (instance, stage, metric).
+    """
+    previous = {(record["instance"], record["stage"]): record for record in baseline}
+    regressions = []
+    for record in results:
+        old = previous.get((record["instance"], record["stage"]))
+        if old is None:
+            continue
+        metrics = [("wall", record["wall"]["median"], old["wall"]["median"]),
+                   ("peak_memory", record["peak_memory"], old["peak_memory"])]
+        for metric, new_value, old_value in metrics:
+            if metric == "wall" and new_value - old_value < min_seconds:
+                continue
+            if new_value > old_value * (1 + threshold):
+                regressions.append({"instance": record["instance"], "stage": record["stage"], "metric": metric,
+                                    "baseline": old_value, "current": new_value,
+                                    "change": new_value / old_value - 1 if old_value else float("inf")})
+    return regressions
+
+
+def print_results(results: list[dict]):
+    print(f"{'instance':<16}{'stage':<10}{'median (s)':>12}{'min (s)':>12}{'peak (KB)':>12}{'LP solves':>11}")
+    for record in results:
+        print(f"{record['instance']:<16}{record['stage']:<10}{record['wall']['median']:>12.4f}"
+              f"{record['wall']['min']:>12.4f}{record['peak_memory'] / 1024:>12.1f}{record['lp_solves']:>11}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the algorithm over a grid of instances.")
+    parser.add_argument("instances", nargs="*", help="instance files, the shipped CSV instances by default")
+    parser.add_argument("--generate", nargs="*", default=GENERATED_SIZES, help="sizes of generated instances, mxn")
+    parser.add_argument("--data-dir", default="benchmark_data", help="directory of the generated instances")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the generated instances")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs of every stage")
+    parser.add_argument("--exact-limit", type=int, default=1000, help="largest m*n to run IP and optimal_schedule on")
+    parser.add_argument("--stages", nargs="*", default=STAGES, choices=STAGES, help="stages to run")
+    parser.add_argument("--output", default=None, help="JSON file of the results")
+    parser.add_argument("--baseline", default=None, help="JSON file of a previous run to compare with")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative growth, 0.2 is 20%%")
+    args = parser.parse_args(argv)
+
+    filenames = (args.instances or SHIPPED_INSTANCES) + generate_instances(args.generate, args.data_dir, args.seed)
+    results = []
+    for filename in filenames:
+        print(f"Benchmarking {filename}", file=sys.stderr)
+        results += benchmark_instance(filename, args.repeat, args.exact_limit, args.stages)
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump({"environment": environment(), "results": results}, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression['instance']} {regression['stage']} {regression['metric']}: "
+                  f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['change']:+.0%})")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -30,221 +30,282 @@ If the edges of the cycle are deleted, we get a collection of trees which we thi
 been contained in the cycle.
 For each job node that is not already matched, pair it with one of its children.
 
+Both cases are handled at once by peeling leaves (match_pseudoforest): a machine leaf is the child of its job, and what
+can't be peeled is the cycle. This takes O(V + E) over the whole graph, without recursion or subgraphs.
+
 If (i, j) is in the matching, set xij = 1.
 Each remaining xij that has not been assigned is set to 0.
 """
+from collections import deque
 from itertools import cycle
-from matplotlib import pyplot as plt
-from pulp import *
-import networkx as nx
+import numpy as np
+from Solution import FractionalSolution
+from Tracing import span
 
 
 class BipartiteGraphG:
-    def __init__(self, lp_solution_xij: dict[tuple[int, int], LpVariable], num_machines: int, num_jobs: int):
+    def __init__(self, lp_solution_xij: FractionalSolution, num_machines: int, num_jobs: int):
         """
         Initializes the BipartiteGraph class with a given LP solution, number of machines, and number of jobs.
-        :param lp_solution_xij: Dictionary containing LP solution variables.
+        Nodes are integers: machine i is node i and job j is node m + j.
+        The NetworkX graph with names like "m0", "j17" is only built, and NetworkX only imported, when someone asks for
+        it.
+        :param lp_solution_xij: The nonzero xij of the LP solution.
         :param num_machines: Number of machines in the graph.
         :param num_jobs: Number of jobs in the graph.
         """
         # Step 1
         #   Fields
-        self.graph = nx.Graph()  # Create an empty bipartite graph using NetworkX
-        self.lp_solution_xij = lp_solution_xij.copy()
         self.m = num_machines
         self.n = num_jobs
-        self.connected_components = []
+        # Edges (i, j) with x_ij > 0
+        self.edge_machines = lp_solution_xij.machines.astype(np.int64)
+        self.edge_jobs = lp_solution_xij.jobs.astype(np.int64)
+        self.nodes = np.arange(num_machines + num_jobs)  # Every machine and every job is a node of G
+        self.component_labels = None  # Component of every node in self.nodes
+        self.component_nodes = None  # Number of nodes of every component
+        self.component_edges = None  # Number of edges of every component
         self.is_pseudoforest = True
+        self._graph = None
+        self._connected_components = None
 
-        # Add machine nodes with names like "m0", "m1", ...
-        for machine_id in range(num_machines):
-            self.graph.add_node(f"m{machine_id}", bipartite=0)  # 'bipartite=0' indicates machine nodes
-
-        # Add job nodes with names like "j0", "j1", ...
-        for job_id in range(num_jobs):
-            self.graph.add_node(f"j{job_id}", bipartite=1)  # 'bipartite=1' indicates job nodes
-
-        # Add edges between machines and jobs based on lp_solution_xij
-        for (i, j), variable in lp_solution_xij.items():
-            if variable.varValue > 0:
-                self.graph.add_edge(f"m{i}", f"j{j}")
-
-        # Step 2
-        self.find_connected_components()
+        with span("BipartiteGraphG", nodes=len(self.nodes), edges=len(self.edge_machines)):
+            # Step 2
+            self.find_connected_components()
 
-        # Step 3
-        self.check_pseudoforest_property()
+            # Step 3
+            self.check_pseudoforest_property()
 
     """---------    Step 2  ------------"""
 
     def find_connected_components(self):
         """
-        Finds the connected components of the graph and stores them in the class attribute `connected_components`.
+        Labels the connected components of the graph and counts the nodes and the edges of each one.
         """
-
-        self.connected_components = list(nx.connected_components(self.graph))
+        self.component_labels, self.component_nodes, self.component_edges = \
+            count_components(self.nodes, self.edge_machines, self.edge_jobs + self.m)
 
     """---------    Step 3  ------------"""
 
     def check_pseudoforest_property(self):
         """
         Checks if the graph and its connected components have the pseudoforest property.
-        Prints an error message if the property is not satisfied.
+        Each connected component has no more edges than nodes.
+        """
+        self.is_pseudoforest = bool(np.all(self.component_edges <= self.component_nodes))
+
+    """---------    NetworkX view  ------------"""
+
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
+
+    def number_of_edges(self) -> int:
+        return len(self.edge_machines)
+
+    @property
+    def graph(self) -> "nx.Graph":
+        """
+        The graph as a NetworkX graph with nodes "m0", "m1", ... and "j0", "j1", ... for visualization.
+        """
+        if self._graph is None:
+            self._graph = to_networkx(self.nodes, self.edge_machines, self.edge_jobs, self.m)
+        return self._graph
+
+    @property
+    def connected_components(self) -> list[set[str]]:
+        """
+        The node names of every connected component.
         """
-        if self.graph.number_of_edges() > self.graph.number_of_nodes():
-            self.is_pseudoforest = False
-        for component in self.connected_components:
-            subgraph = self.graph.subgraph(component)
-            if subgraph.number_of_edges() > subgraph.number_of_nodes():
-                self.is_pseudoforest = False
-                return
+        if self._connected_components is None:
+            self._connected_components = component_node_names(self.nodes, self.component_labels, self.m)
+        return self._connected_components
 
 
 class BipartiteGraphG2:
-    def __init__(self, graph: nx.Graph):
+    def __init__(self, graphG: BipartiteGraphG):
         """
-        Initializes the BipartiteGraphG2 class with a given graph.
-        :param graph: NetworkX graph representing the bipartite graph.
+        Initializes the BipartiteGraphG2 class with the graph G.
+        :param graphG: The BipartiteGraphG of the LP solution.
         """
 
         #   Fields
-        self.graph = graph.copy()
+        self.m = graphG.m
+        self.n = graphG.n
+        self.edge_machines = graphG.edge_machines
+        self.edge_jobs = graphG.edge_jobs
+        self.nodes = graphG.nodes
         self.matching = []
+        self._graph = None
+        self._connected_components = None
 
         # step 4
-        self.remove_single_degree_jobs()
-        self.connected_components = list(nx.connected_components(self.graph))
+        with span("BipartiteGraphG2.remove_single_degree_jobs"):
+            self.remove_single_degree_jobs()
+            self.component_labels, self.component_nodes, self.component_edges = \
+                count_components(self.nodes, self.edge_machines, self.edge_jobs + self.m)
 
         # step 5
-        self.matching_process()
+        with span("BipartiteGraphG2.matching", nodes=len(self.nodes), edges=len(self.edge_machines),
+                  components=len(self.component_nodes)):
+            self.matching_process()
 
     """---------    Step 4  ------------"""
 
     def remove_single_degree_jobs(self):
         """
-        Removes job nodes with degree 1 from the graph.
+        Removes job nodes with degree 1 from the graph, and then the machine nodes left with degree 0.
         """
-        # Find job nodes with degree 1
-        single_degree_jobs = [node for node in get_job_nodes(self.graph) if self.graph.degree(node) == 1]
-
-        # Remove job nodes with degree 1 along with their edges
-        for job in single_degree_jobs:
-            self.graph.remove_node(job)
-
-        # Find machine nodes with degree 0
-        zero_degree_machines = [node for node in get_machine_nodes(self.graph) if self.graph.degree(node) == 0]
+        job_degree = np.bincount(self.edge_jobs, minlength=self.n)
+        keep = job_degree[self.edge_jobs] > 1
+        self.edge_machines, self.edge_jobs = self.edge_machines[keep], self.edge_jobs[keep]
+        machine_degree = np.bincount(self.edge_machines, minlength=self.m)
+        self.nodes = np.concatenate((np.flatnonzero(machine_degree > 0), np.flatnonzero(job_degree > 1) + self.m))
 
-        # Remove machine nodes with degree 0
-        for machine in zero_degree_machines:
-            self.graph.remove_node(machine)
+    def number_of_nodes(self) -> int:
+        return len(self.nodes)
 
-    """---------    Step 5  ------------"""
+    def number_of_edges(self) -> int:
+        return len(self.edge_machines)
 
-    def match_tree_component(self, subgraph):
+    @property
+    def graph(self) -> "nx.Graph":
         """
-        Performs the matching process for tree components in the graph.
-        Updates the final matching.
-        :param subgraph: A NetworkX subgraph representing a connected component of the graph.
-        :return: True if the matching process is successful.
+        The graph G' as a NetworkX graph with nodes "m0", "m1", ... and "j0", "j1", ...
         """
-        is_successful = True
-
-        job_nodes = [node for node in subgraph.nodes if node.startswith("j")]
-        if not job_nodes:
-            print("Error: No job nodes in the subgraph.")
-            return False
-        # Each job node must have at least one child
-        for job_node in job_nodes:
-            neighbors = list(subgraph.neighbors(job_node))
-            if not any(neighbor for neighbor in neighbors):
-                print("Error: Each job node doesn't have at least one child")
-
-        # Initialize a dictionary to store the matching
-        matching = {}  # ex. mathing[j0] = m3
-        matched_machines = set()  # Set to keep track of matched machines
-
-        # Choose any node as the root of the tree
-        root = job_nodes[len(job_nodes) // 2]
-
-        # Depth-First Search (DFS)
-        def dfs(node, parent):
-            # For job nodes, match them with their child
-            if node.startswith("j"):
-                # Find the first child node that is not the parent
-                for neighbor in subgraph.neighbors(node):
-                    if neighbor != parent:
-                        if neighbor not in matched_machines:
-                            matching[node] = neighbor
-                            matched_machines.add(neighbor)
-                            break
-
-            # Recursively visit children
-            for neighbor in subgraph.neighbors(node):
-                if neighbor != parent:
-                    dfs(neighbor, node)
-
-        # Start the DFS from the root
-        dfs(root, None)
-
-        # Checking for matched machines being paired with more than one job
-        if len(matched_machines) != len(matching):
-            print("Error: A machine node is matched with more than one job")
-            is_successful = False
-
-        # Each job node must be matched with a different machine
-        if len(matched_machines) != len(job_nodes):
-            print("Error: Each job isn't matched with different machine")
-            is_successful = False
-
-        # Update the final matching
-        for job_node, machine_node in matching.items():
-            # [1: ]: This is a slicing operation that starts from the character at index 1 and goes until the end of
-            # the string.
-            self.matching.append((int(machine_node[1:]), int(job_node[1:])))
-
-        return is_successful
+        if self._graph is None:
+            self._graph = to_networkx(self.nodes, self.edge_machines, self.edge_jobs, self.m)
+        return self._graph
 
-    def match_cycle_component(self, subgraph):
+    @property
+    def connected_components(self) -> list[set[str]]:
         """
-        Performs the matching process for cycle components in the graph.
-        Updates the final matching.
-        :param subgraph: A NetworkX subgraph representing a connected component of the graph.
-        :return: True if the matching process is successful, False otherwise.
+        The node names of every connected component.
         """
-        # Check if the graph is empty
-        if subgraph.number_of_nodes() == 0:
-            print("Error: The graph is empty.")
-            return False
-
-        is_successful = True
-
-        # Identify the cycle in the component
-        cycles = list(nx.simple_cycles(subgraph.to_directed()))
-        if not cycles or len(cycles[0]) % 2 != 0:
-            print("Error: The component must contain one even-length cycle.")
-            return False
-
-        copy = subgraph.copy()
-        # If there is a cycle, remove one arbitrary edge from it.
-        if len(cycles[0]) >= 2:
-            u, v = cycles[0][0], cycles[0][1]
-            copy.remove_edge(u, v)
-
-        # Now the subgraph is a tree
-        self.match_tree_component(copy)
+        if self._connected_components is None:
+            self._connected_components = component_node_names(self.nodes, self.component_labels, self.m)
+        return self._connected_components
 
-        return is_successful
+    """---------    Step 5  ------------"""
 
     def matching_process(self):
         """
         Main method to process the matching according to the described steps.
+        Matches every job node of G' with a different machine, over the whole graph at once.
         """
-        for component in self.connected_components:
-            subgraph = self.graph.subgraph(component)
-            if nx.is_tree(subgraph):  # if number of edges < number of nodes
-                self.match_tree_component(subgraph)
-            else:  # number of edges = number of nodes
-                self.match_cycle_component(subgraph)
+        self.matching = match_pseudoforest(self.edge_machines, self.edge_jobs, self.m, self.n)
+        if len(self.matching) != len(self.nodes[self.nodes >= self.m]):
+            print("Error: Each job isn't matched with different machine")
+
+
+# %-------------------------- Integer graph core    ----------------------------------------------------------------%
+def count_components(nodes: np.ndarray, u: np.ndarray, v: np.ndarray):
+    """
+    Finds the connected components with union-find in one pass over the edges.
+    :param nodes: The integer nodes of the graph. Every edge endpoint must be one of them.
+    :param u: First endpoint of every edge.
+    :param v: Second endpoint of every edge.
+    :return: The component label of every node (0, 1, ...), the number of nodes and the number of edges of every
+             component.
+    """
+    parent = list(range(int(nodes.max()) + 1 if len(nodes) else 0))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]  # Path halving
+            node = parent[node]
+        return node
+
+    for a, b in zip(u.tolist(), v.tolist()):
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    roots = np.array([find(node) for node in nodes.tolist()], dtype=np.int64)
+    _, labels = np.unique(roots, return_inverse=True)
+    position = np.zeros(len(parent), dtype=np.int64)  # Position of every node in nodes
+    position[nodes] = np.arange(len(nodes))
+    num_components = int(labels.max()) + 1 if len(labels) else 0
+    component_nodes = np.bincount(labels, minlength=num_components)
+    component_edges = np.bincount(labels[position[u]], minlength=num_components)
+    return labels, component_nodes, component_edges
+
+
+def match_pseudoforest(edge_machines: np.ndarray, edge_jobs: np.ndarray, num_machines: int, num_jobs: int):
+    """
+    Matches every job of a pseudoforest whose jobs have degree at least 2 with a different machine, in O(V + E) and
+    without recursion.
+    Leaves are peeled off one at a time with a queue. A machine leaf is matched with its job if the job has no
+    machine yet, so every job of a tree gets one of the machines below it, as in the rooted tree of Step 5.
+    What is left after the peeling is the single cycle of every unicyclic component. Every job on a cycle without a
+    machine is matched with the next machine around the cycle, so the cycle gives alternate edges.
+    The one remaining neighbor of a node is the XOR of its remaining neighbors, so the peeling and the walks need no
+    adjacency lists. Only the first step around every cycle looks up the machines of its job.
+    :param edge_machines: Machine i of every edge.
+    :param edge_jobs: Job j of every edge.
+    :return: The (i, j) of the matching.
+    """
+    num_nodes = num_machines + num_jobs
+    u, v = edge_machines, edge_jobs + num_machines  # Machine i is node i and job j is node m + j
+    degree = np.bincount(np.concatenate((u, v)), minlength=num_nodes).tolist()
+    neighbors = np.zeros(num_nodes, dtype=np.int64)  # XOR of the remaining neighbors of every node
+    np.bitwise_xor.at(neighbors, u, v)
+    np.bitwise_xor.at(neighbors, v, u)
+    neighbors = neighbors.tolist()
+    match = [-1] * num_nodes  # The machine of every job node
+
+    # Peel the leaves
+    leaves = deque(node for node in range(num_nodes) if degree[node] == 1)
+    while leaves:
+        leaf = leaves.popleft()
+        if degree[leaf] != 1:
+            continue  # The last node of a tree
+        other = neighbors[leaf]
+        degree[leaf] = 0
+        if leaf < num_machines and match[other] == -1:
+            match[other] = leaf
+        neighbors[other] ^= leaf
+        degree[other] -= 1
+        if degree[other] == 1:
+            leaves.append(other)
+
+    # Walk every cycle from one of its jobs, the nodes with degree 2 are left
+    order = np.argsort(edge_jobs, kind="stable")
+    machines_of, first_edge = edge_machines[order].tolist(), np.searchsorted(edge_jobs[order], np.arange(num_jobs + 1))
+    for start in range(num_machines, num_nodes):
+        if degree[start] != 2:
+            continue
+        job, j = start, start - num_machines
+        machine = next(i for i in machines_of[first_edge[j]:first_edge[j + 1]] if degree[i] == 2)
+        while True:
+            if match[job] == -1:
+                match[job] = machine
+            degree[job] = degree[machine] = 0  # Visited
+            job = neighbors[machine] ^ job
+            if job == start:
+                break
+            machine = neighbors[job] ^ machine
+
+    return [(match[node], node - num_machines) for node in range(num_machines, num_nodes) if match[node] != -1]
+
+
+def node_name(node: int, num_machines: int) -> str:
+    return f"m{node}" if node < num_machines else f"j{node - num_machines}"
+
+
+def to_networkx(nodes: np.ndarray, edge_machines: np.ndarray, edge_jobs: np.ndarray, num_machines: int) -> "nx.Graph":
+    import networkx as nx
+    graph = nx.Graph()
+    for node in nodes.tolist():
+        graph.add_node(node_name(node, num_machines), bipartite=0 if node < num_machines else 1)
+    graph.add_edges_from((f"m{i}", f"j{j}") for i, j in zip(edge_machines.tolist(), edge_jobs.tolist()))
+    return graph
+
+
+def component_node_names(nodes: np.ndarray, labels: np.ndarray, num_machines: int) -> list[set[str]]:
+    components = [set() for _ in range(int(labels.max()) + 1 if len(labels) else 0)]
+    for node, label in zip(nodes.tolist(), labels.tolist()):
+        components[label].add(node_name(node, num_machines))
+    return components
 
 
 # %-------------------------- Helpful Functions for printing and visualization    --------------------------------%
@@ -258,13 +319,16 @@ def get_job_nodes(graph):
 
 # Print   -----------------------------------------
 def print_graph_info(bipartite_graph):
-    print("Number of nodes:", len(bipartite_graph.graph.nodes))
-    print("Number of edges:", len(bipartite_graph.graph.edges))
+    print("Number of nodes:", bipartite_graph.number_of_nodes())
+    print("Number of edges:", bipartite_graph.number_of_edges())
     print("List size of different connected components:", len(bipartite_graph.connected_components), "\n")
 
 
 # Visualize    ------------------------------------
+# matplotlib and NetworkX are imported by the functions that draw, so the solver never loads them.
 def visualize_graph(bipartite_graph):
+    from matplotlib import pyplot as plt
+    import networkx as nx
     plt.figure()  # Create a new figure
     pos = nx.bipartite_layout(bipartite_graph.graph, nodes=get_machine_nodes(bipartite_graph.graph))
     node_size = 800
@@ -278,6 +342,8 @@ def visualize_graph_components(bipartite_graph):
     Visualizes Bipartite Graph using NetworkX.
     :param bipartite_graph: BipartiteGraph instance.
     """
+    from matplotlib import pyplot as plt
+    import networkx as nx
     colors = cycle(["skyblue", "limegreen", "tomato", "gold", "orchid", "deepskyblue"])
     pos = nx.spring_layout(bipartite_graph.graph)
     node_size = 800
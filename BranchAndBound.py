@@ -0,0 +1,307 @@
+"""Exact schedules for instances with few machines, without an IP solver.
+
+Dynamic programming over load vectors, for m <= 3:
+    After the first k jobs, f[l_0, ..., l_{m-2}] is the smallest load of the last machine over the schedules that give
+    the other machines loads l_0, ..., l_{m-2}. A job either raises the load of one of the first m-1 machines, a shift
+    of f along that axis, or adds its time to the value. Loads above the upper bound never lead to a better schedule,
+    so f has at most (upper bound + 1)^(m-1) cells, and fewer for the first jobs, whose loads are still small.
+    The machine of every job is read back from the layers of f, from the last job to the first.
+    The layers are all kept, so the dynamic programming is only used when their bound fits in DP_MAX_BYTES, and it
+    stops at its time limit like the branch and bound, which then continues from the same incumbent.
+Depth-first branch and bound, for any m, with an explicit stack instead of recursion, so n is not limited by the
+recursion limit:
+    Jobs are assigned in decreasing order of their processing-time spread, max_i pij - min_i pij, since a wrong
+    machine costs those jobs the most, and every job tries its machines by increasing completion time.
+    A node is pruned when its bound reaches the best makespan so far. The bound is the largest load, and the loads plus
+    sum_j min_i pij of the remaining jobs over m. The root bound is also the LP relaxation bound.
+    A node whose loads were already seen at the same depth is pruned, and machines with identical processing times
+    are interchangeable, so their loads are compared sorted. The seen loads are kept up to BB_MAX_SEEN_BYTES; after
+    that, new loads are no longer kept and only the ones already kept prune.
+Both start from a given incumbent or from a heuristic schedule improved by the local search: every job on its fastest
+machine for the dynamic programming, which only needs a bound of the loads, and the best of the portfolio for the
+branch and bound, where a better start prunes more.
+"""
+import sys
+import time
+import numpy as np
+from Heuristics import heuristic_schedule, min_processing_schedule
+from LocalSearch import local_search
+from OptimalSchedule import identical_machines
+from SearchProcedure import lp_lower_bound, processing_lower_bound
+from Solution import Assignment
+from Tracing import span, count
+
+DP_MACHINES = 3  # Largest m for the dynamic programming
+DP_MAX_BYTES = 2 ** 28  # Largest total size of the layers of f
+BB_MAX_SEEN_BYTES = 2 ** 28  # Largest total size of the loads the branch and bound keeps for pruning
+
+
+def exact_schedule(P: list[list[int]], time_limit: float = None, incumbent: Assignment = None,
+                   lower_bound: int = 0) -> (int, Assignment, float):
+    """
+    The optimal schedule, by dynamic programming when m <= DP_MACHINES and its layers fit in DP_MAX_BYTES, by branch
+    and bound otherwise, or when the dynamic programming runs out of time.
+    :param P: 2D array representing the processing times of jobs on machines, integers.
+    :param time_limit: Seconds the search may run. None for no limit.
+    :param incumbent: A complete schedule to start from, or None.
+    :param lower_bound: A known lower bound of the optimal makespan.
+    :return: The best makespan found, the machine of every job and the proven optimality gap, the same as
+    optimal_schedule. The gap is 0 when the schedule is optimal.
+    """
+    P = np.asarray(P, dtype=np.int64)
+    m, n = P.shape
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    if m <= DP_MACHINES:
+        upper_bound, incumbent = starting_schedule(P, incumbent, portfolio=False)
+        if dp_bytes(P, upper_bound) <= DP_MAX_BYTES:
+            result = dp_schedule(P, incumbent, time_limit)
+            if result is not None:
+                return result
+            count("dp_schedule.timeouts")
+    if deadline is not None:
+        time_limit = max(deadline - time.perf_counter(), 0.0)
+    return branch_and_bound_schedule(P, time_limit, incumbent, lower_bound)
+
+
+def starting_schedule(P: np.ndarray, incumbent: Assignment = None, portfolio: bool = True) -> (int, Assignment):
+    """
+    :param portfolio: Start from the best schedule of the heuristic portfolio instead of every job on its fastest
+    machine.
+    :return: The makespan and the schedule the exact methods start from, the incumbent or a heuristic schedule after
+    a short local search.
+    """
+    if incumbent is None:
+        incumbent = heuristic_schedule(P)[1] if portfolio else min_processing_schedule(P)
+        return local_search(P, incumbent, time_limit=1)
+    return incumbent.makespan(P), incumbent
+
+
+def dp_dtype(P: np.ndarray, upper_bound: int) -> np.dtype:
+    """
+    :return: The type of the cells of f, int16 when every value below the upper bound plus a processing time fits.
+    """
+    return np.dtype(np.int16 if upper_bound + 1 + P.max() < np.iinfo(np.int16).max else np.int64)
+
+
+def dp_bytes(P: np.ndarray, upper_bound: int) -> int:
+    """
+    :return: An upper bound of the total size in bytes of the layers of f.
+    """
+    m, n = P.shape
+    return (n + 1) * (upper_bound + 1) ** (m - 1) * dp_dtype(P, upper_bound).itemsize
+
+
+# %-------------------------- Dynamic programming over load vectors    --------------------------------------------%
+def dp_schedule(P: list[list[int]], incumbent: Assignment = None,
+                time_limit: float = None) -> (int, Assignment, float):
+    """
+    The optimal schedule by dynamic programming over the loads of the first m-1 machines.
+    The caller checks dp_bytes against the memory it can spare, the layers are not limited here.
+    :param P: 2D array representing the processing times of jobs on machines, integers.
+    :param incumbent: A complete schedule, its makespan bounds the loads. None starts from the heuristic schedule.
+    :param time_limit: Seconds the dynamic programming may run. None for no limit.
+    :return: The optimal makespan, the machine of every job and the gap, 0. None if it ran out of time.
+    """
+    P = np.asarray(P, dtype=np.int64)
+    m, n = P.shape
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    upper_bound, incumbent = starting_schedule(P, incumbent, portfolio=False)
+    if m == 1:
+        return int(P.sum()), Assignment(np.zeros(n, dtype=np.int32)), 0.0
+    dims = m - 1
+    infinity = upper_bound + 1  # A load above the upper bound
+    dtype = dp_dtype(P, upper_bound)
+    # Jobs with small times on the first m-1 machines first, so the layers grow slowly
+    order = np.argsort(P[:dims].sum(axis=0), kind="stable")
+
+    with span("dp_schedule", m=m, n=n, upper_bound=upper_bound) as dp_span:
+        f = np.zeros((1,) * dims, dtype=dtype)
+        layers = [f]
+        for j in order.tolist():
+            if deadline is not None and time.perf_counter() > deadline:
+                dp_span.set("stopped", True)
+                return None
+            p = P[:, j].tolist()
+            shape = tuple(min(upper_bound, size - 1 + p[a]) + 1 for a, size in enumerate(f.shape))
+            new = np.full(shape, infinity, dtype=dtype)
+            box = tuple(slice(0, size) for size in f.shape)
+            np.minimum(f + p[-1], infinity, out=new[box])  # On the last machine
+            for a in range(dims):  # On machine a, f shifted by p[a] along axis a
+                length = min(f.shape[a], shape[a] - p[a])
+                if length <= 0:
+                    continue
+                source, target = list(box), list(box)
+                source[a], target[a] = slice(0, length), slice(p[a], p[a] + length)
+                np.minimum(new[tuple(target)], f[tuple(source)], out=new[tuple(target)])
+            f = new
+            layers.append(f)
+        dp_span.set("cells", sum(layer.size for layer in layers))
+
+        # The makespan of every cell is the largest of its loads
+        makespans = f.astype(np.int64)
+        for loads in np.ogrid[tuple(slice(0, size) for size in f.shape)]:
+            makespans = np.maximum(makespans, loads)
+        cell = np.unravel_index(int(makespans.argmin()), f.shape)
+        makespan = int(makespans[cell])
+        if makespan >= infinity:  # The upper bound was already optimal
+            return upper_bound, incumbent, 0.0
+
+        # Read the machines back: the job went where the previous layer explains the value of the cell
+        machines = np.empty(n, dtype=np.int32)
+        position = list(cell)
+        for k in range(n - 1, -1, -1):
+            j, previous, value = order[k], layers[k], int(layers[k + 1][tuple(position)])
+            p = P[:, j].tolist()
+            machines[j] = dims
+            if all(x < size for x, size in zip(position, previous.shape)) and \
+                    int(previous[tuple(position)]) + p[-1] == value:
+                continue
+            for a in range(dims):
+                before = position.copy()
+                before[a] -= p[a]
+                if before[a] >= 0 and all(x < size for x, size in zip(before, previous.shape)) and \
+                        int(previous[tuple(before)]) == value:
+                    machines[j], position = a, before
+                    break
+    return makespan, Assignment(machines), 0.0
+
+
+# %-------------------------- Depth-first branch and bound    -----------------------------------------------------%
+def seen_entry_bytes(m: int) -> int:
+    """
+    :return: An estimate of the bytes one seen state takes: the (k, loads) tuple, its m loads as ints, and its slot in
+    the set.
+    """
+    return sys.getsizeof((0, ())) + sys.getsizeof((0,) * m) + sys.getsizeof(2 ** 20) * (m + 1) + 40
+def branch_and_bound_schedule(P: list[list[int]], time_limit: float = None, incumbent: Assignment = None,
+                              lower_bound: int = 0, lp_bound: bool = True) -> (int, Assignment, float):
+    """
+    The optimal schedule by depth-first branch and bound.
+    :param P: 2D array representing the processing times of jobs on machines, integers.
+    :param time_limit: Seconds the search may run. None for no limit.
+    :param incumbent: A complete schedule to start from, or None for the heuristic schedule.
+    :param lower_bound: A known lower bound of the optimal makespan.
+    :param lp_bound: Also bound the root with the LP relaxation.
+    :return: The best makespan found, the machine of every job and the proven optimality gap.
+    """
+    best, incumbent, lower_bound = branch_and_bound(P, time_limit, incumbent, lower_bound, lp_bound)
+    gap = (best - lower_bound) / best if best else 0.0
+    return best, incumbent, gap
+
+
+def branch_and_bound(P: list[list[int]], time_limit: float = None, incumbent: Assignment = None,
+                     lower_bound: int = 0, lp_bound: bool = True) -> (int, Assignment, int):
+    """
+    Same as branch_and_bound_schedule.
+    :return: The best makespan found, the machine of every job and the lower bound of the optimal makespan it proved,
+    the makespan if the search finished.
+    """
+    P = np.asarray(P, dtype=np.int64)
+    m, n = P.shape
+    best, incumbent = starting_schedule(P, incumbent)
+    lower_bound = max(lower_bound, processing_lower_bound(P))
+    if lp_bound and lower_bound < best:
+        lower_bound = max(lower_bound, lp_lower_bound(P, best))
+    if lower_bound >= best:
+        return best, incumbent, best
+
+    spread = P.max(axis=0) - P.min(axis=0)
+    order = np.argsort(-spread, kind="stable").tolist()
+    columns = [P[:, j].tolist() for j in order]
+    remaining = np.concatenate((np.cumsum(P.min(axis=0)[order][::-1])[::-1], [0])).tolist()  # Work of jobs k, k+1, ..
+    groups = identical_machines(P)
+    twin = list(range(m))  # The first machine identical to every machine
+    for group in groups:
+        for i in group:
+            twin[i] = group[0]
+
+    loads = [0] * m
+    machines = [0] * n  # Machine of the k-th job of the order
+    best_machines = None
+    seen = set()
+    max_seen = BB_MAX_SEEN_BYTES // seen_entry_bytes(m)
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    nodes, stopped = 0, False
+
+    def key(k: int) -> tuple:
+        if not groups:
+            return k, tuple(loads)
+        canonical = loads.copy()
+        for group in groups:
+            for i, load in zip(group, sorted((loads[i] for i in group), reverse=True)):
+                canonical[i] = load
+        return k, tuple(canonical)
+
+    def enter(k: int, total: int) -> list:
+        """
+        Visits the node of the first k jobs, with loads and machines as they are.
+        :return: Its machines for job k in the order they are tried, or None if the node is a leaf or pruned.
+        """
+        nonlocal best, best_machines, nodes, stopped
+        nodes += 1
+        if k == n:
+            makespan = max(loads)
+            if makespan < best:
+                best, best_machines = makespan, machines.copy()
+            return None
+        if deadline is not None and nodes % 1024 == 0 and time.perf_counter() > deadline:
+            stopped = True
+        if stopped or max(max(loads), -(-(total + remaining[k]) // m)) >= best:
+            return None
+        state = key(k)
+        if state in seen:
+            return None
+        if len(seen) < max_seen:
+            seen.add(state)
+        row = columns[k]
+        return sorted(range(m), key=lambda i: loads[i] + row[i])
+
+    with span("branch_and_bound", m=m, n=n, upper_bound=best, lower_bound=lower_bound) as search_span:
+        # Depth-first with an explicit stack, one frame per job of the path: [k, total, machines to try, next
+        # position, (twin, load) of the machines tried, machine of job k or -1]
+        # Identical machines with equal loads are tried once.
+        stack = []
+        candidates = enter(0, 0)
+        if candidates is not None:
+            stack.append([0, 0, candidates, 0, set(), -1])
+        while stack:
+            frame = stack[-1]
+            k, total, candidates, position, tried, assigned = frame
+            row = columns[k]
+            if assigned >= 0:  # Back from the subtree of job k on machine assigned
+                loads[assigned] -= row[assigned]
+                frame[5] = -1
+                if best <= lower_bound or stopped:
+                    break
+            chosen = -1
+            while position < len(candidates):
+                i = candidates[position]
+                position += 1
+                if loads[i] + row[i] >= best:
+                    position = len(candidates)
+                    break
+                if (twin[i], loads[i]) not in tried:
+                    tried.add((twin[i], loads[i]))
+                    chosen = i
+                    break
+            frame[3] = position
+            if chosen < 0:
+                stack.pop()
+                continue
+            loads[chosen] += row[chosen]
+            machines[k] = frame[5] = chosen
+            candidates = enter(k + 1, total + row[chosen])
+            if candidates is not None:
+                stack.append([k + 1, total + row[chosen], candidates, 0, set(), -1])
+        count("branch_and_bound.nodes", nodes)
+        search_span.set("nodes", nodes)
+        search_span.set("seen", len(seen))
+        search_span.set("makespan", best)
+
+    if best_machines is not None:
+        assignment = np.empty(n, dtype=np.int32)
+        assignment[order] = best_machines
+        incumbent = Assignment(assignment)
+    if not stopped:
+        lower_bound = best
+    return best, incumbent, min(lower_bound, best)
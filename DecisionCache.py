@@ -0,0 +1,194 @@
+"""Cache of the 2-Relaxed Decision Procedure and of LP(P, d⃗,t).
+
+Results are keyed by a fingerprint of the instance P (a hash of its shape and values) and by the deadline d, or by
+d⃗ and t for LP, and by what else they depend on: the solver backend, whose LP solutions round differently, the LP of
+the job types and the time limit of the solver. They are kept pickled in an in-memory LRU that evicts the least
+recently used results when their total size exceeds max_bytes, and optionally in a directory, so repeated runs of the
+same instances skip the solver.
+"No" answers are cached too, except those of a time-limited solve, which may be a solve that was cut off.
+
+The counters hits, misses, disk_hits, stores and evictions can be read with stats().
+"""
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+import numpy as np
+from RoundingTheorem import LP
+from SolverBackends import SolverBackend, select_backend
+
+
+def instance_fingerprint(P) -> str:
+    """
+    :param P: 2D array representing the processing times of jobs on machines.
+    :return: A hex digest that changes with the shape or any value of P.
+    """
+    P = np.ascontiguousarray(P, dtype=np.int64)
+    digest = hashlib.sha256(repr(P.shape).encode())
+    digest.update(P.tobytes())
+    return digest.hexdigest()
+
+
+def decision_variant(backend=None, aggregate: bool = False) -> tuple:
+    """
+    What a result of the decision procedure depends on besides P and d, the last part of its key.
+    auto is resolved to the backend it picks, so the key is the same for every way of asking for that backend, and an
+    on-disk store is not shared by auto with and without highspy.
+    :param backend: The SolverBackend of the model, a backend name or None for auto.
+    :param aggregate: The model solves the LP of the job types, as decided by JobTypes.aggregation.
+    :return: The name of the backend, the aggregation and the time limit of the backend.
+    """
+    if isinstance(backend, SolverBackend):
+        return backend.name, bool(aggregate), backend.time_limit
+    return select_backend() if backend in (None, "auto") else backend, bool(aggregate), None
+
+
+def model_variant(model=None) -> tuple:
+    """
+    :param model: The DecisionModel or AggregatedDecisionModel of the decision procedure, None for LP.
+    :return: The decision_variant of the model.
+    """
+    if model is None:
+        return decision_variant()
+    return decision_variant(model.backend, model.aggregated)
+
+
+class DecisionCache:
+    def __init__(self, max_bytes: int = 256 * 2 ** 20, directory: str = None):
+        """
+        :param max_bytes: Maximum total size of the pickled results kept in memory.
+        :param directory: Directory of the on-disk store. None for memory only.
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.entries = OrderedDict()  # key -> pickled result, least recently used first
+        self.size = 0  # Total size of self.entries in bytes
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # %-------------------------- Decision Procedure and LP    --------------------------------------------------%
+    def decision(self, P, d: int, model=None, fingerprint: str = None):
+        """
+        two_relaxed_decision_procedure(P, d, model), answered from the cache when possible.
+        :param fingerprint: instance_fingerprint(P), if the caller already has it.
+        """
+        from SearchProcedure import two_relaxed_decision_procedure  # SearchProcedure uses the cache
+
+        fingerprint = fingerprint or instance_fingerprint(P)
+        variant = model_variant(model)
+        found, result = self.lookup_decision(P, d, fingerprint, variant)
+        if not found:
+            result = two_relaxed_decision_procedure(P, d, model)
+            self.store_decision(d, fingerprint, result, variant)
+        return result
+
+    def lookup_decision(self, P, d: int, fingerprint: str, variant: tuple = None):
+        """
+        :param variant: The decision_variant of the model, None for LP with the auto backend.
+        :return: (True, result of the decision procedure) on a hit and (False, None) on a miss.
+        """
+        found, result = self.lookup(("decision", fingerprint, d, variant or decision_variant()))
+        if result is not None:
+            result.P = P
+        return found, result
+
+    def store_decision(self, d: int, fingerprint: str, result, variant: tuple = None):
+        """
+        Keeps the result, unless it is a 'no' of a time-limited solve.
+        :param variant: The decision_variant of the model, None for LP with the auto backend.
+        """
+        variant = variant or decision_variant()
+        if result is None and variant[2] is not None:
+            return
+        self.store(("decision", fingerprint, d, variant), result)
+
+    def lp(self, P, di: list[int], t: int, fingerprint: str = None, backend=None):
+        """
+        LP(P, di, t), answered from the cache when possible.
+        :param fingerprint: instance_fingerprint(P), if the caller already has it.
+        :param backend: The SolverBackend of LP, a backend name or None for auto.
+        """
+        deadlines = hashlib.sha256(np.asarray(di, dtype=np.int64).tobytes()).hexdigest()
+        key = ("lp", fingerprint or instance_fingerprint(P), deadlines, t, decision_variant(backend))
+        found, result = self.lookup(key)
+        if not found:
+            result = LP(P, di, t, backend=backend)
+            if result is not None or key[-1][2] is None:
+                self.store(key, result)
+        return result
+
+    # %-------------------------- Storage    ---------------------------------------------------------------------%
+    def lookup(self, key: tuple):
+        """
+        :param key: The key of the result.
+        :return: (True, result) on a hit and (False, None) on a miss. A hit returns a new copy of the result.
+        """
+        data = self.entries.get(key)
+        if data is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return True, pickle.loads(data)
+        if self.directory:
+            path = self.path(key)
+            if os.path.isfile(path):
+                with open(path, "rb") as file:
+                    data = file.read()
+                self.disk_hits += 1
+                self.hits += 1
+                self.remember(key, data)
+                return True, pickle.loads(data)
+        self.misses += 1
+        return False, None
+
+    def store(self, key: tuple, result):
+        """
+        Keeps the result in memory, and on disk if there is a directory.
+        The instance P of a SchedulingProblem is not stored, since it is part of the key.
+        """
+        P = getattr(result, "P", None)
+        if P is not None:
+            result.P = None
+        try:
+            data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            if P is not None:
+                result.P = P
+        self.stores += 1
+        self.remember(key, data)
+        if self.directory:
+            handle, temporary = tempfile.mkstemp(dir=self.directory)
+            with os.fdopen(handle, "wb") as file:
+                file.write(data)
+            os.replace(temporary, self.path(key))  # Other processes never see half a file
+
+    def remember(self, key: tuple, data: bytes):
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        if len(data) > self.max_bytes:
+            return
+        self.entries[key] = data
+        self.size += len(data)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def path(self, key: tuple) -> str:
+        return os.path.join(self.directory, hashlib.sha256(repr(key).encode()).hexdigest() + ".pkl")
+
+    def clear(self):
+        """
+        Empties the in-memory LRU. The on-disk store is kept.
+        """
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "disk_hits": self.disk_hits, "stores": self.stores,
+                "evictions": self.evictions, "entries": len(self.entries), "bytes": self.size}
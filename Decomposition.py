@@ -0,0 +1,109 @@
+"""Decomposition of very large instances into blocks that are solved in parallel.
+
+The LP of the whole instance has a variable for every pair (i, j) with pij <= t, so it outgrows CBC long before the
+instance outgrows memory. Instead:
+    1. The global bounds: the lower bound max(max_j min_i pij, ⌈sum_j min_i pij / m⌉) and the makespan of a fast
+       heuristic schedule.
+    2. Optionally the machines are split into groups of consecutive machines.
+    3. The machines of every group are dealt into blocks, each machine to the block with the least work so far, in
+       decreasing order of their work: the fastest times of the jobs that are fastest on them. Every job goes to the
+       block of its fastest machine, so the blocks get similar work and no two blocks share a machine.
+    4. Every block runs the Binary Search Procedure on its own machines and jobs in a worker process.
+    5. The block schedules are merged, so the merged makespan is the largest makespan of a block, at most twice the
+       deadline of that block. The local search repairs it by moving and swapping jobs between machines of any block.
+The result is reported against the global lower bound.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from Heuristics import heuristic_schedule, lpt_schedule, min_processing_schedule
+from LocalSearch import local_search
+from SearchProcedure import binary_search_procedure, processing_lower_bound
+from Solution import Assignment
+from Tracing import span, count
+
+
+def decomposition_schedule(P: list[list[int]], job_blocks: int = 4, machine_blocks: int = 1, workers: int = None,
+                           gap: float = 0.0, repair_time_limit: float = 30) -> (int, Assignment, int):
+    """
+    Solves the instance block by block and merges the schedules.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param job_blocks: Number of blocks every machine group is split into, each with its own machines and the jobs
+    that are fastest on them. At most the number of machines of the group.
+    :param machine_blocks: Number of machine groups.
+    :param workers: Number of worker processes. Defaults to the number of CPUs. 1 solves the blocks in this process.
+    :param gap: The gap of the Binary Search Procedure of every block.
+    :param repair_time_limit: Seconds of local search on the merged schedule. 0 skips the repair.
+    :return: The makespan, the machine of every job and the global lower bound of the optimal makespan.
+    """
+    P = np.asarray(P)
+    m, n = P.shape
+    with span("decomposition", m=m, n=n, job_blocks=job_blocks, machine_blocks=machine_blocks) as decomposition_span:
+        lower_bound = max(processing_lower_bound(P), 1)
+        heuristics = {"min_processing": min_processing_schedule, "lpt": lambda P, index: lpt_schedule(P)}
+        upper_bound, fallback = heuristic_schedule(P, heuristics)
+
+        blocks = list(partition(P, job_blocks, machine_blocks))  # (machines, jobs)
+        decomposition_span.set("blocks", len(blocks))
+
+        workers = min(workers or os.cpu_count() or 1, len(blocks))
+        arguments = [(P[np.ix_(machines, jobs)], gap) for machines, jobs in blocks]
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_solve_block, *zip(*arguments)))
+        else:
+            results = [_solve_block(*block) for block in arguments]
+
+        # Merge the block schedules, a block without a schedule keeps the heuristic one
+        merged = fallback.machines.copy()
+        for (machines, jobs), block_machines in zip(blocks, results):
+            if block_machines is not None:
+                merged[jobs] = machines[block_machines]
+            else:
+                count("decomposition.fallbacks")
+        assignment = Assignment(merged)
+        makespan = assignment.makespan(P)
+        decomposition_span.set("merged", makespan)
+
+        if repair_time_limit:
+            makespan, assignment = local_search(P, assignment, time_limit=repair_time_limit)
+        if makespan > upper_bound:  # The blocks did worse than the heuristic
+            makespan, assignment = upper_bound, fallback
+        decomposition_span.set("makespan", makespan)
+        decomposition_span.set("lower_bound", lower_bound)
+    return makespan, assignment, lower_bound
+
+
+def partition(P: np.ndarray, job_blocks: int, machine_blocks: int = 1):
+    """
+    Splits the machines into groups of consecutive machines and the machines of every group into blocks with similar
+    work, and sends every job to the block of its fastest machine.
+    :return: The machines and the jobs of every block with jobs. No two blocks share a machine or a job.
+    """
+    m, n = P.shape
+    fastest_machines = P.argmin(axis=0)
+    work = np.bincount(fastest_machines, weights=P[fastest_machines, np.arange(n)], minlength=m)
+    block_of_machine = np.empty(m, dtype=np.int64)
+    blocks = 0
+    for machines in np.array_split(np.arange(m), min(machine_blocks, m)):
+        loads = np.zeros(min(job_blocks, len(machines)))
+        for i in machines[np.argsort(-work[machines], kind="stable")].tolist():
+            b = int(loads.argmin())
+            block_of_machine[i], loads[b] = blocks + b, loads[b] + work[i]
+        blocks += len(loads)
+    block_of_job = block_of_machine[fastest_machines]
+    for b in range(blocks):
+        jobs = np.flatnonzero(block_of_job == b)
+        if len(jobs):
+            yield np.flatnonzero(block_of_machine == b), jobs
+
+
+def _solve_block(P_block: np.ndarray, gap: float):
+    """
+    Runs the Binary Search Procedure on one block, from the lower bound of the block.
+    :return: The machine of every job of the block, in the block's numbering, or None if there is no schedule.
+    """
+    sch_problem = binary_search_procedure(P_block, gap=gap, graphs="none")
+    if sch_problem is None or not sch_problem.xij.is_complete():
+        return None
+    return sch_problem.xij.machines
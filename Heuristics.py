@@ -0,0 +1,259 @@
+"""Constructive heuristics for the upper limit t of the Binary Search Procedure.
+
+Every heuristic builds a complete schedule and the portfolio keeps the one with the smallest makespan. Any complete
+schedule with makespan t is a solution of LP(P, t), so a smaller t only removes deadlines the search had to test.
+    min processing: every job goes to its fastest machine, one argmin over the columns of P. It ignores the loads.
+    capped:         every machine takes jobs up to a cap on its load, the jobs try their CAPPED_RANKS fastest machines
+                    in turn, and the jobs left go to the machine with the smallest completion time. Every machine
+                    takes its candidates of a rank in the order of a priority: shortest first, longest first, or
+                    sufferage, the largest loss to the next machine of the job first. A binary search over the cap,
+                    between the lower bound of the loads and the makespan of min processing, keeps the best schedule.
+    min-min:        the job with the smallest completion time loads + pij goes first, to that machine.
+    max-min:        the job whose smallest completion time is largest goes first, to that machine.
+    sufferage:      the job that loses the most if it misses its best machine goes first, to that machine.
+    LPT:            jobs in decreasing order of their fastest processing time, each to the machine with the smallest
+                    completion time, among the machines with pij at most `ratio` times the job's fastest time.
+
+The capped heuristics take every job of a rank at once: a sort by machine and priority, and a cumulative sum of the
+loads, so they are a few NumPy calls per rank and cap. Min-min, max-min, sufferage and LPT assign one job at a time in
+Python, about 25 us per job with 300 machines, so they are only in the portfolio with loops=True. Min-min, max-min and
+sufferage keep the best and second-best completion time of every unassigned job. A job changes the load of one
+machine i, so only the jobs whose best or second-best machine is i are evaluated again, all at once with NumPy.
+
+Every heuristic is called as heuristic(P, index), with the EligibilityIndex of P or None. The fastest machines and
+times of every job come from the index when there is one.
+"""
+import time
+import numpy as np
+from LinearModel import EligibilityIndex
+from Solution import Assignment
+from Tracing import span
+
+LPT_RATIOS = (1.5, 3.0, None)  # None considers every machine
+CAPPED_RANKS = 8  # Fastest machines every job tries in the capped heuristics before the smallest completion time
+
+
+def min_processing_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    """
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param index: The EligibilityIndex of P, or None.
+    :return: Every job on the machine with its minimum processing time.
+    """
+    return Assignment(index.fastest_machines if index else np.asarray(P).argmin(axis=0))
+
+
+def ranked_machines(P: np.ndarray, ranks: int, index: EligibilityIndex = None) -> np.ndarray:
+    """
+    :param ranks: Number of machines of every job, at most m.
+    :return: n x ranks array, the fastest machines of every job in increasing processing time, ties by machine.
+    """
+    m, n = P.shape
+    if index is not None:
+        return index.machines[index.job_ranks.reshape(n, m)[:, :ranks]]
+    if ranks == m or not np.issubdtype(P.dtype, np.integer):
+        return np.argsort(P, axis=0, kind="stable")[:ranks].T
+    keys = P.astype(np.int64) * m + np.arange(m)[:, None]  # Distinct, so ties go to the first machine as in the index
+    candidates = np.argpartition(keys, ranks - 1, axis=0)[:ranks]
+    order = np.argsort(np.take_along_axis(keys, candidates, axis=0), axis=0)
+    return np.take_along_axis(candidates, order, axis=0).T
+
+
+def capped_shortest_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    return capped_schedule(P, lambda time, following: time, index)
+
+
+def capped_longest_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    return capped_schedule(P, lambda time, following: -time, index)
+
+
+def capped_sufferage_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    return capped_schedule(P, lambda time, following: time - following, index)
+
+
+def capped_schedule(P: list[list[int]], priority, index: EligibilityIndex = None,
+                    ranks: int = CAPPED_RANKS) -> Assignment:
+    """
+    Binary search over the cap of the loads, with a schedule of fill_to_cap for every cap.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param priority: Maps the processing times of the candidates of a rank on their machines, and on their machines of
+    the next rank (np.inf after the last rank), to their priorities. Every machine takes the smallest priorities first.
+    :param index: The EligibilityIndex of P, or None.
+    :param ranks: The fastest machines every job tries.
+    :return: The schedule with the smallest makespan.
+    """
+    P = np.asarray(P)
+    m, n = P.shape
+    order = ranked_machines(P, min(ranks, m), index)
+    fastest = P[order[:, 0], np.arange(n)] if n else np.zeros(0)
+    best = Assignment(order[:, 0])
+    best_makespan = best.makespan(P) if n else 0
+    lower, upper = max(fastest.max(initial=0), -(-fastest.sum() // m)), best_makespan
+    while lower < upper:
+        cap = (lower + upper) // 2
+        machines, makespan = fill_to_cap(P, cap, order, priority)
+        if makespan < best_makespan:
+            best, best_makespan = Assignment(machines), makespan
+        if makespan <= cap:
+            upper = makespan
+        else:
+            lower = cap + 1
+    return best
+
+
+def fill_to_cap(P: np.ndarray, cap, order: np.ndarray, priority) -> (np.ndarray, float):
+    """
+    Every rank, the jobs left go to their machine of that rank in the order of their priorities while the load of the
+    machine stays at most cap. The jobs left after the last rank go to the machine with the smallest completion time
+    on the loads of the ranks.
+    :param order: n x ranks array of the machines of every job, see ranked_machines.
+    :return: The machine of every job and the makespan.
+    """
+    m, n = P.shape
+    loads = np.zeros(m)
+    machines = np.empty(n, dtype=np.int64)
+    jobs = np.arange(n)
+    for rank in range(order.shape[1]):
+        if not len(jobs):
+            break
+        candidates = order[jobs, rank]
+        times = P[candidates, jobs]
+        following = P[order[jobs, rank + 1], jobs] if rank + 1 < order.shape[1] else np.full(len(jobs), np.inf)
+        sort = np.lexsort((priority(times, following), candidates))
+        candidates, times, jobs = candidates[sort], times[sort], jobs[sort]
+        # Load of the machine of every candidate, with the candidates before it on the same machine
+        total = np.cumsum(times)
+        starts = np.flatnonzero(np.r_[True, candidates[1:] != candidates[:-1]])
+        before = np.repeat(total[starts] - times[starts], np.diff(np.r_[starts, len(jobs)]))
+        fits = total - before + loads[candidates] <= cap
+        machines[jobs[fits]] = candidates[fits]
+        loads += np.bincount(candidates[fits], weights=times[fits], minlength=m)
+        jobs = np.sort(jobs[~fits])
+    if len(jobs):
+        left = np.argmin(loads[:, None] + P[:, jobs], axis=0)
+        machines[jobs] = left
+        loads += np.bincount(left, weights=P[left, jobs], minlength=m)
+    return machines, loads.max(initial=0)
+
+
+def min_min_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    return completion_time_schedule(P, lambda best, second: best, index)
+
+
+def max_min_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    return completion_time_schedule(P, lambda best, second: -best, index)
+
+
+def sufferage_schedule(P: list[list[int]], index: EligibilityIndex = None) -> Assignment:
+    return completion_time_schedule(P, lambda best, second: best - second, index)
+
+
+def completion_time_schedule(P: list[list[int]], priority, index: EligibilityIndex = None) -> Assignment:
+    """
+    Assigns the jobs one at a time, each to the machine with its smallest completion time.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param priority: Maps the best and second-best completion times of the unassigned jobs to their priorities.
+    The job with the smallest priority goes next.
+    :param index: The EligibilityIndex of P, or None. With empty machines, the completion times are the fastest and
+    second-fastest processing times of every job.
+    :return: The schedule.
+    """
+    P = np.asarray(P)
+    m, n = P.shape
+    fastest = ranked_machines(P, min(m, 2), index)
+    P = P.astype(np.float64)
+    loads = np.zeros(m)
+    machines = np.full(n, -1, dtype=np.int32)
+    best_machine, second_machine = np.zeros(n, dtype=np.int64), np.zeros(n, dtype=np.int64)
+    best, second = np.zeros(n), np.zeros(n)
+
+    def evaluate(jobs):
+        completion = loads[:, None] + P[:, jobs]
+        if m == 1:
+            best_machine[jobs], best[jobs], second[jobs] = 0, completion[0], np.inf
+            return
+        first, following = np.argpartition(completion, 1, axis=0)[:2]
+        columns = np.arange(len(jobs))
+        best_machine[jobs], second_machine[jobs] = first, following
+        best[jobs], second[jobs] = completion[first, columns], completion[following, columns]
+
+    best_machine[:], best[:] = fastest[:, 0], P[fastest[:, 0], np.arange(n)]
+    if m > 1:
+        second_machine[:], second[:] = fastest[:, 1], P[fastest[:, 1], np.arange(n)]
+    else:
+        second[:] = np.inf
+    priorities = priority(best, second)  # np.inf once a job is assigned
+    for _ in range(n):
+        j = int(np.argmin(priorities))
+        i = best_machine[j]
+        machines[j], priorities[j] = i, np.inf
+        loads[i] += P[i, j]
+        affected = np.flatnonzero(((best_machine == i) | (second_machine == i)) & (priorities != np.inf))
+        if len(affected):
+            evaluate(affected)
+            priorities[affected] = priority(best[affected], second[affected])
+    return Assignment(machines)
+
+
+def lpt_schedule(P: list[list[int]], ratio: float = None, index: EligibilityIndex = None) -> Assignment:
+    """
+    Longest Processing Time first, with the machines of every job limited by the ratio of pij to its fastest time.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param ratio: Machines with pij > ratio * min_i pij are not considered. None considers every machine.
+    :param index: The EligibilityIndex of P, or None.
+    :return: The schedule.
+    """
+    P = np.asarray(P, dtype=np.float64)
+    m, n = P.shape
+    fastest = index.fastest_times.astype(np.float64) if index else P.min(axis=0)
+    allowed = P if ratio is None else np.where(P <= ratio * fastest, P, np.inf)
+    loads = np.zeros(m)
+    machines = np.empty(n, dtype=np.int32)
+    for j in np.argsort(-fastest, kind="stable").tolist():
+        i = int(np.argmin(loads + allowed[:, j]))
+        machines[j] = i
+        loads[i] += P[i, j]
+    return Assignment(machines)
+
+
+def portfolio(loops: bool = False, lpt_ratios=LPT_RATIOS) -> dict:
+    """
+    :param loops: Also the heuristics that assign one job at a time: min-min, max-min, sufferage and LPT.
+    :param lpt_ratios: The ratios of the LPT variants.
+    :return: Name -> heuristic, every heuristic maps P and its EligibilityIndex to an Assignment.
+    """
+    heuristics = {"min_processing": min_processing_schedule, "capped_shortest": capped_shortest_schedule,
+                  "capped_longest": capped_longest_schedule, "capped_sufferage": capped_sufferage_schedule}
+    if loops:
+        heuristics.update(min_min=min_min_schedule, max_min=max_min_schedule, sufferage=sufferage_schedule)
+        for ratio in lpt_ratios:
+            name = f"lpt_{ratio}" if ratio else "lpt"
+            heuristics[name] = lambda P, index, ratio=ratio: lpt_schedule(P, ratio, index)
+    return heuristics
+
+
+def heuristic_schedule(P: list[list[int]], heuristics: dict = None, index: EligibilityIndex = None,
+                       deadline: float = None) -> (int, Assignment):
+    """
+    Runs every heuristic of the portfolio and keeps the best schedule.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param heuristics: Name -> heuristic. Defaults to portfolio().
+    :param index: The EligibilityIndex of P, or None.
+    :param deadline: time.perf_counter() after which the heuristics left are skipped. The first one always runs.
+    :return: The smallest makespan and its schedule.
+    """
+    P = np.asarray(P)  # Converted once, not by every heuristic
+    heuristics = heuristics or portfolio()
+    best_makespan, best_assignment = None, None
+    with span("heuristic_schedule", heuristics=len(heuristics)) as portfolio_span:
+        for name, heuristic in heuristics.items():
+            if best_makespan is not None and deadline is not None and time.perf_counter() >= deadline:
+                portfolio_span.set("stopped", name)
+                break
+            with span("heuristic", heuristic=name) as heuristic_span:
+                assignment = heuristic(P, index)
+                makespan = assignment.makespan(P)
+                heuristic_span.set("makespan", makespan)
+            if best_makespan is None or makespan < best_makespan:
+                best_makespan, best_assignment = makespan, assignment
+                portfolio_span.set("best", name)
+    return best_makespan, best_assignment
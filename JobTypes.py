@@ -0,0 +1,182 @@
+"""Job types: the jobs with identical columns P[:, j], solved as one LP column per machine and type.
+
+Processing times from a small integer range repeat, so an instance with few machines and many jobs has many copies of
+every column. A job type k is a distinct column with its multiplicity ck, the number of jobs that share it. The LP of
+the types has a variable 0 <= yik <= ck, the number of jobs of type k on machine i, and one assignment row per type,
+    i ∈ Mk(t) Sum(yik) = ck             for k=1,...,T
+with the deadline and makespan rows of LP(P, d⃗,t) over the types. Every solution of LP(P, d⃗,t) sums to a solution
+of this LP, and every solution of this LP splits into one of LP(P, d⃗,t), so both are feasible for the same d and have
+the same minimum Cmax, with T columns per machine instead of n.
+
+The solution is expanded back to the jobs, type by type, in machine order:
+    1. ⌊yik⌋ jobs of the type go to machine i, with xij = 1.
+    2. The fractions yik - ⌊yik⌋ sum to the number of jobs left, which are filled one after the other: the fractions
+       are laid end to end on [0, r), and job q gets the part of every fraction inside [q, q + 1).
+Every job of step 2 spans consecutive machines of the type and neighbour jobs share one machine, so a type adds a tree
+to the graph G. A component of G then has as many more edges than nodes as the same component of the graph of the
+types, which is a pseudoforest at an extreme point, like G of LP(P, d⃗,t). The rounding runs on the expanded solution,
+so its guarantee of a makespan at most d + max pij <= 2d holds as before. An expanded G that is not a pseudoforest,
+from the tolerance of the solver, is solved again without the types, so a 'no' is always the 'no' of LP(P, d⃗,t).
+
+Only identical columns are merged. A column that is dominated by another, pij <= pij' on every machine, is a
+different job: giving it the times of the other would make some deadlines 'no' that are 'almost'.
+"""
+import numpy as np
+from BipartiteGraph import BipartiteGraphG
+from LinearModel import EligibilityIndex
+from RoundingTheorem import DecisionModel
+from SolverBackends import SolverBackend
+from Solution import FractionalSolution
+from Tracing import span, count
+
+# The types are used when there are at most this many per job
+AGGREGATE_RATIO = 0.5
+# Amounts this close to an integer are that integer
+TOLERANCE = 1e-7
+
+
+class JobTypes:
+    __slots__ = ("m", "n", "times", "type_of_job", "counts", "jobs", "type_ptr")
+
+    def __init__(self, P: list[list[int]]):
+        """
+        :param P: 2D array representing the processing times of jobs on machines.
+        """
+        P = np.asarray(P)
+        self.m, self.n = P.shape  # Number of machines and number of jobs
+        # The distinct columns, m x T, the type of every job and the multiplicity of every type
+        columns, type_of_job, counts = np.unique(P.T, axis=0, return_inverse=True, return_counts=True)
+        self.times = np.ascontiguousarray(columns.T)
+        self.type_of_job = type_of_job.ravel()
+        self.counts = counts
+        # The jobs of every type, type by type
+        self.jobs = np.argsort(self.type_of_job, kind="stable")
+        self.type_ptr = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.type_ptr[1:])
+
+    @property
+    def num_types(self) -> int:
+        return len(self.counts)
+
+    def worthwhile(self, ratio: float = AGGREGATE_RATIO) -> bool:
+        """
+        :return: True if there are at most ratio types per job.
+        """
+        return self.num_types <= ratio * self.n
+
+    def expand(self, solution: FractionalSolution) -> FractionalSolution:
+        """
+        :param solution: The nonzero yik of the LP of the types, its jobs are the types.
+        :return: The nonzero xij of the jobs, whole jobs first and then the fractions filled job by job.
+        """
+        amounts = snap(solution.values)
+        order = np.lexsort((solution.machines, solution.jobs))  # Type by type, in machine order
+        machines, types, amounts = solution.machines[order], solution.jobs[order], amounts[order]
+        whole = np.floor(amounts).astype(np.int64)
+        fractions = snap(amounts - whole)
+
+        # 1. Whole jobs, numbered from 0 inside every type
+        whole_machines, whole_types = np.repeat(machines, whole), np.repeat(types, whole)
+        whole_positions = np.arange(len(whole_types)) - np.searchsorted(whole_types, whole_types)
+
+        # 2. The fractions laid end to end inside every type, after the whole jobs of the type
+        fractional = fractions > 0
+        machines, types, fractions = machines[fractional], types[fractional], fractions[fractional]
+        ends = np.cumsum(fractions)
+        begins = snap(ends - fractions - (ends - fractions)[np.searchsorted(types, types)])
+        ends = snap(begins + fractions)
+        first, last = np.floor(begins).astype(np.int64), np.ceil(ends).astype(np.int64)
+        pieces = last - first  # The jobs every fraction is split into
+        piece_machines, piece_types = np.repeat(machines, pieces), np.repeat(types, pieces)
+        starts = np.repeat(np.cumsum(pieces) - pieces, pieces)
+        positions = np.repeat(first, pieces) + np.arange(len(piece_types)) - starts
+        values = np.minimum(np.repeat(ends, pieces), positions + 1) - np.maximum(np.repeat(begins, pieces), positions)
+        positions += np.bincount(whole_types, minlength=self.num_types)[piece_types]
+
+        machines = np.concatenate((whole_machines, piece_machines))
+        types = np.concatenate((whole_types, piece_types))
+        positions = np.concatenate((whole_positions, positions))
+        values = snap(np.concatenate((np.ones(len(whole_types)), values)))
+        # The tolerance may leave a last position past the jobs of the type
+        positions = np.minimum(positions, self.counts[types] - 1)
+        jobs = self.jobs[self.type_ptr[types] + positions]
+        return FractionalSolution(self.m, self.n, machines, jobs, values)
+
+
+def snap(values: np.ndarray) -> np.ndarray:
+    """
+    :return: The values with the ones within TOLERANCE of an integer set to that integer.
+    """
+    integers = np.round(values)
+    return np.where(np.abs(values - integers) < TOLERANCE, integers, values)
+
+
+class AggregatedDecisionModel:
+    """
+    A DecisionModel of the job types in place of the DecisionModel of P: solve returns the expanded solution of the
+    jobs, and the EligibilityIndex is the one of P, for the heuristics and the bounds of the search.
+    """
+    aggregated = True
+
+    def __init__(self, Pij: list[list[int]], t_max: int, warm_start: bool = True, index: EligibilityIndex = None,
+                 backend: SolverBackend = None, types: JobTypes = None):
+        """
+        Same as DecisionModel.
+        :param types: The JobTypes of Pij, if the caller already has them.
+        """
+        self.P = Pij
+        self.types = types or JobTypes(Pij)
+        self.index = index or EligibilityIndex(Pij)
+        self.m, self.n = self.index.m, self.index.n  # Number of machines and number of jobs
+        self.t_max = t_max
+        self.warm_start = warm_start
+        with span("JobTypes.build", n=self.n, types=self.types.num_types):
+            self.type_model = DecisionModel(self.types.times, t_max, warm_start, backend=backend,
+                                            counts=self.types.counts)
+        self.backend = self.type_model.backend
+        self.model = None  # The DecisionModel of Pij, built on the first expanded G that is not a pseudoforest
+        self.last_graph = None  # The BipartiteGraphG of the last expanded solution, for the rounding
+
+    def solve(self, di: list[int], t: int) -> (float, FractionalSolution):
+        """
+        Solves the LP of the types and expands its solution. Same as DecisionModel.solve.
+        The graph G built to check the expanded solution is kept in last_graph, so the rounding doesn't build it again.
+        """
+        self.last_graph = None
+        solution = self.type_model.solve(di, t)
+        if solution is None:
+            return None
+        makespan, lp_xij = solution[0], self.types.expand(solution[1])
+        graph = BipartiteGraphG(lp_xij, self.m, self.n)
+        if not graph.is_pseudoforest:
+            count("job_types.fallbacks")
+            if self.model is None:
+                self.model = DecisionModel(self.P, self.t_max, self.warm_start, self.index, self.backend)
+            return self.model.solve(di, t)
+        self.last_graph = graph
+        return makespan, lp_xij
+
+
+def aggregation(Pij: list[list[int]], aggregate: bool = None) -> bool:
+    """
+    :param aggregate: Same as decision_model.
+    :return: True if decision_model(Pij, aggregate=aggregate) solves the LP of the job types.
+    """
+    if aggregate is not None:
+        return aggregate
+    return JobTypes(Pij).worthwhile()
+
+
+def decision_model(Pij: list[list[int]], t_max: int, warm_start: bool = True, index: EligibilityIndex = None,
+                   backend: SolverBackend = None, aggregate: bool = None):
+    """
+    :param aggregate: Solve the LP of the job types. None uses them when there are at most AGGREGATE_RATIO types per
+    job.
+    :return: An AggregatedDecisionModel or a DecisionModel of Pij, with the other arguments of DecisionModel.
+    """
+    if aggregate is False:
+        return DecisionModel(Pij, t_max, warm_start, index, backend)
+    types = JobTypes(Pij)
+    if aggregate is None and not types.worthwhile():
+        return DecisionModel(Pij, t_max, warm_start, index, backend)
+    return AggregatedDecisionModel(Pij, t_max, warm_start, index, backend, types)
@@ -0,0 +1,215 @@
+"""Matrix form of LP(P, d⃗,t) and IP(P, d⃗,t).
+
+Columns: one variable xij for every eligible pair (i, j), Pij <= t, and Cmax as the last column.
+Rows:
+    n assignment rows   i ∈ Mj(t) Sum(xij) = cj             for j=1,...,n
+    m deadline rows     j ∈ Ji(t) Sum(pij*xij) <= di        for i=1,...,m
+    m makespan rows     j ∈ Ji(t) Sum(pij*xij) - Cmax <= 0  for i=1,...,m
+
+The eligible pairs come from an EligibilityIndex of P, built once per instance: every pair (i, j) sorted by Pij, so
+the pairs with Pij <= t are a prefix found with one binary search. They are stored machine by machine (CSR) and,
+through a permutation, job by job (CSC).
+The multiplicity cj of a job is 1, except in the LP of the job types, where a column of P stands for cj identical jobs
+and 0 <= xij <= cj is the number of them on machine i.
+Inside every row the terms are sorted by processing time, so the pairs of a smaller t are a prefix of each row.
+The deadline rows and the makespan rows share the same per-machine terms, so they are built once.
+"""
+import numpy as np
+from pulp import *
+from Solution import Assignment, FractionalSolution
+
+
+class EligibilityIndex:
+    """
+    Every pair (i, j) of P sorted by processing time, ties in row-major order. The rank of a pair is its position in
+    this order, so the pairs with Pij <= t are the ranks below count(t).
+    The ranks are also kept machine by machine and job by job, sorted inside every machine and every job, so Ji(t) and
+    Mj(t) are prefixes and their sizes take one binary search per row.
+    """
+
+    def __init__(self, Pij):
+        """
+        :param Pij: A 2D array representing the processing times of jobs on machines.
+        """
+        P = np.asarray(Pij)
+        self.m, self.n = P.shape  # Number of machines and number of jobs
+        ranks = stable_argsort(P.ravel())
+        self.machines, self.jobs = np.divmod(ranks, self.n)
+        self.times = P.ravel()[ranks]
+        # Ranks machine by machine and job by job, sorted by rank inside every row
+        self.machine_ranks = stable_argsort(self.machines)
+        self.job_ranks = stable_argsort(self.jobs)
+        self.machine_ptr = np.arange(self.m + 1) * self.n
+        self.job_ptr = np.arange(self.n + 1) * self.m
+        # row * m * n + rank, increasing over the whole array, for the binary search of every row
+        self.machine_keys = self.machines[self.machine_ranks] * self.times.size + self.machine_ranks
+        self.job_keys = self.jobs[self.job_ranks] * self.times.size + self.job_ranks
+        self.fastest_machines = self.machines[self.job_ranks[self.job_ptr[:-1]]]  # The first machine of every Mj
+        self.fastest_times = self.times[self.job_ranks[self.job_ptr[:-1]]]
+
+    def count(self, t) -> int:
+        """
+        :return: The number of pairs with Pij <= t.
+        """
+        return int(np.searchsorted(self.times, t, side="right"))
+
+    def pairs(self, t):
+        """
+        :return: The machines, jobs and processing times of the pairs with Pij <= t, sorted by processing time.
+        Views of the index, not copies.
+        """
+        k = self.count(t)
+        return self.machines[:k], self.jobs[:k], self.times[:k]
+
+    def covers_all_jobs(self, t) -> bool:
+        """
+        :return: True if Mj(t) is not empty for any job j.
+        """
+        return self.n == 0 or t >= self.fastest_times.max()
+
+    def machine_counts(self, t) -> np.ndarray:
+        """
+        :return: |Ji(t)| of every machine i.
+        """
+        return self.row_counts(self.machine_keys, self.machine_ptr, self.count(t))
+
+    def job_counts(self, t) -> np.ndarray:
+        """
+        :return: |Mj(t)| of every job j.
+        """
+        return self.row_counts(self.job_keys, self.job_ptr, self.count(t))
+
+    def row_counts(self, keys: np.ndarray, ptr: np.ndarray, k: int) -> np.ndarray:
+        """
+        :return: The number of ranks below k in every row, one binary search per row.
+        """
+        rows = np.arange(len(ptr) - 1)
+        return np.searchsorted(keys, rows * self.times.size + k) - ptr[:-1]
+
+
+def stable_argsort(values: np.ndarray) -> np.ndarray:
+    """
+    np.argsort(values, kind="stable"). NumPy sorts integers of 16 bits or less with a radix sort, in linear time, so
+    small non-negative integers are sorted as uint16.
+    """
+    if np.issubdtype(values.dtype, np.integer) and values.size and 0 <= values.min() and values.max() < 2 ** 16:
+        values = values.astype(np.uint16)
+    return np.argsort(values, kind="stable")
+
+
+class LinearModel:
+    def __init__(self, Pij, t: int, index: EligibilityIndex = None, counts=None):
+        """
+        :param Pij: A 2D array representing the processing times of jobs on machines.
+        :param t: The maximum time units allowed for Ji(t) and Mj(t) sets.
+        :param index: The EligibilityIndex of Pij, built here if it is not given.
+        :param counts: The multiplicity cj of every job, None for 1.
+        """
+        index = index or EligibilityIndex(Pij)
+        self.m, self.n = index.m, index.n  # Number of machines and number of jobs
+        self.t = t
+        self.index = index
+        self.counts = np.ones(self.n) if counts is None else np.asarray(counts, dtype=np.float64)
+        self.aggregated = counts is not None
+
+        k = index.count(t)
+        # Machine-major order, sorted by processing time inside each machine
+        ranks = index.machine_ranks[index.machine_ranks < k]
+        self.machines, self.jobs, self.times = index.machines[ranks], index.jobs[ranks], index.times[ranks]
+        self.machine_ptr = np.zeros(self.m + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.machines, minlength=self.m), out=self.machine_ptr[1:])
+        # Job-major permutation of the columns, sorted by processing time inside each job
+        column_of_rank = np.empty(k, dtype=np.int64)
+        column_of_rank[ranks] = np.arange(k)
+        self.job_order = column_of_rank[index.job_ranks[index.job_ranks < k]]
+        self.job_ptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.jobs, minlength=self.n), out=self.job_ptr[1:])
+
+    @property
+    def num_pairs(self) -> int:
+        return len(self.machines)
+
+    @property
+    def column_upper(self) -> np.ndarray:
+        """
+        :return: The upper bound cj of every xij column.
+        """
+        return self.counts[self.jobs]
+
+    def covers_all_jobs(self) -> bool:
+        """
+        If a job has no machine in Mj(t), the assignment row of that job can't be satisfied.
+        :return: False if the model is infeasible for this reason.
+        """
+        return self.index.covers_all_jobs(self.t)
+
+    def constraint_matrix(self, di: list[int]):
+        """
+        The constraint matrix in CSR form, with its row bounds.
+        Column k < num_pairs is x[machines[k], jobs[k]] and column num_pairs is Cmax.
+        :param di: A list of machine deadlines.
+        :return: data, indices, indptr, row_lower, row_upper
+        """
+        k, columns = self.num_pairs, np.arange(self.num_pairs)
+        # Every makespan row ends with its Cmax term
+        makespan_data = np.insert(self.times.astype(float), self.machine_ptr[1:], -1.0)
+        makespan_indices = np.insert(columns, self.machine_ptr[1:], k)
+        data = np.concatenate((np.ones(k), self.times, makespan_data))
+        indices = np.concatenate((self.job_order, columns, makespan_indices))
+        job_lengths, machine_lengths = np.diff(self.job_ptr), np.diff(self.machine_ptr)
+        lengths = np.concatenate((job_lengths, machine_lengths, machine_lengths + 1))
+        indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        row_lower = np.concatenate((self.counts, np.full(2 * self.m, -np.inf)))
+        row_upper = np.concatenate((self.counts, np.asarray(di, dtype=float), np.zeros(self.m)))
+        return data, indices, indptr, row_lower, row_upper
+
+    def to_pulp(self, name: str, di: list[int], cat: str = 'Continuous', cmax_cat: str = 'Continuous'):
+        """
+        Hands the rows to PuLP in bulk, one LpConstraint per row built from its slice of the columns.
+        :param name: Name of the LpProblem.
+        :param di: A list of machine deadlines.
+        :param cat: Category of the xij variables.
+        :param cmax_cat: Category of Cmax.
+        :return: The problem, the xij variables {(i,j): LpVariable} and Cmax.
+        """
+        prob = LpProblem(name, LpMinimize)
+        keys = list(zip(self.machines.tolist(), self.jobs.tolist()))
+        x = LpVariable.dicts("x", keys, lowBound=0, upBound=1, cat=cat)
+        if self.aggregated:
+            for key, upper in zip(keys, self.column_upper.tolist()):
+                x[key].upBound = upper
+        Cmax = LpVariable("Cmax", lowBound=0, cat=cmax_cat)
+        prob += Cmax
+
+        columns = [x[key] for key in keys]
+        times = self.times.tolist()
+        job_order, job_ptr, machine_ptr = self.job_order.tolist(), self.job_ptr.tolist(), self.machine_ptr.tolist()
+        counts = self.counts.tolist()
+        for j in range(self.n):
+            terms = [(columns[k], 1) for k in job_order[job_ptr[j]:job_ptr[j + 1]]]
+            prob += LpConstraint(terms, sense=LpConstraintEQ, rhs=counts[j])
+        for i in range(self.m):
+            terms = list(zip(columns[machine_ptr[i]:machine_ptr[i + 1]], times[machine_ptr[i]:machine_ptr[i + 1]]))
+            prob += LpConstraint(terms, sense=LpConstraintLE, rhs=di[i])
+            prob += LpConstraint(terms + [(Cmax, -1)], sense=LpConstraintLE, rhs=0)
+        return prob, x, Cmax
+
+    def fractional_solution(self, x: dict[tuple[int, int], LpVariable]) -> FractionalSolution:
+        """
+        :param x: The solved xij variables of to_pulp.
+        :return: The nonzero xij.
+        """
+        values = [x[i, j].varValue for i, j in zip(self.machines.tolist(), self.jobs.tolist())]
+        return FractionalSolution(self.m, self.n, self.machines, self.jobs, values)
+
+    def assignment(self, x: dict[tuple[int, int], LpVariable]) -> Assignment:
+        """
+        :param x: The solved binary xij variables of to_pulp.
+        :return: The machine of every job.
+        """
+        values = np.array([x[i, j].varValue for i, j in zip(self.machines.tolist(), self.jobs.tolist())])
+        machines = np.full(self.n, -1, dtype=np.int32)
+        chosen = values > 0.5
+        machines[self.jobs[chosen]] = self.machines[chosen]
+        return Assignment(machines)
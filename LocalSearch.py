@@ -0,0 +1,151 @@
+"""Local search on a schedule, after the rounding of the LP solution.
+
+The rounded schedule only has makespan at most 2*d. We improve it by moving work away from the critical machine, the
+machine whose load is the makespan:
+    move:            job j leaves the critical machine a for a machine b.
+    swap:            job j of a and job k of a machine b trade machines.
+    ejection chain:  j goes from a to b, and to make room, a job k of b goes on to a machine c.
+A change is made only if every machine it touches ends up with a load below the load the critical machine had,
+so the sorted vector of loads decreases with every change and the search can't cycle.
+
+The loads of the machines are kept in an array and updated with every change, so a candidate costs O(1): the new load
+of a machine is its load plus or minus the processing times of the jobs that come and go. The candidates of all the
+jobs of the critical machine are evaluated at once with NumPy.
+"""
+import time
+import numpy as np
+from Solution import Assignment
+from Tracing import span, count
+
+
+def local_search(P: list[list[int]], assignment: Assignment, time_limit: float = None, max_iterations: int = None,
+                 ejection_chains: bool = False, chain_width: int = 3) -> (int, Assignment):
+    """
+    Improves a complete schedule with moves and swaps, and optionally ejection chains, until no change improves it
+    or the budget runs out.
+    :param P: 2D array representing the processing times of jobs on machines.
+    :param assignment: The schedule to start from, every job must have a machine.
+    :param time_limit: Seconds the search may run. None for no limit.
+    :param max_iterations: Number of changes the search may make. None for no limit.
+    :param ejection_chains: Try ejection chains when no move or swap improves the schedule.
+    :param chain_width: Number of machines b tried for every job in an ejection chain.
+    :return: The makespan of the improved schedule and the machine of every job.
+    """
+    P = np.asarray(P)
+    machines = assignment.machines.copy()
+    loads = np.bincount(machines, weights=P[machines, np.arange(len(machines))], minlength=P.shape[0])
+    end_time = time.perf_counter() + time_limit if time_limit is not None else None
+    iterations = 0
+
+    with span("local_search", ejection_chains=ejection_chains) as search_span:
+        while max_iterations is None or iterations < max_iterations:
+            if end_time is not None and time.perf_counter() >= end_time:
+                break
+            a = int(np.argmax(loads))  # The critical machine
+            jobs = np.flatnonzero(machines == a)
+            if not (try_move(P, machines, loads, a, jobs) or try_swap(P, machines, loads, a, jobs) or
+                    (ejection_chains and try_ejection_chain(P, machines, loads, a, jobs, chain_width))):
+                break  # A local optimum
+            iterations += 1
+        search_span.set("iterations", iterations)
+
+    improved = Assignment(machines)
+    return improved.makespan(P), improved
+
+
+def try_move(P: np.ndarray, machines: np.ndarray, loads: np.ndarray, a: int, jobs: np.ndarray) -> bool:
+    """
+    Moves the job of the critical machine a that leaves the smallest maximum load among a and its new machine b.
+    :param jobs: The jobs of machine a.
+    :return: True if a job moved.
+    """
+    if len(jobs) == 0:
+        return False
+    load_b = loads[None, :] + P[:, jobs].T  # Load of machine b with job j, for every (j, b)
+    load_b[:, a] = np.inf
+    load_a = loads[a] - P[a, jobs]  # Load of machine a without job j
+    worst = np.maximum(load_b, load_a[:, None])
+    best = int(np.argmin(worst))
+    row, b = divmod(best, P.shape[0])
+    if worst[row, b] >= loads[a]:
+        return False
+    j = jobs[row]
+    machines[j] = b
+    loads[a] -= P[a, j]
+    loads[b] += P[b, j]
+    count("local_search.moves")
+    return True
+
+
+def try_swap(P: np.ndarray, machines: np.ndarray, loads: np.ndarray, a: int, jobs: np.ndarray) -> bool:
+    """
+    Swaps a job j of the critical machine a with a job k of another machine b, the pair that leaves the smallest
+    maximum load among a and b.
+    :param jobs: The jobs of machine a.
+    :return: True if two jobs were swapped.
+    """
+    others = np.flatnonzero(machines != a)
+    if len(jobs) == 0 or len(others) == 0:
+        return False
+    b = machines[others]
+    # Loads after the swap of job j (rows) with job k (columns)
+    load_a = loads[a] - P[a, jobs][:, None] + P[a, others][None, :]
+    load_b = (loads[b] - P[b, others])[None, :] + P[b[None, :], jobs[:, None]]
+    worst = np.maximum(load_a, load_b)
+    row, column = np.unravel_index(int(np.argmin(worst)), worst.shape)
+    if worst[row, column] >= loads[a]:
+        return False
+    j, k, b = jobs[row], others[column], b[column]
+    machines[j], machines[k] = b, a
+    loads[a] += P[a, k] - P[a, j]
+    loads[b] += P[b, j] - P[b, k]
+    count("local_search.swaps")
+    return True
+
+
+def try_ejection_chain(P: np.ndarray, machines: np.ndarray, loads: np.ndarray, a: int, jobs: np.ndarray,
+                       width: int = 3) -> bool:
+    """
+    Moves a job j of the critical machine a to a machine b, and a job k of b to a machine c, so that a, b and c
+    all end up below the load of a.
+    For every j only the `width` machines b with the smallest load with j are tried.
+    :param jobs: The jobs of machine a.
+    :return: True if a chain was made.
+    """
+    m, target = P.shape[0], loads[a]
+    for j in jobs[np.argsort(-P[a, jobs])]:  # Long jobs first, they free the most
+        load_a = loads[a] - P[a, j]
+        load_b = loads + P[:, j]
+        load_b[a] = np.inf
+        for b in np.argsort(load_b)[:width]:
+            kept = np.flatnonzero(machines == b)
+            if len(kept) == 0 or not np.isfinite(load_b[b]):
+                continue
+            load_b_without = load_b[b] - P[b, kept]  # Load of b with j and without k, for every k
+            load_c = loads[None, :] + P[:, kept].T  # Load of c with k, for every (k, c)
+            load_c[:, a] += load_a - loads[a]  # Machine a has already lost j
+            load_c[:, b] = np.inf
+            worst = np.maximum(load_c, np.maximum(load_b_without, load_a)[:, None])
+            row, c = divmod(int(np.argmin(worst)), m)
+            if worst[row, c] < target:
+                k = kept[row]
+                machines[j], machines[k] = b, c
+                loads[a] -= P[a, j]
+                loads[b] += P[b, j] - P[b, k]
+                loads[c] += P[c, k]
+                count("local_search.chains")
+                return True
+    return False
+
+
+def improve_solution(sch_problem, time_limit: float = None, max_iterations: int = None,
+                     ejection_chains: bool = False):
+    """
+    Runs the local search on the schedule of a SchedulingProblem and keeps the result if it is better.
+    :param sch_problem: The SchedulingProblem of the Binary Search Procedure.
+    :return: The SchedulingProblem.
+    """
+    makespan, xij = local_search(sch_problem.P, sch_problem.xij, time_limit, max_iterations, ejection_chains)
+    if makespan < sch_problem.makespan:
+        sch_problem.makespan, sch_problem.xij, sch_problem.stage = makespan, xij, "local_search"
+    return sch_problem
@@ -0,0 +1,139 @@
+"""Online scheduling of jobs that arrive in batches.
+
+The jobs are new columns of P. Every job of a batch is placed at once on the machine where it finishes first, in
+decreasing order of its fastest processing time, so a batch of b jobs costs O(b*m) whatever the number of jobs so far.
+
+The schedule is re-optimized with the Binary Search Procedure only when it has drifted: when the ratio of the makespan
+to the lower bound of the optimal makespan grew by more than `drift` since the last re-optimization. The lower bound is
+max_j min_i pij, ⌈sum_j min_i pij / m⌉ and the lower limit of the last search, kept up to date with every batch.
+A re-optimization starts from what the last one found:
+    More jobs only make LP(P, d) harder, so the lower limit of the last search stays a lower limit.
+    The current schedule is a solution, so its makespan is the upper limit.
+The LP itself is built again for every re-optimization, since the new jobs add rows and columns to it, so no solver
+starts from the basis of the last re-optimization, whatever the backend.
+
+Usage:
+    scheduler = OnlineScheduler(m)
+    for batch in batches:                   # m x b processing times of b new jobs
+        machines = scheduler.add_jobs(batch)
+    scheduler.makespan, scheduler.assignment
+"""
+import numpy as np
+from SearchProcedure import binary_search_procedure
+from Solution import Assignment
+from Tracing import span, count
+
+
+class OnlineScheduler:
+    def __init__(self, m: int, drift: float = 0.2, gap: float = 0.0, capacity: int = 1024, backend=None):
+        """
+        :param m: Number of machines.
+        :param drift: Re-optimize when makespan / lower bound grew by more than this fraction since the last time.
+        None never re-optimizes.
+        :param gap: The gap of the Binary Search Procedure of every re-optimization.
+        :param capacity: Number of jobs the processing times are allocated for at first. It doubles when it runs out.
+        :param backend: The SolverBackend or backend name of the re-optimizations, None to pick one by the size of the
+        model. Every re-optimization builds its own model, so no basis is kept from one to the next.
+        """
+        self.m = m
+        self.drift = drift
+        self.gap = gap
+        self.backend = backend
+        self.n = 0  # Number of jobs so far
+        self._P = np.zeros((m, capacity), dtype=np.int64)
+        self._machines = np.zeros(capacity, dtype=np.int32)
+        self.loads = np.zeros(m, dtype=np.int64)
+        self.fastest_max = 0  # max_j min_i pij
+        self.fastest_sum = 0  # sum_j min_i pij
+        self.search_limit = 0  # Lower limit of d from the last search
+        self.reference_ratio = None  # makespan / lower bound after the last re-optimization
+        self.reoptimizations = 0
+
+    @property
+    def P(self) -> np.ndarray:
+        """
+        The processing times of the jobs so far, a view of the buffer.
+        """
+        return self._P[:, :self.n]
+
+    @property
+    def assignment(self) -> Assignment:
+        return Assignment(self._machines[:self.n].copy())
+
+    @property
+    def makespan(self) -> int:
+        return int(self.loads.max()) if self.n else 0
+
+    @property
+    def lower_bound(self) -> int:
+        """
+        A lower bound of the optimal makespan of the jobs so far.
+        """
+        return max(self.fastest_max, -(-self.fastest_sum // self.m), self.search_limit)
+
+    def add_jobs(self, batch) -> np.ndarray:
+        """
+        Schedules a batch of new jobs and re-optimizes the whole schedule if it has drifted.
+        :param batch: m x b processing times of the new jobs.
+        :return: The machines of the new jobs. A re-optimization may move them, and the earlier jobs, later on.
+        """
+        batch = np.asarray(batch, dtype=np.int64).reshape(self.m, -1)
+        first, b = self.n, batch.shape[1]
+        with span("online.add_jobs", jobs=b, n=first + b):
+            self.reserve(first + b)
+            self._P[:, first:first + b] = batch
+            fastest = batch.min(axis=0)
+            self.fastest_max = max(self.fastest_max, int(fastest.max(initial=0)))
+            self.fastest_sum += int(fastest.sum())
+            for k in np.argsort(-fastest, kind="stable").tolist():
+                i = int(np.argmin(self.loads + batch[:, k]))
+                self._machines[first + k] = i
+                self.loads[i] += batch[i, k]
+            self.n += b
+        if b and self.drifted():
+            self.reoptimize()
+        return self._machines[first:first + b].copy()
+
+    def reserve(self, n: int):
+        """
+        Grows the buffers to hold at least n jobs, doubling their capacity.
+        """
+        capacity = self._P.shape[1]
+        if n <= capacity:
+            return
+        while capacity < n:
+            capacity *= 2
+        P = np.zeros((self.m, capacity), dtype=np.int64)
+        P[:, :self.n] = self.P
+        machines = np.zeros(capacity, dtype=np.int32)
+        machines[:self.n] = self._machines[:self.n]
+        self._P, self._machines = P, machines
+
+    def drifted(self) -> bool:
+        """
+        :return: True if makespan / lower bound grew by more than `drift` since the last re-optimization.
+        """
+        if self.drift is None:
+            return False
+        ratio = self.makespan / max(self.lower_bound, 1)
+        return self.reference_ratio is None or ratio > (1 + self.drift) * self.reference_ratio
+
+    def reoptimize(self):
+        """
+        Runs the Binary Search Procedure on all the jobs so far, between the lower limit of the last search and the
+        current makespan. Keeps its schedule if it is better.
+        """
+        P, makespan = self.P, self.makespan
+        with span("online.reoptimize", n=self.n, makespan=makespan) as reoptimize_span:
+            sch_problem = binary_search_procedure(P, gap=self.gap, lower_limit=self.search_limit,
+                                                  upper_limit=makespan, backend=self.backend, graphs="none")
+            if sch_problem is not None:
+                self.search_limit = max(self.search_limit, sch_problem.lower_bound)
+                if sch_problem.makespan < makespan:
+                    self._machines[:self.n] = sch_problem.xij.machines
+                    self.loads = np.bincount(sch_problem.xij.machines, weights=P[sch_problem.xij.machines,
+                                             np.arange(self.n)], minlength=self.m).astype(np.int64)
+            reoptimize_span.set("makespan", self.makespan)
+        self.reference_ratio = self.makespan / max(self.lower_bound, 1)
+        self.reoptimizations += 1
+        count("online.reoptimizations")
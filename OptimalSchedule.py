@@ -1,30 +1,150 @@
+import math
+import os
+import re
+import tempfile
+import numpy as np
 from pulp import *
+from Solution import Assignment
 
 
-def optimal_schedule(Pij: []):
+def optimal_schedule(Pij: [], time_limit: float = None, threads: int = None, incumbent: Assignment = None,
+                     lower_bound: float = 0, symmetry_breaking: bool = True):
     """
     Solves the minimum makespan scheduling problem using Integer Programming (IP).
     It finds the optimal solution by searching the entire solution space.
-    It will require a lot of computational time for large-scale problems.
+    It will require a lot of computational time for large-scale problems, so the search can be limited in time and
+    started from a known schedule, like the approximate schedule of the Binary Search Procedure:
+        The makespan of the incumbent is an upper bound, so pairs with Pij above it never get a variable, and CBC
+        starts from the incumbent.
+        max_j min_i Pij, sum_j min_i Pij / m and the given lower_bound bound the makespan from below.
+        Machines with identical processing times are interchangeable, so their loads are kept in decreasing order.
+    :param Pij: 2D array representing the processing times of jobs on machines.
+    :param time_limit: Seconds CBC may search. None for no limit.
+    :param threads: Number of threads of CBC. None for CBC's default.
+    :param incumbent: A complete schedule to start from, or None.
+    :param lower_bound: A known lower bound of the optimal makespan.
+    :param symmetry_breaking: Order the loads of identical machines.
+    :return: The best makespan found, the machine of every job and the proven optimality gap,
+    (makespan - lower bound) / makespan, which is 0 when the schedule is optimal.
+    None if no schedule was found in time.
     """
-    m, n = len(Pij), len(Pij[0])  # Number of machines and jobs
+    P = np.asarray(Pij)
+    m, n = P.shape  # Number of machines and jobs
+    integral = np.issubdtype(P.dtype, np.integer)
+    fastest = P.min(axis=0)
+    lower_bound = max(lower_bound, fastest.max().item(), fastest.sum().item() / m)
+    upper_bound = None
+    if incumbent is not None:
+        incumbent = order_identical_machines(P, incumbent) if symmetry_breaking else incumbent
+        upper_bound = incumbent.makespan(P)
+    if integral:
+        lower_bound = math.ceil(lower_bound - 1e-6)
+
     # Initialize the integer programming problem (objective is to minimize this)
     prob = LpProblem("Minimum_Makespan_Scheduling", LpMinimize)
-    # Create a variable for the makespan
-    makespan = LpVariable("makespan", 0, cat="Integer")
+    # Create a variable for the makespan, between the bounds
+    makespan = LpVariable("makespan", lower_bound, upper_bound, cat="Integer" if integral else "Continuous")
     # Objective Function: Minimize makespan
     prob += makespan, "Objective"
-    # Create binary decision variables for the xij matrix
-    x = LpVariable.dicts("x", [(i, j) for i in range(m) for j in range(n)], lowBound=0, upBound=1, cat='Binary')
+    # Create binary decision variables for the xij matrix, a job never goes to a machine slower than the incumbent
+    eligible = P <= upper_bound if upper_bound is not None else np.ones(P.shape, dtype=bool)
+    pairs = list(zip(*(indices.tolist() for indices in np.nonzero(eligible))))
+    x = LpVariable.dicts("x", pairs, lowBound=0, upBound=1, cat='Binary')
+    machine_pairs, job_pairs = [[] for _ in range(m)], [[] for _ in range(n)]
+    for i, j in pairs:
+        machine_pairs[i].append(j)
+        job_pairs[j].append(i)
     # Constraints to calculate the makespan
+    completion_times = [lpSum(P[i, j].item() * x[i, j] for j in machine_pairs[i]) for i in range(m)]
     for i in range(m):
-        completion_time = 0
-        for j in range(n):
-            completion_time += Pij[i][j] * x[i, j]
-        prob += completion_time <= makespan  # Constraint: makespan is the maximum completion time
+        prob += completion_times[i] <= makespan  # Constraint: makespan is the maximum completion time
     # Constraints: Each job must be processed by one and only one machine
     for j in range(n):
-        prob += lpSum(x[i, j] for i in range(m)) == 1
-    # Solve the integer programming problem
-    prob.solve(PULP_CBC_CMD(msg=False))
-    return value(makespan), x
+        prob += lpSum(x[i, j] for i in job_pairs[j]) == 1
+    # Constraints: identical machines in decreasing order of load
+    if symmetry_breaking:
+        for group in identical_machines(P):
+            for i, k in zip(group, group[1:]):
+                prob += completion_times[i] >= completion_times[k]
+
+    # Start from the incumbent
+    if incumbent is not None:
+        for (i, j), variable in x.items():
+            variable.setInitialValue(1 if incumbent.machines[j] == i else 0)
+        makespan.setInitialValue(upper_bound)
+
+    # Solve the integer programming problem, CBC reports its lower bound in the log
+    handle, log_file = tempfile.mkstemp(suffix=".log")
+    os.close(handle)
+    try:
+        prob.solve(PULP_CBC_CMD(msg=False, timeLimit=time_limit, threads=threads, warmStart=incumbent is not None,
+                                logPath=log_file))
+        lower_bound = max(lower_bound, read_lower_bound(log_file, integral))
+    finally:
+        os.remove(log_file)
+
+    if prob.sol_status in (LpSolutionOptimal, LpSolutionIntegerFeasible):
+        machines = [next((i for i in job_pairs[j] if x[i, j].varValue > 0.5), -1) for j in range(n)]
+        solution = Assignment(machines)
+        best_makespan = solution.makespan(P)
+        if prob.sol_status == LpSolutionOptimal:
+            lower_bound = best_makespan
+    elif incumbent is not None:  # CBC found nothing better in time
+        solution, best_makespan = incumbent, upper_bound
+    else:
+        return None
+    gap = (best_makespan - min(lower_bound, best_makespan)) / best_makespan if best_makespan else 0.0
+    return best_makespan, solution, gap
+
+
+def read_lower_bound(log_file: str, integral: bool = True) -> float:
+    """
+    :param log_file: The log of CBC.
+    :param integral: The makespan is an integer, so a fractional bound rounds up.
+    :return: The lower bound CBC proved when it stopped on the limit, 0 if there is none.
+    """
+    with open(log_file) as file:
+        found = re.search(r"^Lower bound:\s*(\S+)", file.read(), re.MULTILINE)
+    if not found:
+        return 0
+    bound = float(found.group(1))
+    return math.ceil(bound - 1e-6) if integral else bound
+
+
+def identical_machines(P) -> list[list[int]]:
+    """
+    :param P: 2D array representing the processing times of jobs on machines.
+    :return: The groups of at least two machines with identical rows of processing times.
+    """
+    _, inverse, counts = np.unique(np.asarray(P), axis=0, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    return [np.flatnonzero(inverse == group).tolist() for group in np.flatnonzero(counts > 1)]
+
+
+def order_identical_machines(P, assignment: Assignment) -> Assignment:
+    """
+    Renames identical machines so that their loads are in decreasing order, as the symmetry breaking constraints ask.
+    :return: The same schedule with the machines renamed.
+    """
+    loads = assignment.loads(P)
+    renamed = np.arange(len(loads))
+    for group in identical_machines(P):
+        renamed[np.array(group)[np.argsort(-loads[group], kind="stable")]] = group
+    return Assignment(renamed[assignment.machines])
+
+
+def improve_to_optimal(sch_problem, time_limit: float = None, threads: int = None):
+    """
+    Runs optimal_schedule from the approximate schedule and the lower limit of a SchedulingProblem.
+    With at most DP_MACHINES machines, the dynamic programming of BranchAndBound.py finds the optimal schedule much
+    faster than CBC, so it runs instead.
+    :param sch_problem: The SchedulingProblem of the Binary Search Procedure.
+    :return: The best makespan, the machine of every job and the proven optimality gap.
+    """
+    from BranchAndBound import DP_MACHINES, exact_schedule  # BranchAndBound uses this module
+
+    # Every d below the lower limit of the search was 'no', so it bounds the optimal makespan from below
+    lower_bound = sch_problem.lower_bound
+    if sch_problem.m <= DP_MACHINES:
+        return exact_schedule(sch_problem.P, time_limit, incumbent=sch_problem.xij, lower_bound=lower_bound)
+    return optimal_schedule(sch_problem.P, time_limit, threads, incumbent=sch_problem.xij, lower_bound=lower_bound)
@@ -1,7 +1,16 @@
+import os
+import tempfile
+from itertools import compress
+import numpy as np
 from pulp import *
+from LinearModel import LinearModel, EligibilityIndex
+from SolverBackends import SolverBackend, get_backend
+from Solution import Assignment, FractionalSolution
+from Tracing import span, count
 
 
-def LP(Pij: list[list[int]], di: list[int], t: int) -> (int, dict[tuple[int, int]]):
+def LP(Pij: list[list[int]], di: list[int], t: int, index: EligibilityIndex = None,
+       backend: SolverBackend = None) -> (float, FractionalSolution):
     """
     LP(Pij, d⃗,t)
     Solves the scheduling problem using linear programming.
@@ -9,59 +18,26 @@ def LP(Pij: list[list[int]], di: list[int], t: int) -> (int, dict[tuple[int, int
     :param Pij: A 2D array representing the processing times of jobs on machines.
     :param di: A list of machine deadlines.
     :param t: The maximum time units allowed for Ji(t) and Mj(t) sets.
-    :return: The minimum makespan achieved, dictionary of the decision variables representing the job assignments
-             to machines (i,j): LpVariable
+    :param index: The EligibilityIndex of Pij, if the caller already has it.
+    :param backend: A SolverBackend, a backend name or None to pick one by the size of the model.
+    :return: The minimum makespan achieved, the nonzero decision variables xij
     """
-    m, n = len(Pij), len(Pij[0])  # Number of machines and number of jobs
-
-    # Define the variables, objective function, and problem
-    lp_prob = LpProblem("LP", LpMinimize)
-
-    # Create xij decision variables
-    # xij>=0  for j ∈ Ji(t),  i=1,...,m
-    x = LpVariable.dicts("x", [(i, j) for i in range(m) for j in range(n) if Pij[i][j] <= t], lowBound=0, upBound=1,
-                         cat='Continuous')
-
-    # The objective function is to minimize the makespan, which is the maximum completion time among
-    # all the jobs on the machines.
-    Cmax = LpVariable("Cmax", lowBound=0, cat="Continuous")
-    lp_prob += Cmax
-
-    # Constraints-------------------------------------------------
-
-    # i ∈ Mj(t) Sum(xij) = 1    for j=1,...,n
-    # Mj(t) is the set of machines that can process job j in no more than t time units.
-    for j in range(n):
-        lp_prob += lpSum(x[i, j] for i in range(m) if Pij[i][j] <= t) == 1  # Constraint: Each job must be processed
-        # exactly once
-
-    # j ∈ Ji(t) Sum(pij*xij) <= di  for i=1,...,n
-    # Ji(t) is the set of jobs that require no more than t time units on machine i.
-    # Meet the deadline
-    for i in range(m):
-        lp_prob += lpSum(Pij[i][j] * x[i, j] for j in range(n) if Pij[i][j] <= t) <= di[i]  # Constraint: Meet the
-        # machine deadline
-
-    # Calculate the makespan
-    for i in range(m):
-        completion_time = 0
-        for j in range(n):
-            if Pij[i][j] <= t:
-                completion_time += Pij[i][j] * x[i, j]
-        lp_prob += completion_time <= Cmax  # Constraint: Cmax is the maximum completion time among all the jobs
-
-    # Solve the problem
-    lp_prob.solve(PULP_CBC_CMD(msg=False))
-
-    # If the problem is not feasible, return None
-    if lp_prob.status != 1:
-        return None
-
-    makespan = value(Cmax)
-    return makespan, x
-
-
-def IP(Pij: list[list[int]], di: list[int], t: int) -> (int, dict[tuple[int, int]]):
+    # Build the rows of LP(Pij, d⃗,t) from the matrix form
+    with span("LP.build", t=t):
+        model = LinearModel(Pij, t, index)
+        if not model.covers_all_jobs():  # A job with empty Mj(t) can't be processed
+            return None
+    backend = get_backend(backend, model.num_pairs)
+
+    # Solve the problem, None if it is not feasible
+    with span("LP.solve", pairs=model.num_pairs, backend=backend.name):
+        solution = backend.solve_lp(model, di)
+    count("lp_solves")
+    return solution
+
+
+def IP(Pij: list[list[int]], di: list[int], t: int, index: EligibilityIndex = None,
+       backend: SolverBackend = None) -> (int, Assignment):
     """
     IP(Pij, d⃗,t)
     Solves the scheduling problem using integer programming.
@@ -69,98 +45,211 @@ def IP(Pij: list[list[int]], di: list[int], t: int) -> (int, dict[tuple[int, int
     :param Pij: A 2D array representing the processing times of jobs on machines.
     :param di: A list of machine deadlines.
     :param t: The maximum time units allowed for Ji(t) and Mj(t) sets.
-    :return: The minimum makespan achieved, dictionary of the decision variables representing the job assignments
-             to machines (i,j): LpVariable
+    :param index: The EligibilityIndex of Pij, if the caller already has it.
+    :param backend: A SolverBackend, a backend name or None to pick one by the size of the model.
+    :return: The minimum makespan achieved, the machine of every job
     """
-    m, n = len(Pij), len(Pij[0])  # Number of machines and number of jobs
-
-    # Define the variables, objective function, and problem
-    ip_prob = LpProblem("IP", LpMinimize)
-
-    #   Create xij decision variables
+    # Build the rows of IP(Pij, d⃗,t) from the matrix form
     #   xij ∈ {0,1}  for j ∈ Ji(t),  i=1,...,m
     #   With xij ∈ {0,1} that means that each job can be executed in only one machine
-    x = LpVariable.dicts("x", [(i, j) for i in range(m) for j in range(n) if Pij[i][j] <= t], lowBound=0, upBound=1,
-                         cat='Binary')
-
-    # The objective function is to minimize the makespan, which is the maximum completion time among
-    # all the jobs on the machines.
-    Cmax = LpVariable("Cmax", lowBound=0, cat="Integer")
-    ip_prob += Cmax
+    #   The deadline rows are relaxed to di + t
+    with span("IP.build", t=t):
+        model = LinearModel(Pij, t, index)
+        if not model.covers_all_jobs():  # A job with empty Mj(t) can't be processed
+            return None
+    backend = get_backend(backend, model.num_pairs, integer=True)
 
-    # Constraints-------------------------------------------------
+    # Solve the problem, None if it is not feasible
+    with span("IP.solve", pairs=model.num_pairs, backend=backend.name):
+        solution = backend.solve_ip(model, [d + t for d in di])
+    count("ip_solves")
+    return solution
 
-    # i ∈ Mj(t) Sum(xij) = 1 for j=1,...,n
-    # Mj(t) is the set of machines that can process job j in no more than t time units.
-    for j in range(n):
-        ip_prob += lpSum(x[i, j] for i in range(m) if Pij[i][j] <= t) == 1  # Constraint: Each job must be processed
-        # exactly once
-
-    # j ∈ Ji(t) Sum(pij*xij) <= di + t for i=1,...,n
-    # Ji(t) is the set of jobs that require no more than t time units on machine i.
-    # Meet the deadline
-    for i in range(m):
-        ip_prob += lpSum(Pij[i][j] * x[i, j] for j in range(n) if Pij[i][j] <= t) <= di[i] + t  # Constraint: Meet the
-        # machine deadline
-
-    # Calculate the makespan
-    for i in range(m):
-        completion_time = 0
-        for j in range(n):
-            if Pij[i][j] <= t:
-                completion_time += Pij[i][j] * x[i, j]
-        ip_prob += completion_time <= Cmax  # Constraint: Cmax is the maximum completion time among all the jobs
 
-    # Solve the problem
-    ip_prob.solve(PULP_CBC_CMD(msg=False))
-
-    # If the problem is not feasible, return None
-    if ip_prob.status != 1:
-        return None
-
-    makespan = value(Cmax)
-    return makespan, x
+class DecisionModel:
+    """
+    LP(Pij, d⃗,t) built once per instance and re-solved for every deadline d the Binary Search Procedure tries.
+    The variables xij and the constraints are created once, for every pair with Pij <= t_max.
+    Each row keeps its terms sorted by Pij, so for a new t the sets Ji(t) and Mj(t) are prefixes of these rows
+    and only the right-hand sides di change.
+    CBC starts every solve from the basis of the previous one. The basis is saved with the names of the variables,
+    because CBC renames them by position and the positions change with t.
+    An in-process backend keeps the model in a session of its own, and the solver keeps the basis between solves
+    unless warm_start is off.
+    """
+    aggregated = False  # Solves the LP of the job types, see JobTypes.py
+
+    def __init__(self, Pij: list[list[int]], t_max: int, warm_start: bool = True, index: EligibilityIndex = None,
+                 backend: SolverBackend = None, counts=None):
+        """
+        :param Pij: A 2D array representing the processing times of jobs on machines.
+        :param t_max: The largest t we are going to solve for. Pairs with Pij > t_max never get a variable.
+        :param warm_start: Start each solve from the basis of the previous solve.
+        :param index: The EligibilityIndex of Pij, if the caller already has it.
+        :param backend: A SolverBackend, a backend name or None to pick one by the size of the model.
+        :param counts: The multiplicity of every job, None for 1. See LinearModel.
+        """
+        self.model = LinearModel(Pij, t_max, index, counts)
+        self.index = self.model.index
+        self.m, self.n = self.model.m, self.model.n  # Number of machines and number of jobs
+        self.t_max = t_max
+        self.warm_start = warm_start
+        self.basis = None  # Basis of the last CBC solve, {name: (status, value)}
+        self.last_graph = None  # The BipartiteGraphG of the last solution, if solve built it, see JobTypes.py
+        self.backend = get_backend(backend, self.model.num_pairs)
+        self.session = self.backend.session(self.model, warm_start) if self.backend.persistent else None
+        if self.session:
+            return
+
+        # xij>=0  for j ∈ Ji(t_max),  i=1,...,m
+        self.keys = list(zip(self.model.machines.tolist(), self.model.jobs.tolist()))
+        self.x = LpVariable.dicts("x", self.keys, lowBound=0, upBound=1, cat='Continuous')
+        if self.model.aggregated:
+            for key, upper in zip(self.keys, self.model.column_upper.tolist()):
+                self.x[key].upBound = upper
+        self.Cmax = LpVariable("Cmax", lowBound=0, cat="Continuous")
+
+        # Terms of every row, sorted by processing time
+        self.columns = [self.x[key] for key in self.keys]
+        columns, times = self.columns, self.model.times.tolist()
+        job_order, job_ptr = self.model.job_order.tolist(), self.model.job_ptr.tolist()
+        machine_ptr = self.model.machine_ptr.tolist()
+        self.job_terms = [[(columns[k], 1) for k in job_order[job_ptr[j]:job_ptr[j + 1]]] for j in range(self.n)]
+        self.machine_terms = [list(zip(columns[machine_ptr[i]:machine_ptr[i + 1]],
+                                       times[machine_ptr[i]:machine_ptr[i + 1]])) for i in range(self.m)]
+
+        # i ∈ Mj(t) Sum(xij) = cj   for j=1,...,n, cj = 1 unless the jobs are job types
+        self.assignment_constraints = [LpConstraint(sense=LpConstraintEQ, rhs=c) for c in self.model.counts.tolist()]
+        # j ∈ Ji(t) Sum(pij*xij) <= di  for i=1,...,n
+        self.deadline_constraints = [LpConstraint(sense=LpConstraintLE) for _ in range(self.m)]
+        # j ∈ Ji(t) Sum(pij*xij) - Cmax <= 0  for i=1,...,n
+        self.makespan_constraints = [LpConstraint(sense=LpConstraintLE) for _ in range(self.m)]
+
+    def solve(self, di: list[int], t: int) -> (float, FractionalSolution):
+        """
+        Solves LP(Pij, d⃗,t) on the existing model.
+        :param di: A list of machine deadlines.
+        :param t: The maximum time units allowed for Ji(t) and Mj(t) sets. Must not exceed t_max.
+        :return: Same as LP.
+        """
+        if t > self.t_max:
+            raise ValueError(f"t = {t} exceeds the t_max = {self.t_max} the model was built for")
+
+        if not self.index.covers_all_jobs(t):  # A job with empty Mj(t) can't be processed
+            self.backend.stopped = False
+            return None
+        # Rows are sorted by processing time, so Ji(t) and Mj(t) are the first |Ji(t)| and |Mj(t)| terms of each row
+        if self.session:
+            with span("LP.solve", t=t, backend=self.backend.name):
+                return self.session.solve(di, t)
+        job_counts = self.index.job_counts(t).tolist()
+        machine_counts = self.index.machine_counts(t).tolist()
+        with span("LP.update", t=t):
+            for j, constraint in enumerate(self.assignment_constraints):
+                constraint.clear()
+                constraint.update(self.job_terms[j][:job_counts[j]])
+            for i in range(self.m):
+                terms = self.machine_terms[i][:machine_counts[i]]
+                self.deadline_constraints[i].clear()
+                self.deadline_constraints[i].update(terms)
+                self.deadline_constraints[i].constant = -di[i]
+                self.makespan_constraints[i].clear()
+                self.makespan_constraints[i].update(terms)
+                self.makespan_constraints[i][self.Cmax] = -1
+
+            # The problem is only a container for this solve, so it only sees the variables of Ji(t)
+            lp_prob = LpProblem("LP", LpMinimize)
+            lp_prob += self.Cmax
+            for constraint in self.assignment_constraints + self.deadline_constraints + self.makespan_constraints:
+                lp_prob += constraint
+
+        options = []
+        if self.warm_start:
+            handle, basis_file = tempfile.mkstemp(suffix=".bas")
+            os.close(handle)
+            _, variable_names, _ = lp_prob.normalisedNames()  # The names CBC is going to see
+            if self.basis:
+                self.write_basis(basis_file, variable_names)
+                options += ["basisIn", basis_file]
+            # CBC runs the options before its own initialSolve, so we solve here and save the basis.
+            # The second initialSolve starts from the optimal basis and returns immediately.
+            options += ["initialSolve", "basisOut", basis_file]
+        with span("LP.solve", t=t, backend=self.backend.name, warm=bool(self.basis)):
+            lp_prob.solve(self.backend.command(options=options))
+        count("lp_solves")
+        if self.warm_start:
+            self.read_basis(basis_file, variable_names)
+            os.remove(basis_file)
+
+        self.backend.stopped = lp_prob.status == LpStatusNotSolved  # CBC stopped at its time limit
+        # If the problem is not feasible, return None
+        if lp_prob.status != 1:
+            return None
+
+        eligible = self.model.times <= t
+        values = [variable.varValue for variable in compress(self.columns, eligible.tolist())]
+        return value(self.Cmax), FractionalSolution(self.m, self.n, self.model.machines[eligible],
+                                                    self.model.jobs[eligible], values)
+
+    def read_basis(self, basis_file: str, variable_names: dict[str, str]):
+        """
+        Reads the basis CBC saved and keeps it with the names of our variables.
+        :param basis_file: The basis file in MPS format.
+        :param variable_names: Our variable names to the names CBC used.
+        """
+        self.basis = None
+        if not os.path.isfile(basis_file) or os.path.getsize(basis_file) == 0:
+            return
+        names = {cbc_name: name for name, cbc_name in variable_names.items()}
+        self.basis = {}
+        with open(basis_file) as file:
+            for line in file:
+                fields = line.split()
+                # Lines are " XU/XL column row" or " UL/LL column"
+                if len(fields) < 2 or fields[0] not in ("XU", "XL", "UL", "LL") or fields[1] not in names:
+                    continue
+                self.basis[names[fields[1]]] = (fields[0], fields[2:])
+
+    def write_basis(self, basis_file: str, variable_names: dict[str, str]):
+        """
+        Writes the basis of the previous solve with the names CBC is going to use now.
+        Variables that left Ji(t) are dropped. Their row goes back to basic, so the basis keeps its size.
+        :param basis_file: The basis file in MPS format.
+        :param variable_names: Our variable names to the names CBC is going to use.
+        """
+        with open(basis_file, "w") as file:
+            file.write("NAME          MODEL\n")
+            for name, (status, fields) in self.basis.items():
+                if name in variable_names:
+                    file.write(" ".join([f" {status}", variable_names[name]] + fields) + "\n")
+            file.write("ENDATA\n")
 
 
 # Helpful functions for converting data types of the solutions and printing methods------------------------------------
-def calculate_makespan(P, xij: dict[tuple[int, int], LpVariable]):
+def calculate_makespan(P, xij: Assignment):
     """
     :param P: a 2D array representing the processing times of jobs on machines.
-    :param xij: dictionary of the decision variables representing the job assignments to machines.
+    :param xij: the machine of every job.
     :return: makespan
     """
-    m, n = len(P), len(P[0])  # Number of machines and number of jobs
-    completion_times = [0] * m  # Initialize completion times for each machine
-    # Calculate completion times for each machine
-    for i in range(m):
-        for j in range(n):
-            if (i, j) in xij and xij[(i, j)].varValue == 1:  # Check if the job is assigned to the machine
-                completion_times[i] += P[i][j]  # Add the processing time of the job
-
-    # Find the maximum completion time as the makespan
-    makespan = max(completion_times)
-    return makespan
+    return xij.makespan(P)
 
 
-def convert_decision_to_array(xij: dict[tuple[int, int], LpVariable], m, n):
+def convert_decision_to_array(xij, m, n):
     """
     Convert xij to an array.
-    :param xij: Dictionary of the decision variables representing the job assignments to machines.
+    :param xij: An Assignment or a FractionalSolution.
     :param m: The number of machines.
     :param n: The number of jobs.
     :return: A 2D array with values indicating the job assignments to machines.
     """
-    assignment_array = [[0] * n for _ in range(m)]
-    for i in range(m):
-        for j in range(n):
-            if (i, j) in xij:
-                assignment_array[i][j] = xij[(i, j)].varValue
-    return assignment_array
+    x_array = xij.to_dense(m) if isinstance(xij, Assignment) else xij.to_dense()
+    return x_array.tolist()
 
 
-def print_decision_array(xij: dict[tuple[int, int], LpVariable], m, n):
+def print_decision_array(xij, m, n):
     """
-    :param xij: dictionary of the decision variables representing the job assignments to machines.
+    :param xij: An Assignment or a FractionalSolution.
     :param m: the number of machines.
     :param n: the number of jobs.
     :return:
@@ -170,11 +259,11 @@ def print_decision_array(xij: dict[tuple[int, int], LpVariable], m, n):
         print(row)
 
 
-def print_schedule(Pij, solution: (int, dict[tuple[int, int]])) -> None:
+def print_schedule(Pij, solution: (int, Assignment)) -> None:
     m, n = len(Pij), len(Pij[0])  # Number of machines and number of jobs
     xij = solution[1]
     max_job_width = len(f"Job{n - 1}")  # Determine max width for job names
     for i in range(m):
         # List jobs assigned to each machine
-        assigned_jobs = [f"Job{j}".ljust(max_job_width) for j in range(n) if (i, j) in xij if xij[(i, j)].varValue == 1]
+        assigned_jobs = [f"Job{j}".ljust(max_job_width) for j in xij.jobs_of(i).tolist()]
         print(f"Machine {i}: [ {', '.join(assigned_jobs)} ]")
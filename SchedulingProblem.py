@@ -1,35 +1,89 @@
-from BipartiteGraph import visualize_graph
+from BipartiteGraph import visualize_graph, BipartiteGraphG, BipartiteGraphG2
 from RoundingTheorem import print_schedule, LP
+from Solution import Assignment, FractionalSolution
+
+# The stage that produced the schedule xij of a result. d, lp_makespan and lp_xij are always those of the search, so
+# they only describe xij when it is "rounding".
+STAGES = ("rounding", "heuristic", "local_search", "ip", "exact")
+
+# Which results of the Binary Search Procedure keep their graphs G and G':
+#   none:   no result, the graphs are rebuilt from lp_xij every time they are asked for.
+#   final:  only the result the search returns.
+#   all:    every 'almost' result of every probe.
+GRAPH_RETENTION = ("none", "final", "all")
 
 
 class SchedulingProblem:
     """
     A simple class for organizing our data, for printing and visualization
+    P is the instance of the caller, not a copy. The graphs G and G' are kept only when they are retained, otherwise
+    they are rebuilt from the LP solution on demand.
     """
-    def __init__(self, P: list[list[int]], lp_solution: (float, dict[tuple[int, int]]), deadline,
-                 rounded_solution: (int, dict[tuple[int, int]]),
-                 graphG, graphG2):
-        self.P = P.copy()  # 2D array representing processing time.
+    __slots__ = ("P", "m", "n", "t", "lower_bound", "lp_makespan", "lp_xij", "d", "makespan", "xij", "stage",
+                 "_graphG", "_graphG2")
+
+    def __init__(self, P: list[list[int]], lp_solution: (float, FractionalSolution), deadline,
+                 rounded_solution: (int, Assignment),
+                 graphG: BipartiteGraphG = None, graphG2: BipartiteGraphG2 = None):
+        self.P = P  # 2D array representing processing time, shared with the caller.
         self.m = len(P)  # Number of machines.
-        self.n = len(P[0]) if P else 0  # Number of jobs.
-        self.t = 0  # Greedy Schedule.
+        self.n = len(P[0]) if len(P) else 0  # Number of jobs.
+        self.t = 0  # Makespan of the best heuristic schedule, the upper limit.
+        self.lower_bound = 0  # Lower limit of d when the Binary Search Procedure stopped.
         self.lp_makespan = lp_solution[0]  # Linear Programming Makespan.
-        self.lp_xij = dict(lp_solution[1])  # Linear Programming decision variables.
+        self.lp_xij = lp_solution[1]  # Linear Programming decision variables, the nonzero xij.
         self.d = deadline  # Deadline d we achieved using Binary Search Procedure.
         self.makespan = rounded_solution[0]  # The Makespan of our Approximate Solution.
-        self.xij = rounded_solution[1].copy()  # The decision variables of our Approximate Schedule.
-        self.bipartite_graphG = graphG  # Graph G created using LP decision variables.
-        self.bipartite_graphG2 = graphG2  # Graph G' created form Graph G removing rank 1 job nodes.
+        self.xij = rounded_solution[1]  # The machine of every job in our Approximate Schedule.
+        self.stage = "rounding"  # The stage of STAGES that produced xij.
+        self._graphG = graphG  # Graph G created using LP decision variables, if retained.
+        self._graphG2 = graphG2  # Graph G' created form Graph G removing rank 1 job nodes, if retained.
+
+    @property
+    def bipartite_graphG(self) -> BipartiteGraphG:
+        if self._graphG is not None:
+            return self._graphG
+        return BipartiteGraphG(self.lp_xij, self.m, self.n)
+
+    @property
+    def bipartite_graphG2(self) -> BipartiteGraphG2:
+        if self._graphG is not None:
+            return self._graphG2
+        return self.build_graphs()[1]
+
+    @property
+    def graphs_retained(self) -> bool:
+        return self._graphG is not None
+
+    def build_graphs(self) -> (BipartiteGraphG, BipartiteGraphG2):
+        """
+        :return: The graphs G and G' of the LP solution, built again.
+        """
+        graphG = BipartiteGraphG(self.lp_xij, self.m, self.n)
+        return graphG, BipartiteGraphG2(graphG) if graphG.is_pseudoforest else None
+
+    def retain_graphs(self):
+        """
+        Builds the graphs G and G' once and keeps them.
+        """
+        if self._graphG is None:
+            self._graphG, self._graphG2 = self.build_graphs()
+
+    def release_graphs(self):
+        self._graphG, self._graphG2 = None, None
 
     def print_info(self) -> None:
         print(f'Pij: {self.m} machines x {self.n} jobs')
-        print("Using Greedy Algorithm, Greedy makespan: t = ", self.t)
+        print("Using the heuristic portfolio, best heuristic makespan: t = ", self.t)
         print("Using Binary Search Procedure the deadline d that results in the best solution for our program: d = ",
               self.d)
         print("The Linear Programming LP(Pij,d⃗,t) with the deadline d creates a non-integer schedule with makespan: "
               "LP makespan = ", self.lp_makespan)
-        print("This the final result. An approximate solution using Linear Programming,Bipartite Graph, 2-Relaxed "
-              "Decision and Binary Search Procedure")
+        if self.stage == "rounding":
+            print("This the final result. An approximate solution using Linear Programming,Bipartite Graph, 2-Relaxed "
+                  "Decision and Binary Search Procedure")
+        else:
+            print("This the final result. The", self.stage, "schedule is better than the rounding of the LP solution")
         print("Makespan: ", self.makespan)
 
     def print_schedule(self) -> None:
@@ -0,0 +1,415 @@
+"""Scheduling service: JSON Lines over a local TCP socket, solved by a pool of worker processes.
+
+Every request is one line, and every response is one line with the same id:
+    {"id": 1, "P": [[...], ...], "gap": 0.0, "time_limit": 30}    processing times in the request
+    {"id": 2, "instance": "300x1000.npy"}                           an instance file of the instance directory
+    {"id": 1, "cancel": true}                                       cancels request 1 of this connection
+    {"id": 3, "stats": true}                                        counters of the service
+    -> {"id": 1, "status": "ok" | "infeasible" | "error" | "timeout" | "cancelled" | "busy", ...}
+An "ok" response carries the record of BatchSolver: t, d, lp_makespan, makespan, timings and assignment.
+Instance files are only read from the instance directory of the service, given with --instance-dir. A path that
+leads out of it, through "..", an absolute path or a symbolic link, is answered with an error. Without an instance
+directory, every request must carry P.
+
+Requests wait in a queue of at most queue_size solves for `workers` worker processes. When the queue is full, a
+request is answered "busy" at once, so the clients back off instead of the queue growing without limit.
+Identical requests (the same processing times or file, gap and time_limit) that are queued or running share one
+solve. The time_limit of a request counts from its arrival: the search stops at that deadline and answers with its
+best schedule so far and its lower_bound. A request stops waiting RESPONSE_GRACE seconds later, and a solve is
+stopped, its worker killed together with CBC and replaced, as soon as no request waits for it any more: after a
+timeout, a cancel or a closed connection.
+A line that is not a JSON object, and a request that fails, are answered with an "error" response.
+
+Usage:
+    python SchedulingService.py serve --port 8765 --workers 4 --queue-size 64 --instance-dir .
+    python SchedulingService.py loadtest --port 8765 --instance 30x100.csv --requests 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+import traceback
+from Workers import kill_worker, own_process_group
+
+DEFAULT_PORT = 8765
+# Seconds a request waits past its time_limit for the schedule the search had at its deadline
+RESPONSE_GRACE = 1.0
+
+
+def _serve_worker(connection):
+    """
+    Entry point of a worker process. Solves the requests it receives, one at a time, until the connection closes.
+    """
+    own_process_group()  # CBC runs in our process group, so the service can kill both of us
+    from BatchSolver import solve_instance, solve_matrix
+    import numpy as np
+
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            return
+        try:
+            gap, time_limit = request.get("gap", 0.0), request.get("time_limit")
+            if "instance" in request:
+                record = solve_instance(request["instance"], gap, time_limit)
+            else:
+                record = solve_matrix(np.asarray(request["P"]), "request", gap, time_limit=time_limit)
+        except Exception as error:
+            record = {"status": "error", "error": repr(error), "traceback": traceback.format_exc()}
+        connection.send(record)
+
+
+class Worker:
+    """
+    A worker process and the pipe to it.
+    """
+
+    def __init__(self):
+        self.process, self.connection = None, None
+        self.start()
+
+    def start(self):
+        context = multiprocessing.get_context("spawn")  # Forking a process with an event loop is not safe
+        self.connection, child = context.Pipe()
+        self.process = context.Process(target=_serve_worker, args=(child,), daemon=True)
+        self.process.start()
+        child.close()
+
+    async def close(self):
+        """
+        Kills the worker. Waiting for the process to exit blocks, so it runs in the default executor.
+        """
+        await asyncio.get_running_loop().run_in_executor(None, kill_worker, self.process)
+        self.connection.close()
+
+    async def restart(self):
+        await self.close()
+        self.start()
+
+    async def solve(self, request: dict) -> dict:
+        """
+        Sends a request to the worker and waits for its record without blocking the event loop.
+        If the wait is cancelled, the worker is killed and replaced.
+        """
+        loop = asyncio.get_running_loop()
+        readable = loop.create_future()
+        self.connection.send(request)
+        fd = self.connection.fileno()
+        loop.add_reader(fd, lambda: readable.done() or readable.set_result(None))
+        try:
+            try:
+                await readable
+            finally:
+                loop.remove_reader(fd)
+        except asyncio.CancelledError:
+            await self.restart()
+            raise
+        try:
+            return self.connection.recv()
+        except EOFError:
+            code = self.process.exitcode
+            await self.restart()
+            return {"status": "error", "error": f"worker exited with code {code}"}
+
+
+class Solve:
+    """
+    One solve, shared by every request that asks for it.
+    """
+
+    def __init__(self, key: str, request: dict):
+        self.key = key
+        self.request = request
+        loop = asyncio.get_running_loop()
+        self.future = loop.create_future()
+        time_limit = request.get("time_limit")
+        self.deadline = loop.time() + time_limit if time_limit is not None else None  # The search stops by then
+        self.waiters = 0  # Requests still waiting for the result
+        self.task = None  # The task that runs the solve on a worker, once it has started
+
+
+class SchedulingService:
+    def __init__(self, workers: int = None, queue_size: int = 64, instance_dir: str = None):
+        """
+        :param workers: Number of worker processes. Defaults to the number of CPUs.
+        :param queue_size: Maximum number of solves waiting for a worker.
+        :param instance_dir: The directory instance files are read from. None refuses requests for instance files.
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.instance_dir = os.path.realpath(instance_dir) if instance_dir is not None else None
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.solves = {}  # key -> Solve, queued or running
+        self.dispatchers = []
+        self.stats = {"requests": 0, "solves": 0, "coalesced": 0, "busy": 0, "timeouts": 0, "cancelled": 0}
+
+    async def start(self):
+        for _ in range(self.workers):
+            self.dispatchers.append(asyncio.create_task(self.dispatch(Worker())))
+
+    async def stop(self):
+        for dispatcher in self.dispatchers:
+            dispatcher.cancel()
+        await asyncio.gather(*self.dispatchers, return_exceptions=True)
+
+    async def dispatch(self, worker: Worker):
+        """
+        Runs the queued solves on one worker, skipping those nobody waits for any more.
+        """
+        try:
+            while True:
+                solve = await self.queue.get()
+                if solve.waiters == 0:
+                    continue
+                request = solve.request
+                if solve.deadline is not None:  # The time limit counts from the request, not from here
+                    request = dict(request, time_limit=max(solve.deadline - asyncio.get_running_loop().time(), 0.0))
+                solve.task = asyncio.create_task(worker.solve(request))
+                try:
+                    record = await solve.task
+                except asyncio.CancelledError:
+                    if solve.waiters == 0:
+                        continue  # Cancelled because nobody waits for it; the worker was replaced
+                    raise
+                finally:
+                    self.forget(solve)
+                self.stats["solves"] += 1
+                if not solve.future.done():
+                    solve.future.set_result(record)
+        finally:
+            await worker.close()
+
+    def instance_path(self, instance) -> str:
+        """
+        :param instance: The instance file of a request, relative to the instance directory.
+        :return: Its real path, or None if there is no instance directory or the path leads out of it.
+        """
+        if self.instance_dir is None or not isinstance(instance, str):
+            return None
+        path = os.path.realpath(os.path.join(self.instance_dir, instance))
+        if os.path.commonpath((path, self.instance_dir)) != self.instance_dir:
+            return None
+        return path
+
+    def forget(self, solve: Solve):
+        """
+        Removes a solve from the solves identical requests can join.
+        """
+        if self.solves.get(solve.key) is solve:
+            del self.solves[solve.key]
+
+    async def handle(self, request: dict) -> dict:
+        """
+        Answers one request: joins an identical solve or queues a new one, and waits for it within the time limit.
+        """
+        self.stats["requests"] += 1
+        job = {key: request[key] for key in ("P", "instance", "gap", "time_limit") if key in request}
+        if "P" not in job and "instance" not in job:
+            return {"status": "error", "error": "the request needs P or instance"}
+        time_limit = job.get("time_limit")
+        if time_limit is not None and (isinstance(time_limit, bool) or not isinstance(time_limit, (int, float))
+                                       or time_limit < 0):
+            return {"status": "error", "error": "time_limit must be a number of seconds"}
+        if "instance" in job:
+            job["instance"] = self.instance_path(job["instance"])
+            if job["instance"] is None:
+                return {"status": "error", "error": "the instance must be a file of the instance directory"}
+        key = request_key(job)
+        solve = self.solves.get(key)
+        if solve is not None:
+            self.stats["coalesced"] += 1
+        else:
+            solve = Solve(key, job)
+            try:
+                self.queue.put_nowait(solve)
+            except asyncio.QueueFull:
+                self.stats["busy"] += 1
+                return {"status": "busy", "queued": self.queue.qsize()}
+            self.solves[key] = solve
+
+        solve.waiters += 1
+        try:
+            wait = time_limit + RESPONSE_GRACE if time_limit is not None else None
+            record = await asyncio.wait_for(asyncio.shield(solve.future), wait)
+            return dict(record)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            return {"status": "timeout"}
+        except asyncio.CancelledError:
+            self.stats["cancelled"] += 1
+            raise
+        finally:
+            solve.waiters -= 1
+            if solve.waiters == 0 and not solve.future.done():
+                self.forget(solve)  # A new identical request starts over
+                if solve.task is not None:
+                    solve.task.cancel()
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Reads the requests of one connection and writes every response as soon as it is ready.
+        """
+        pending = {}  # id -> task that handles the request
+        responders = set()
+
+        async def respond(request_id, handling: asyncio.Task):
+            try:
+                response = await handling
+            except asyncio.CancelledError:
+                response = {"status": "cancelled"}
+            except Exception as error:  # Every request gets a response, or its client waits forever
+                response = {"status": "error", "error": repr(error)}
+            if pending.get(request_id) is handling:
+                del pending[request_id]
+            response["id"] = request_id
+            try:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+            except ConnectionError:
+                pass  # The client is gone
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    writer.write((json.dumps({"status": "error", "error": repr(error)}) + "\n").encode())
+                    continue
+                if not isinstance(request, dict):
+                    writer.write((json.dumps({"status": "error", "error": "a request must be a JSON object"}) +
+                                  "\n").encode())
+                    continue
+                request_id = request.get("id")
+                if request.get("stats"):
+                    writer.write((json.dumps(dict(self.stats, id=request_id, status="ok")) + "\n").encode())
+                    continue
+                if request.get("cancel"):
+                    if request_id in pending:
+                        pending[request_id].cancel()
+                    continue
+                # The request is handled in its own task, so a cancel can stop it even before it started
+                pending[request_id] = handling = asyncio.create_task(self.handle(request))
+                responder = asyncio.create_task(respond(request_id, handling))
+                responders.add(responder)
+                responder.add_done_callback(responders.discard)
+        finally:
+            for handling in list(pending.values()):  # A closed connection cancels its requests
+                handling.cancel()
+            await asyncio.gather(*responders, return_exceptions=True)
+            writer.close()
+
+
+def request_key(job: dict) -> str:
+    """
+    :param job: The processing times or the instance file, and the gap.
+    :return: A key that is the same for identical solves.
+    """
+    digest = hashlib.sha256(repr(job.get("gap", 0.0)).encode())
+    if "instance" in job:
+        filename = os.path.abspath(job["instance"])
+        modified = os.path.getmtime(filename) if os.path.exists(filename) else None
+        digest.update(repr((filename, modified)).encode())
+    else:
+        digest.update(json.dumps(job["P"]).encode())
+    return digest.hexdigest()
+
+
+async def serve(host: str = "127.0.0.1", port: int = DEFAULT_PORT, workers: int = None, queue_size: int = 64,
+                instance_dir: str = None):
+    service = SchedulingService(workers, queue_size, instance_dir)
+    await service.start()
+    server = await asyncio.start_server(service.serve_connection, host, port, limit=2 ** 26)
+    print(f"Serving on {host}:{port} with {service.workers} workers", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+# %-------------------------- Load test client    ----------------------------------------------------------------%
+async def load_test(requests: list[dict], host: str = "127.0.0.1", port: int = DEFAULT_PORT, concurrency: int = 8):
+    """
+    Sends the requests over `concurrency` connections, one request at a time on each.
+    :return: The latency in seconds and the status of every request, and the total time.
+    """
+    results = []
+    queue = list(reversed(requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 26)
+        try:
+            while queue:
+                request = queue.pop()
+                start = time.perf_counter()
+                writer.write((json.dumps(request) + "\n").encode())
+                await writer.drain()
+                response = json.loads(await reader.readline())
+                results.append((time.perf_counter() - start, response["status"]))
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return results, time.perf_counter() - start
+
+
+def print_load_test(results: list, elapsed: float):
+    latencies = sorted(latency for latency, _ in results)
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive") if len(latencies) > 1 else latencies * 99
+    print(f"Requests: {len(results)} in {elapsed:.2f} s, throughput {len(results) / elapsed:.1f} requests/s")
+    print(f"Latency: p50 {percentiles[49] * 1000:.1f} ms, p99 {percentiles[98] * 1000:.1f} ms, "
+          f"max {latencies[-1] * 1000:.1f} ms")
+    print("Statuses:", statuses)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scheduling service and its load test client")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the service")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    serve_parser.add_argument("--workers", type=int, default=None, help="worker processes")
+    serve_parser.add_argument("--queue-size", type=int, default=64, help="solves waiting for a worker")
+    serve_parser.add_argument("--instance-dir", default=None,
+                              help="directory of the instance files requests may name, none by default")
+    test_parser = commands.add_parser("loadtest", help="measure throughput and latency of a running service")
+    test_parser.add_argument("--host", default="127.0.0.1")
+    test_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    test_parser.add_argument("--instance", default="30x100.csv", help="instance file the service reads")
+    test_parser.add_argument("--distinct", type=int, default=1,
+                             help="number of distinct instances, random variants of --instance sent as P")
+    test_parser.add_argument("--requests", type=int, default=100)
+    test_parser.add_argument("--concurrency", type=int, default=8)
+    test_parser.add_argument("--time-limit", type=float, default=None, help="time_limit of every request")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.host, args.port, args.workers, args.queue_size, args.instance_dir))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.distinct <= 1:
+        variants = [{"instance": args.instance}]
+    else:
+        import numpy as np
+        from generate_data import read_instance
+        P = np.asarray(read_instance(args.instance))
+        rng = np.random.default_rng(0)
+        variants = [{"P": rng.permutation(P, axis=1).tolist()} for _ in range(args.distinct)]
+    requests = [dict(variants[k % len(variants)], id=k, time_limit=args.time_limit) for k in range(args.requests)]
+    print_load_test(*asyncio.run(load_test(requests, args.host, args.port, args.concurrency)))
+
+
+if __name__ == "__main__":
+    main()
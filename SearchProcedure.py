@@ -7,21 +7,40 @@ problem to an integer solution. Initially, we construct a graph G according to t
 we proceed; otherwise, this implies a better solution exists. Subsequently, a graph G' is derived from G by removing
 job nodes with rank=1. Then, we perform matching and convert the non-integer solution.
 
-Step3 2-Relaxed Decision Process LP(P, d): Utilizes LP(P, d ⃗,t) with d_1=d_2=⋯=ⅆ_m and the Rounding Methodology to
-round the non-integer solution. It produces a solution if feasible, returning "almost" as observed; otherwise,
+Step3 2-Relaxed Decision Process LP(P, d): Utilizes LP(P, d ⃗,t) with d_1=d_2=⋯=ⅆ_m and the Rounding Methodology
+to round the non-integer solution. It produces a solution if feasible, returning "almost" as observed; otherwise,
 it returns "no."
 
-Step4 Upper and Lower Limit Computation: Using the Greedy algorithm, we calculate a greedy schedule, and the makespan
-of this greedy schedule constitutes the upper limit t. We set the lower limit t/m, where m is the number of machines.
+Step4 Upper and Lower Limit Computation: Using a portfolio of constructive heuristics (greedy and load-capped greedy),
+we calculate schedules, and the smallest makespan constitutes the upper limit t. We set the lower limit t/m, where m
+is the number of machines, or a larger limit below which LP(P, d) has no solution: every job needs a machine with
+pij <= d, so d >= max_j min_i pij, and the machines share at least sum_j min_i pij of work, so
+d >= sum_j min_i pij / m. Optionally, the LP relaxation with d = t gives the smallest fractional makespan, and no d
+below it has a solution either.
 
 Step5 Binary Search: The final step is to execute the binary search process. Until the lower limit equals the upper
 limit, we set d=⌊1/2 (u+l)⌋. If the 2-Relaxed Decision Process LP(P, d) returns a solution, then the upper limit
 becomes d; otherwise, the lower limit becomes d + 1. Simultaneously, we store the solution with the smallest
-makespan."""
+makespan. If every d was 'no', we finally try d = t. With a relative gap, we stop as soon as
+(upper - lower) <= gap * upper. The rounding only promises a makespan of at most 2d, so when the best heuristic
+schedule is better than every rounded one, the result carries the heuristic schedule instead."""
+import math
+import multiprocessing
+import os
+from collections import deque
+from multiprocessing.connection import wait
 import numpy as np
 from RoundingTheorem import *
 from BipartiteGraph import *
-from SchedulingProblem import SchedulingProblem
+from SchedulingProblem import SchedulingProblem, GRAPH_RETENTION
+from Workers import kill_worker, own_process_group
+from DecisionCache import instance_fingerprint, decision_variant, model_variant
+from generate_data import read_instance
+from Heuristics import heuristic_schedule, min_processing_schedule
+from JobTypes import aggregation, decision_model
+from LinearModel import EligibilityIndex
+from Tracing import span, count
+from time import perf_counter  # After the star imports, since pulp exports a time of its own
 
 
 def greedy_schedule(P: list[list[int]]) -> int:
@@ -30,14 +49,40 @@ def greedy_schedule(P: list[list[int]]) -> int:
     :param P: 2D array representing the processing times of jobs on different machines.
     :return: The makespan of the schedule, the maximum load among all machines.
     """
-    P, m, n, machines_load = np.array(P), len(P), len(P[0]), np.zeros(len(P))
-    for j in range(n):
-        machine = np.argmin(P[:, j])  # Find machine with minimum processing time for a job j
-        machines_load[machine] += P[machine, j]  # Assign job j to the selected machine
-    return int(np.max(machines_load))  # Compute the makespan as the maximum load among machines
+    return min_processing_schedule(P).makespan(P)
 
 
-def round_lpSolution(lp_xij: dict[tuple[int, int], LpVariable], m: int, n: int):
+def processing_lower_bound(P: list[list[int]], index: EligibilityIndex = None) -> int:
+    """
+    A lower limit of d for which LP(P, d) can have a solution. It is at least t // m.
+    Every job needs a machine with pij <= d, and the m machines share at least sum_j min_i pij of work.
+    :param P: 2D array representing the processing times of jobs on different machines.
+    :param index: The EligibilityIndex of P, or None.
+    :return: max(max_j min_i pij, ⌈sum_j min_i pij / m⌉)
+    """
+    # The smallest processing time of every job
+    fastest = index.fastest_times if index else np.asarray(P).min(axis=0)
+    return max(int(fastest.max()), -(-int(fastest.sum()) // len(P)))
+
+
+def lp_lower_bound(P: list[list[int]], t: int, model: DecisionModel = None) -> int:
+    """
+    A solution of LP(P, d) with d <= t is also a solution of LP(P, d⃗,t) with d1 = d2 = ⋯ = dm = t and Cmax <= d.
+    So no d below the minimum Cmax of LP(P, d⃗,t) has a solution.
+    :param P: 2D array representing the processing times of jobs on different machines.
+    :param t: The upper limit, the makespan of the best heuristic schedule.
+    :param model: A DecisionModel of P to solve instead of building LP(P, d⃗,t) from scratch.
+    :return: ⌈min Cmax⌉ of LP(P, d⃗,t)
+    """
+    with span("lp_lower_bound", t=t):
+        di = [t] * len(P)
+        solution = model.solve(di, t) if model else LP(P, di, t)
+    if solution is None:
+        return 0
+    return math.ceil(solution[0] - 1e-6)  # CBC's tolerance must not push the bound past an integer
+
+
+def round_lpSolution(lp_xij: FractionalSolution, m: int, n: int, bipartiteGraphG: BipartiteGraphG = None):
     """
     We round the solution of the LP(Pij, d⃗,t) with the use of Bipartite Graph
     If the graph G we create doesn't have the property of a pseudoforest that means that there is a better solution.
@@ -45,29 +90,30 @@ def round_lpSolution(lp_xij: dict[tuple[int, int], LpVariable], m: int, n: int):
     :param lp_xij: Linear decision xij
     :param m: machines
     :param n: jobs
+    :param bipartiteGraphG: The graph G of lp_xij, if the model already built it. Built here if None.
     :return: rounded solution
     """
-    # Using LP xij, we create a bipartite graph G
-    bipartiteGraphG = BipartiteGraphG(lp_xij, m, n)
-    if bipartiteGraphG.is_pseudoforest:
-        bipartiteGraphG2 = BipartiteGraphG2(bipartiteGraphG.graph)  # Removing degree 1 jobs we get a graph G'
-        # We round the solution according to the matching
-        rounded_xij = lp_xij.copy()
-        for i, j in bipartiteGraphG2.matching:
-            rounded_xij[i, j].varValue = 1
-        for key in lp_xij:
-            if lp_xij[key].varValue != 1:
-                rounded_xij[key].varValue = 0
-        return rounded_xij, bipartiteGraphG, bipartiteGraphG2
+    with span("rounding", edges=len(lp_xij)):
+        # Using LP xij, we create a bipartite graph G
+        if bipartiteGraphG is None:
+            bipartiteGraphG = BipartiteGraphG(lp_xij, m, n)
+        if bipartiteGraphG.is_pseudoforest:
+            bipartiteGraphG2 = BipartiteGraphG2(bipartiteGraphG)  # Removing degree 1 jobs we get a graph G'
+            # Jobs with xij = 1 keep their machine, the rest get the machine of the matching
+            rounded_xij = lp_xij.integral_assignment()
+            for i, j in bipartiteGraphG2.matching:
+                rounded_xij.machines[j] = i
+            return rounded_xij, bipartiteGraphG, bipartiteGraphG2
     return None
 
 
-def two_relaxed_decision_procedure(P: list[list[int]], d: int):
+def two_relaxed_decision_procedure(P: list[list[int]], d: int, model: DecisionModel = None,
+                                   keep_graphs: bool = False):
     """
     The decision process yields either 'no' or 'almost'; more precisely, in the input (P, d):
         If the output is 'almost,' it means that there is a solution with makespan at most d.
-    This arises from the fact that the initial linear problem (LP) with parameters d_1=d_2=⋯=ⅆ_m=t has a solution with
-    makespan at most d.
+    This arises from the fact that the initial linear problem (LP) with parameters d_1=d_2=⋯=ⅆ_m=t has a solution
+    with makespan at most d.
     Then, using bipartite graphs as discussed in the previous chapter, we proceed to round this solution.
         If the rounding is successful, and the generated graph is pseudoforest (indicating that the LP solution is
     an extreme point), we proceed to calculate the makespan from the rounded integer program.
@@ -77,41 +123,390 @@ def two_relaxed_decision_procedure(P: list[list[int]], d: int):
     most d.
     :param P:
     :param d: D1 = d2 = … dm = t = d
+    :param model: A DecisionModel of P to re-solve instead of building LP(P, d⃗,t) from scratch.
+    :param keep_graphs: Keep the graphs G and G' of the rounding in the result, instead of rebuilding them on demand.
     :return lp_solution_rounded_solution, GraphG, GraphG'
     """
 
-    di = [d] * len(P)
-    solution = LP(P, di, d)
-    if solution:
-        rounded = round_lpSolution(solution[1], len(P), len(P[0]))
-        if rounded:
-            if rounded[1].is_pseudoforest:
-                makespan = calculate_makespan(P, rounded[0])
-                if makespan <= 2 * d:
-                    return SchedulingProblem(P, solution, d, (makespan, rounded[0]), rounded[1], rounded[2])
+    with span("decision", d=d) as decision_span:
+        di = [d] * len(P)
+        solution = model.solve(di, d) if model else LP(P, di, d)
+        decision_span.set("answer", "stopped" if solution is None and model and model.backend.stopped else "no")
+        if solution:
+            rounded = round_lpSolution(solution[1], len(P), len(P[0]), model.last_graph if model else None)
+            if rounded and rounded[0].is_complete():  # Every job has a machine
+                if rounded[1].is_pseudoforest:
+                    makespan = calculate_makespan(P, rounded[0])
+                    if makespan <= 2 * d:
+                        decision_span.set("answer", "almost")
+                        decision_span.set("makespan", makespan)
+                        graphs = rounded[1:] if keep_graphs else ()
+                        return SchedulingProblem(P, solution, d, (makespan, rounded[0]), *graphs)
     return None
 
 
-def binary_search_procedure(P: list[list[int]]):
+def binary_search_procedure(P: list[list[int]], warm_start: bool = True, cache=None, lp_bound: bool = False,
+                            gap: float = 0.0, lower_limit: int = 0, upper_limit: int = None,
+                            model: DecisionModel = None, backend=None, graphs: str = "final", deadline: float = None,
+                            progress=None, aggregate: bool = None):
     """
     While lower_bound != upper_bound run the LP(d,t) decision procedure in order to find the deadline and solution with
     the minimum makespan
+    The LP is built once as a DecisionModel and re-solved for every deadline d.
     :param P: 2D array m machines and n jobs.
-    :return: Final result.
+    :param warm_start: Start every LP solve from the basis of the previous one.
+    :param cache: A DecisionCache for the decision procedure, or None.
+    :param lp_bound: Solve the LP relaxation once with d = t for a tighter lower limit.
+    :param gap: Stop once a solution is found and (upper - lower) <= gap * upper. 0 searches until the limits meet.
+    :param lower_limit: A known lower limit of d, like the lower limit of an earlier search on a part of the jobs.
+    :param upper_limit: The makespan of a known schedule, used if it is below the heuristic t.
+    :param model: A DecisionModel of P to solve, like one with the basis of an earlier search. It must be built for a
+    t_max of at least the upper limit. Built here if None.
+    :param backend: The SolverBackend of the model built here, a backend name or None to pick one by its size.
+    :param graphs: Which results keep their graphs G and G', one of GRAPH_RETENTION: "none", "final" or "all".
+    :param deadline: time.perf_counter() at which the search stops, with the best solution so far and its lower limit.
+    Every LP solve is cut off at the deadline. The 'no' of a solve that was cut off, at the deadline or at the time
+    limit of the backend, is not a proven 'no', so the search stops there without raising its lower limit.
+    :param progress: Called as progress(stage, makespan, xij, lower_bound) with the heuristic schedule and after every
+    probe, with the best schedule so far and the lower limit of d, which is a lower bound of the optimal makespan.
+    :param aggregate: Solve the LP of the job types of JobTypes.py in the model built here. None uses them when P has
+    many identical columns.
+    :return: Final result, None if the deadline came before any solution.
     An approximate solution using Linear Programming, Bipartite Graph, 2-Relaxed Decision and Binary Search Procedure
     """
-    t = greedy_schedule(P)
-    m, upper_bound, lower_bound = len(P), t, t // len(P)
-    best_solution = None
-
-    while lower_bound != upper_bound:
-        d = (upper_bound + lower_bound) // 2
-        if result := two_relaxed_decision_procedure(P, d):  # If it is a yes instance
-            upper_bound = d
-            if best_solution is None or best_solution.makespan < result.makespan:
-                best_solution = result
+    check_retention(graphs)
+    with span("binary_search", m=len(P), n=len(P[0])):
+        if model is None:
+            with span("EligibilityIndex"):
+                index = EligibilityIndex(P)  # Shared by the heuristics, the bounds and the LP
         else:
-            lower_bound = d + 1
+            index = model.index
+        # Makespan and schedule reported until a probe does better
+        incumbent = heuristic_schedule(P, index=index, deadline=deadline)
+        t = incumbent[0]
+        if upper_limit is not None:
+            t = min(t, upper_limit)
+        m, upper_bound = len(P), t
+        best_solution = None
+        if model is None:
+            with span("DecisionModel.build", t_max=upper_bound):
+                # Every d we try is below the upper bound
+                model = decision_model(P, upper_bound, warm_start, index, backend, aggregate)
+        fingerprint = instance_fingerprint(P) if cache else None
+        variant = model_variant(model)
+        previous_deadline = model.backend.deadline
+        if deadline is not None:
+            model.backend.deadline = deadline
+        try:
+            lower_bound = max(search_lower_bound(P, t, lp_bound, model), min(lower_limit, t))
+            if progress:
+                progress("heuristic", *incumbent, lower_bound)
+
+            while lower_bound != upper_bound and not gap_closed(best_solution, lower_bound, upper_bound, gap):
+                if out_of_time(deadline):
+                    break
+                d = (upper_bound + lower_bound) // 2
+                with span("probe", d=d, lower=lower_bound, upper=upper_bound):
+                    found, result = cache.lookup_decision(P, d, fingerprint, variant) if cache else (False, None)
+                    if not found:
+                        result = two_relaxed_decision_procedure(P, d, model, graphs == "all" and not cache)
+                if result is None and not found and model.backend.stopped:
+                    count("probes.stopped")  # A 'no' of a solve cut off proves nothing, the search ends here
+                    break
+                count("probes")
+                if cache and not found:
+                    cache.store_decision(d, fingerprint, result, variant)
+                if result:  # If it is a yes instance
+                    upper_bound = d
+                    best_solution = keep_best_solution(best_solution, result)
+                    if graphs == "all":
+                        result.retain_graphs()
+                    if result.makespan < incumbent[0]:
+                        incumbent = result.makespan, result.xij
+                else:
+                    lower_bound = d + 1
+                if progress:
+                    progress("search", *incumbent, lower_bound)
+            if best_solution is None and not out_of_time(deadline):
+                best_solution = decide_upper_bound(P, upper_bound, model)
+        finally:
+            model.backend.deadline = previous_deadline
+        finish_solution(best_solution, t, lower_bound, graphs, incumbent)
+    return best_solution
+
+
+def out_of_time(deadline: float) -> bool:
+    """
+    :param deadline: A time.perf_counter() time, or None for no deadline.
+    """
+    return deadline is not None and perf_counter() >= deadline
+
+
+def check_retention(graphs: str):
+    if graphs not in GRAPH_RETENTION:
+        raise ValueError(f"graphs = {graphs!r}, expected one of {GRAPH_RETENTION}")
+
+
+def finish_solution(best_solution: SchedulingProblem, t: int, lower_bound: int, graphs: str,
+                    incumbent: (int, Assignment) = None):
+    """
+    Records the limits of the search on the solution it returns, and its graphs unless the policy is "none".
+    :param incumbent: The makespan and the schedule of the best heuristic. If it is better than the rounded schedule,
+    the solution gets it instead, with stage "heuristic". d and the LP solution stay those of the search.
+    """
     if best_solution:
         best_solution.t = t
+        best_solution.lower_bound = lower_bound
+        if incumbent is not None and incumbent[0] < best_solution.makespan:
+            best_solution.makespan, best_solution.xij = incumbent
+            best_solution.stage = "heuristic"
+            count("heuristic_kept")
+        if graphs != "none":
+            best_solution.retain_graphs()
+
+
+def search_lower_bound(P: list[list[int]], t: int, lp_bound: bool = False, model: DecisionModel = None) -> int:
+    """
+    The lower limit of the Binary Search Procedure.
+    :param t: The makespan of the best heuristic schedule, the upper limit.
+    :param lp_bound: Also use the LP relaxation bound.
+    :param model: A DecisionModel of P for the LP relaxation bound, its EligibilityIndex is used as well.
+    """
+    bound = max(t // len(P), processing_lower_bound(P, model.index if model else None))
+    if lp_bound:
+        bound = max(bound, lp_lower_bound(P, t, model))
+    return min(bound, t)
+
+
+def decide_upper_bound(P: list[list[int]], t: int, model: DecisionModel = None):
+    """
+    The search never tests d = t, so when every deadline it tested was 'no' the procedure runs once more with d = t.
+    The heuristic schedule with makespan t is a solution of LP(P, t), so this is rarely 'no'.
+    :return: The result of the decision procedure for d = t.
+    """
+    with span("probe", d=t, lower=t, upper=t):
+        result = two_relaxed_decision_procedure(P, t, model)
+    count("probes")
+    return result
+
+
+def gap_closed(best_solution: SchedulingProblem, lower_bound: int, upper_bound: int, gap: float) -> bool:
+    """
+    :return: True if there is a solution and the relative gap between the limits is at most gap.
+    """
+    return best_solution is not None and upper_bound - lower_bound <= gap * upper_bound
+
+
+def keep_best_solution(best_solution: SchedulingProblem, result: SchedulingProblem) -> SchedulingProblem:
+    """
+    The solution the Binary Search Procedure keeps after a yes instance: the one with the smallest makespan, and on a
+    tie the later one, which has the smaller d.
+    """
+    if best_solution is None or result.makespan <= best_solution.makespan:
+        return result
+    return best_solution
+
+
+# %-------------------------- Parallel Binary Search Procedure    ----------------------------------------------------%
+# Every worker process keeps its own copy of P and its own DecisionModel.
+def _decision_worker(connection, P, t_max: int, backend=None, aggregate: bool = None):
+    """
+    Entry point of a worker process. Answers the deadlines it receives, one at a time, until the connection closes.
+    :param P: The instance, or the filename of a memory-mapped instance.
+    :param t_max: The upper bound of the search.
+    :param backend: The SolverBackend or backend name of the worker's DecisionModel.
+    :param aggregate: Solve the LP of the job types, None to decide by the number of types.
+    """
+    own_process_group()  # CBC runs in our process group, so a dropped test can kill both of us
+    P = read_instance(P) if isinstance(P, str) else P
+    model = decision_model(P, t_max, warm_start=False, backend=backend, aggregate=aggregate)
+    while True:
+        try:
+            d, keep_graphs = connection.recv()
+        except EOFError:
+            return
+        try:
+            result = two_relaxed_decision_procedure(P, d, model, keep_graphs)
+            if result:
+                result.P = None  # The parent process already has P
+            result = result, result is None and model.backend.stopped
+        except Exception as error:
+            result = error
+        connection.send(result)
+
+
+class DecisionWorker:
+    """
+    A worker process of the parallel search and the pipe to it. A test that is no longer on the path of the search is
+    stopped by killing the worker, together with its CBC process, and starting a new one.
+    """
+
+    def __init__(self, arguments: tuple):
+        """
+        :param arguments: P, t_max, backend and aggregate of _decision_worker.
+        """
+        self.arguments = arguments
+        self.process, self.connection = None, None
+        self.interval = None  # The interval whose deadline the worker is testing, None when it is idle
+        self.start()
+
+    def start(self):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_decision_worker, args=(child, *self.arguments), daemon=True)
+        self.process.start()
+        child.close()
+        self.interval = None
+
+    def test(self, interval: (int, int), keep_graphs: bool = False):
+        """
+        Starts the decision procedure for d = (lower + upper) // 2 of the interval.
+        """
+        self.interval = interval
+        self.connection.send(((interval[0] + interval[1]) // 2, keep_graphs))
+
+    def result(self) -> (SchedulingProblem, bool):
+        """
+        :return: The result of the test, once the connection is readable, and True if it is the 'no' of a solve that
+        was cut off at the time limit of the backend. The worker is idle again.
+        """
+        self.interval = None
+        try:
+            result = self.connection.recv()
+        except EOFError:
+            raise RuntimeError(f"worker exited with code {self.process.exitcode}")
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        kill_worker(self.process)
+        self.connection.close()
+
+    def restart(self):
+        self.close()
+        self.start()
+
+
+def within(interval: (int, int), lower_bound: int, upper_bound: int) -> bool:
+    return lower_bound <= interval[0] and interval[1] <= upper_bound
+
+
+def search_intervals(lower_bound: int, upper_bound: int):
+    """
+    The intervals [lower, upper] the Binary Search Procedure can visit from [lower_bound, upper_bound], level by
+    level. Interval [l, u] tests d = (l + u) // 2 and continues with [l, d] on yes and [d + 1, u] on no.
+    """
+    queue = deque([(lower_bound, upper_bound)])
+    while queue:
+        lower, upper = queue.popleft()
+        if lower == upper:
+            continue
+        yield lower, upper
+        d = (lower + upper) // 2
+        queue.append((lower, d))
+        queue.append((d + 1, upper))
+
+
+def parallel_binary_search_procedure(P: list[list[int]], workers: int = None, cache=None, lp_bound: bool = False,
+                                     gap: float = 0.0, backend=None, graphs: str = "final", aggregate: bool = None):
+    """
+    Binary Search Procedure that tests up to `workers` deadlines at the same time in worker processes.
+    Besides the d of the current interval, the workers test the deadlines of the next levels of the search tree,
+    so every result moves the search down one level with the next tests already running or done.
+    With k workers this takes about log_{k+1}(t) rounds instead of log2(t).
+    When a result picks one side of the tree, the results of the other side are dropped, and the workers still
+    testing it are killed and replaced, so they don't keep solving LPs nobody waits for, during or after the search.
+    The search follows the same path as binary_search_procedure, so it returns the same solution as
+    binary_search_procedure(P, warm_start=False). Workers solve without warm start, which depends on the order of the
+    solves.
+    :param P: 2D array m machines and n jobs.
+    :param workers: Number of worker processes. Defaults to the number of CPUs.
+    :param cache: A DecisionCache. Cached deadlines are answered without a worker.
+    :param lp_bound: Solve the LP relaxation once with d = t for a tighter lower limit.
+    :param gap: Stop once a solution is found and (upper - lower) <= gap * upper.
+    :param backend: The SolverBackend or backend name of the workers, None to pick one by the size of the model.
+    :param graphs: Which results keep their graphs G and G', one of GRAPH_RETENTION: "none", "final" or "all".
+    :param aggregate: Solve the LP of the job types in the workers, None to decide by the number of types.
+    :return: Final result, same as binary_search_procedure.
+    """
+    check_retention(graphs)
+    workers = workers or os.cpu_count() or 1
+    incumbent = heuristic_schedule(P)
+    t = incumbent[0]
+    m, upper_bound, lower_bound = len(P), t, search_lower_bound(P, t, lp_bound)
+    best_solution = None
+    # (lower, upper) -> result of the decision procedure for d = (lower + upper) // 2 and whether it was cut off
+    results = {}
+    fingerprint = instance_fingerprint(P) if cache else None
+    # The key of the models the workers build, resolved the way they resolve it
+    variant = decision_variant(backend, aggregation(P, aggregate)) if cache else None
+    cached = set()  # Intervals answered by the cache
+
+    # A memory-mapped instance is mapped again by every worker instead of being copied to it
+    source = P.filename if isinstance(P, np.memmap) and P.filename else P
+    pool = [DecisionWorker((source, upper_bound, backend, aggregate)) for _ in range(workers)]
+
+    def keep_testing():
+        """
+        Gives every idle worker the next untested interval, from the levels closest to the current interval.
+        """
+        for interval in search_intervals(lower_bound, upper_bound):
+            idle = [worker for worker in pool if worker.interval is None]
+            if not idle:
+                break
+            if interval in results or any(worker.interval == interval for worker in pool):
+                continue
+            d = (interval[0] + interval[1]) // 2
+            found, result = cache.lookup_decision(P, d, fingerprint, variant) if cache else (False, None)
+            if found:
+                results[interval] = result, False
+                cached.add(interval)
+            else:
+                idle[0].test(interval, graphs == "all")
+
+    try:
+        while lower_bound != upper_bound and not gap_closed(best_solution, lower_bound, upper_bound, gap):
+            d, current = (upper_bound + lower_bound) // 2, (lower_bound, upper_bound)
+            with span("probe", d=d, lower=lower_bound, upper=upper_bound):
+                while current not in results:  # Time spent waiting for the workers
+                    keep_testing()
+                    busy = {worker.connection: worker for worker in pool if worker.interval is not None}
+                    for connection in wait(list(busy)):
+                        worker = busy[connection]
+                        interval = worker.interval
+                        results[interval] = worker.result()
+            result, stopped = results.pop(current)
+            if stopped:
+                count("probes.stopped")  # A 'no' of a solve cut off proves nothing, the search ends here
+                break
+            count("probes")
+            if result:
+                result.P = P
+            if cache and current not in cached:
+                cache.store_decision(d, fingerprint, result, variant)
+            if result:  # If it is a yes instance
+                upper_bound = d
+                best_solution = keep_best_solution(best_solution, result)
+                if graphs == "all":
+                    result.retain_graphs()
+            else:
+                lower_bound = d + 1
+
+            # Tests outside [lower_bound, upper_bound] can't be on the path anymore
+            for interval in [interval for interval in results if not within(interval, lower_bound, upper_bound)]:
+                del results[interval]
+            for worker in pool:
+                if worker.interval is not None and not within(worker.interval, lower_bound, upper_bound):
+                    worker.restart()
+                    count("parallel.dropped_tests")
+            keep_testing()
+    finally:
+        for worker in pool:
+            worker.close()
+    if best_solution is None:
+        # Same model as the workers, so the last probe answers like them
+        with span("DecisionModel.build", t_max=upper_bound):
+            model = decision_model(P, upper_bound, False, backend=backend, aggregate=aggregate)
+        best_solution = decide_upper_bound(P, upper_bound, model)
+    finish_solution(best_solution, t, lower_bound, graphs, incumbent)
     return best_solution
@@ -0,0 +1,138 @@
+"""Compact solutions of the scheduling problem.
+
+Assignment: an integral schedule, the machine of every job as an int32 vector (-1 for a job without machine).
+FractionalSolution: a solution of LP(P, d⃗,t), only the xij > 0 as a sparse (COO) array.
+
+Loads and makespans are computed with np.bincount over the jobs, so a stored solution costs a few KB instead of one
+LpVariable for every pair (i, j).
+"""
+import numpy as np
+
+
+class Assignment:
+    __slots__ = ("machines",)
+
+    def __init__(self, machines):
+        """
+        :param machines: The machine of every job, -1 for a job without machine.
+        """
+        self.machines = np.asarray(machines, dtype=np.int32)
+
+    @property
+    def n(self) -> int:
+        return len(self.machines)
+
+    def is_complete(self) -> bool:
+        """
+        :return: True if every job has a machine.
+        """
+        return bool(np.all(self.machines >= 0))
+
+    def loads(self, P) -> np.ndarray:
+        """
+        :param P: 2D array representing the processing times of jobs on machines.
+        :return: The completion time of every machine. Jobs without machine are not counted.
+        """
+        P = np.asarray(P)
+        jobs = np.flatnonzero(self.machines >= 0)
+        machines = self.machines[jobs]
+        return np.bincount(machines, weights=P[machines, jobs], minlength=P.shape[0])
+
+    def makespan(self, P):
+        """
+        :param P: 2D array representing the processing times of jobs on machines.
+        :return: The maximum completion time among all machines.
+        """
+        P = np.asarray(P)
+        makespan = self.loads(P).max()
+        return int(makespan) if np.issubdtype(P.dtype, np.integer) else float(makespan)
+
+    def validate(self, P) -> bool:
+        """
+        :param P: 2D array representing the processing times of jobs on machines.
+        :return: True if every job is assigned to exactly one existing machine.
+        """
+        m, n = np.shape(P)
+        return self.n == n and bool(np.all((self.machines >= 0) & (self.machines < m)))
+
+    def jobs_of(self, machine: int) -> np.ndarray:
+        return np.flatnonzero(self.machines == machine)
+
+    def to_dense(self, m: int) -> np.ndarray:
+        """
+        :param m: The number of machines.
+        :return: The m x n 0/1 array of xij.
+        """
+        x = np.zeros((m, self.n), dtype=np.int8)
+        jobs = np.flatnonzero(self.machines >= 0)
+        x[self.machines[jobs], jobs] = 1
+        return x
+
+    def copy(self):
+        return Assignment(self.machines.copy())
+
+    def __len__(self):
+        return self.n
+
+    def __repr__(self):
+        return f"Assignment({self.machines.tolist()})"
+
+
+class FractionalSolution:
+    __slots__ = ("m", "n", "machines", "jobs", "values")
+
+    def __init__(self, m: int, n: int, machines, jobs, values):
+        """
+        The nonzero xij of an LP solution.
+        :param m: The number of machines.
+        :param n: The number of jobs.
+        :param machines: Machine i of every nonzero xij.
+        :param jobs: Job j of every nonzero xij.
+        :param values: The value of every nonzero xij.
+        """
+        self.m, self.n = m, n
+        values = np.asarray(values, dtype=np.float64)
+        nonzero = values > 0
+        self.machines = np.asarray(machines, dtype=np.int32)[nonzero]
+        self.jobs = np.asarray(jobs, dtype=np.int32)[nonzero]
+        self.values = values[nonzero]
+
+    def loads(self, P) -> np.ndarray:
+        """
+        :param P: 2D array representing the processing times of jobs on machines.
+        :return: The fractional completion time of every machine.
+        """
+        P = np.asarray(P)
+        return np.bincount(self.machines, weights=P[self.machines, self.jobs] * self.values, minlength=self.m)
+
+    def makespan(self, P) -> float:
+        return float(self.loads(P).max())
+
+    def validate(self, P, tolerance: float = 1e-6) -> bool:
+        """
+        :param P: 2D array representing the processing times of jobs on machines.
+        :param tolerance: Allowed error of the sums.
+        :return: True if the xij of every job sum to 1.
+        """
+        sums = np.bincount(self.jobs, weights=self.values, minlength=self.n)
+        return np.shape(P) == (self.m, self.n) and bool(np.all(np.abs(sums - 1) <= tolerance))
+
+    def integral_assignment(self) -> Assignment:
+        """
+        :return: The machine of every job with xij = 1, -1 for the fractional jobs.
+        """
+        machines = np.full(self.n, -1, dtype=np.int32)
+        integral = self.values == 1
+        machines[self.jobs[integral]] = self.machines[integral]
+        return Assignment(machines)
+
+    def to_dense(self) -> np.ndarray:
+        """
+        :return: The m x n array of xij.
+        """
+        x = np.zeros((self.m, self.n))
+        x[self.machines, self.jobs] = self.values
+        return x
+
+    def __len__(self):
+        return len(self.values)
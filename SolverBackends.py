@@ -0,0 +1,267 @@
+"""Solver backends for LP(Pij, d⃗,t) and IP(Pij, d⃗,t).
+
+    cbc:    PuLP writes the model to a file, starts a CBC process and reads its solution file back. Always available.
+    highs:  HiGHS in this process, through highspy. The model goes to HiGHS as the CSR arrays of the LinearModel,
+            with no files, no PuLP variables and no process. Needs `pip install highspy`.
+    auto:   HiGHS when it is installed, except for IPs of at most AUTO_CBC_IP_PAIRS pairs, where CBC's branch and
+            bound was faster. HiGHS solved every LP faster, from 3x10 (0.6 ms against 3 ms) to 200x5000 (22 s against
+            49 s), and IPs of 10x200 in 5 s against 46 s.
+
+A backend also keeps a session for the DecisionModel, the LP built once and re-solved for every deadline d. The CBC
+session is the DecisionModel itself. The HiGHS session keeps every pair with Pij <= t_max as a column and, for a new t,
+fixes the columns with Pij > t to 0 instead of removing them, so HiGHS starts every solve from the basis of the last.
+Without warm start the session clears the basis before every solve, so its answers don't depend on the order of the
+deadlines, the same as a new model for every solve.
+"""
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+from pulp import PULP_CBC_CMD, LpStatusNotSolved, value
+from LinearModel import LinearModel
+from Solution import Assignment, FractionalSolution
+from Tracing import count
+
+# Values this close to 0 or 1 are 0 or 1, so the rounding sees the same integral xij as with CBC
+TOLERANCE = 1e-9
+# IPs with at most this many pairs go to CBC in auto
+AUTO_CBC_IP_PAIRS = 500
+
+
+def highs_available() -> bool:
+    try:
+        import highspy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class SolverBackend(ABC):
+    """
+    A solver of LP(Pij, d⃗,t) and IP(Pij, d⃗,t). A backend must implement solve_lp and solve_ip, and session too if
+    it is persistent.
+    """
+    name = None
+    persistent = False  # Keeps a session of its own for the DecisionModel
+
+    def __init__(self, threads: int = None, time_limit: float = None):
+        """
+        :param threads: Number of threads of the solver. None for the solver's default.
+        :param time_limit: Seconds of every solve. None for no limit.
+        """
+        self.threads = threads
+        self.time_limit = time_limit
+        self.deadline = None  # time.perf_counter() by which every solve must have stopped, or None
+        # The last solve stopped at the time limit or the deadline, so its None is not a proven 'no'
+        self.stopped = False
+
+    def solve_time_limit(self) -> float:
+        """
+        :return: Seconds the next solve may run, the time limit cut to the time left before the deadline, or None.
+        """
+        limits = [] if self.time_limit is None else [self.time_limit]
+        if self.deadline is not None:
+            limits.append(max(self.deadline - time.perf_counter(), 0.0))
+        return min(limits) if limits else None
+
+    @abstractmethod
+    def solve_lp(self, model: LinearModel, di: list[int]) -> (float, FractionalSolution):
+        """
+        :return: The minimum Cmax and the nonzero xij, or None if the LP has no solution.
+        """
+
+    @abstractmethod
+    def solve_ip(self, model: LinearModel, di: list[int]) -> (int, Assignment):
+        """
+        :return: The minimum Cmax and the machine of every job, or None if the IP has no solution.
+        """
+
+    def __repr__(self):
+        return f"{type(self).__name__}(threads={self.threads}, time_limit={self.time_limit})"
+
+
+class CbcBackend(SolverBackend):
+    name = "cbc"
+
+    def command(self, **options) -> PULP_CBC_CMD:
+        return PULP_CBC_CMD(msg=False, threads=self.threads, timeLimit=self.solve_time_limit(), **options)
+
+    def solve_lp(self, model: LinearModel, di: list[int]) -> (float, FractionalSolution):
+        lp_prob, x, Cmax = model.to_pulp("LP", di)
+        lp_prob.solve(self.command())
+        self.stopped = lp_prob.status == LpStatusNotSolved
+        if lp_prob.status != 1:
+            return None
+        return value(Cmax), model.fractional_solution(x)
+
+    def solve_ip(self, model: LinearModel, di: list[int]) -> (int, Assignment):
+        ip_prob, x, Cmax = model.to_pulp("IP", di, cat='Binary', cmax_cat='Integer')
+        ip_prob.solve(self.command())
+        self.stopped = ip_prob.status == LpStatusNotSolved
+        if ip_prob.status != 1:
+            return None
+        return value(Cmax), model.assignment(x)
+
+
+class HighsBackend(SolverBackend):
+    name = "highs"
+    persistent = True
+
+    def highs(self):
+        """
+        :return: A silent HiGHS instance with the threads of the backend, set to dual simplex so every LP solution is
+        an extreme point, which the rounding needs.
+        """
+        import highspy
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+        highs.setOptionValue("solver", "simplex")
+        if self.threads:
+            highs.setOptionValue("threads", self.threads)
+        return highs
+
+    def pass_model(self, highs, model: LinearModel, di: list[int], integer: bool = False):
+        """
+        Hands the CSR arrays of the LinearModel to HiGHS. Column k < num_pairs is xij, the last column is Cmax.
+        """
+        import highspy
+        data, indices, indptr, row_lower, row_upper = model.constraint_matrix(di)
+        k = model.num_pairs
+        lp = highspy.HighsLp()
+        lp.num_col_, lp.num_row_ = k + 1, len(row_lower)
+        lp.col_cost_ = np.concatenate((np.zeros(k), [1.0]))
+        lp.col_lower_ = np.zeros(k + 1)
+        lp.col_upper_ = np.concatenate((model.column_upper, [highspy.kHighsInf]))
+        lp.row_lower_ = np.where(np.isinf(row_lower), -highspy.kHighsInf, row_lower)
+        lp.row_upper_ = row_upper
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kRowwise
+        lp.a_matrix_.start_ = indptr.astype(np.int32)
+        lp.a_matrix_.index_ = indices.astype(np.int32)
+        lp.a_matrix_.value_ = data.astype(np.float64)
+        if integer:
+            lp.integrality_ = [highspy.HighsVarType.kInteger] * (k + 1)
+        highs.passModel(lp)
+
+    def run(self, highs):
+        """
+        Every HiGHS solve goes through here, the way every CBC solve goes through LpProblem.solve.
+        The time limit is set for every solve, since the time left before the deadline changes.
+        """
+        import highspy
+        time_limit = self.solve_time_limit()
+        highs.setOptionValue("time_limit", float("inf") if time_limit is None else float(time_limit))
+        highs.run()
+        self.stopped = highs.getModelStatus() == highspy.HighsModelStatus.kTimeLimit
+
+    @staticmethod
+    def optimal(highs) -> bool:
+        import highspy
+        return highs.getModelStatus() == highspy.HighsModelStatus.kOptimal
+
+    def solve_lp(self, model: LinearModel, di: list[int]) -> (float, FractionalSolution):
+        highs = self.highs()
+        self.pass_model(highs, model, di)
+        self.run(highs)
+        if not self.optimal(highs):
+            return None
+        values = np.asarray(highs.getSolution().col_value)
+        return values[-1], FractionalSolution(model.m, model.n, model.machines, model.jobs, clean(values[:-1]))
+
+    def solve_ip(self, model: LinearModel, di: list[int]) -> (int, Assignment):
+        highs = self.highs()
+        self.pass_model(highs, model, di, integer=True)
+        self.run(highs)
+        if not self.optimal(highs):
+            return None
+        values = np.asarray(highs.getSolution().col_value)
+        machines = np.full(model.n, -1, dtype=np.int32)
+        chosen = values[:-1] > 0.5
+        machines[model.jobs[chosen]] = model.machines[chosen]
+        return round(values[-1]), Assignment(machines)
+
+    def session(self, model: LinearModel, warm_start: bool = True) -> "HighsSession":
+        return HighsSession(self, model, warm_start)
+
+
+class HighsSession:
+    """
+    LP(Pij, d⃗,t_max) loaded into HiGHS once. A solve for t <= t_max fixes the columns with Pij > t to 0 and sets the
+    deadlines, and HiGHS starts from the basis of the last solve, or from scratch without warm start.
+    """
+
+    def __init__(self, backend: HighsBackend, model: LinearModel, warm_start: bool = True):
+        """
+        :param backend: The HighsBackend with the threads and the time limit.
+        :param model: LP(Pij, d⃗,t_max), every pair with Pij <= t_max.
+        :param warm_start: Start each solve from the basis of the previous solve.
+        """
+        self.model = model
+        self.backend = backend
+        self.warm_start = warm_start
+        self.highs = backend.highs()
+        backend.pass_model(self.highs, model, [0] * model.m)
+        self.k = model.num_pairs
+        self.columns = np.arange(self.k, dtype=np.int32)
+        self.deadline_rows = np.arange(model.n, model.n + model.m, dtype=np.int32)
+        self.t = model.t  # Columns with Pij > t are fixed to 0
+
+    def solve(self, di: list[int], t: int) -> (float, FractionalSolution):
+        """
+        Solves LP(Pij, d⃗,t), same as DecisionModel.solve.
+        """
+        if t != self.t:
+            upper = np.where(self.model.times <= t, self.model.column_upper, 0.0)
+            self.highs.changeColsBounds(self.k, self.columns, np.zeros(self.k), upper)
+            self.t = t
+        self.highs.changeRowsBounds(self.model.m, self.deadline_rows, np.full(self.model.m, -np.inf),
+                                    np.asarray(di, dtype=np.float64))
+        if not self.warm_start:
+            self.highs.clearSolver()  # Drops the solution and the basis of the last solve, keeps the model
+        self.backend.run(self.highs)
+        count("lp_solves")
+        if not self.backend.optimal(self.highs):
+            return None
+        values = np.asarray(self.highs.getSolution().col_value)
+        return values[-1], FractionalSolution(self.model.m, self.model.n, self.model.machines, self.model.jobs,
+                                              clean(values[:-1]))
+
+
+def clean(values: np.ndarray) -> np.ndarray:
+    """
+    :param values: The values of the xij columns.
+    :return: The values with the ones within TOLERANCE of 0 or 1 set to 0 or 1.
+    """
+    values = np.where(values < TOLERANCE, 0.0, values)
+    return np.where(np.abs(values - 1) < TOLERANCE, 1.0, values)
+
+
+BACKENDS = {"cbc": CbcBackend, "highs": HighsBackend}
+
+
+def select_backend(pairs: int = None, integer: bool = False) -> str:
+    """
+    :param pairs: Number of xij variables of the model.
+    :param integer: The model is an IP.
+    :return: The name of the backend auto picks for a model of that size.
+    """
+    if not highs_available():
+        return "cbc"
+    if integer and pairs is not None and pairs <= AUTO_CBC_IP_PAIRS:
+        return "cbc"
+    return "highs"
+
+
+def get_backend(backend=None, pairs: int = None, integer: bool = False) -> SolverBackend:
+    """
+    :param backend: A SolverBackend, a name of BACKENDS, "auto" or None for auto.
+    :param pairs: Number of xij variables, for auto.
+    :param integer: The model is an IP, for auto.
+    :return: The SolverBackend.
+    """
+    if isinstance(backend, SolverBackend):
+        return backend
+    name = select_backend(pairs, integer) if backend in (None, "auto") else backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown solver backend {name!r}, expected one of {sorted(BACKENDS)} or 'auto'")
+    if name == "highs" and not highs_available():
+        raise ImportError("The highs backend needs highspy: pip install highspy")
+    return BACKENDS[name]()
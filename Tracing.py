@@ -0,0 +1,253 @@
+"""Tracing of the solve pipeline: nested spans, counters and an optional cProfile hook.
+
+The pipeline calls span() and count() at the points worth measuring: every deadline d of the Binary Search
+Procedure, every LP build and CBC solve, the rounding and the steps of the bipartite graphs.
+Tracing is off by default. Then span() returns the same do-nothing span every time and count() returns immediately,
+so the calls cost a global lookup each.
+
+    with tracing() as tracer:
+        binary_search_procedure(P)
+    tracer.print_summary()
+    tracer.write_json("trace.json")
+    tracer.write_chrome_trace("trace.chrome.json")  # Open in chrome://tracing or https://ui.perfetto.dev
+
+Only the process that enabled tracing is traced, so the workers of parallel_binary_search_procedure are not.
+"""
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+_tracer = None  # The enabled Tracer, None when tracing is off
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attributes", "start", "end", "depth", "thread")
+
+    def __init__(self, tracer, name: str, attributes: dict):
+        self.tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.start = self.end = 0
+        self.depth = 0
+        self.thread = threading.get_ident()
+
+    def set(self, key: str, value):
+        """
+        Adds an attribute to the span, like the answer of the decision procedure once it is known.
+        """
+        self.attributes[key] = value
+
+    @property
+    def duration(self) -> float:
+        """
+        :return: The duration in seconds.
+        """
+        return (self.end - self.start) / 1e9
+
+    def __enter__(self):
+        self.depth = self.tracer.push()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.end = time.perf_counter_ns()
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        self.tracer.pop(self)
+        return False
+
+
+class NullSpan:
+    """
+    The span of disabled tracing. Does nothing.
+    """
+    __slots__ = ()
+
+    def set(self, key: str, value):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Tracer:
+    def __init__(self):
+        self.spans = []  # Finished spans, in the order they finished
+        self.counters = defaultdict(float)  # name -> total
+        self.samples = []  # (time, name, total) every time a counter changes
+        self.origin = time.perf_counter_ns()
+        self.local = threading.local()  # Depth of the open spans of every thread
+        self.lock = threading.Lock()
+
+    def push(self) -> int:
+        depth = getattr(self.local, "depth", 0)
+        self.local.depth = depth + 1
+        return depth
+
+    def pop(self, span: Span):
+        self.local.depth = span.depth
+        with self.lock:
+            self.spans.append(span)
+
+    def count(self, name: str, value: float = 1):
+        with self.lock:
+            self.counters[name] += value
+            self.samples.append((time.perf_counter_ns(), name, self.counters[name]))
+
+    # %-------------------------- Reports    ---------------------------------------------------------------------%
+    def summary(self) -> dict:
+        """
+        :return: For every span name, the number of spans and their total, mean and max duration in seconds.
+        """
+        summary = {}
+        for span in self.spans:
+            entry = summary.setdefault(span.name, {"count": 0, "total": 0.0, "max": 0.0})
+            entry["count"] += 1
+            entry["total"] += span.duration
+            entry["max"] = max(entry["max"], span.duration)
+        for entry in summary.values():
+            entry["mean"] = entry["total"] / entry["count"]
+        return summary
+
+    def print_summary(self):
+        print(f"{'span':<36}{'count':>8}{'total (s)':>12}{'mean (s)':>12}{'max (s)':>12}")
+        for name, entry in sorted(self.summary().items(), key=lambda item: -item[1]["total"]):
+            print(f"{name:<36}{entry['count']:>8}{entry['total']:>12.4f}{entry['mean']:>12.4f}{entry['max']:>12.4f}")
+        for name, total in self.counters.items():
+            print(f"{name:<36}{total:>8g}")
+
+    def to_json(self) -> dict:
+        """
+        :return: The spans, with start and duration in seconds from the start of the tracer, and the counters.
+        """
+        spans = [{"name": span.name, "start": (span.start - self.origin) / 1e9, "duration": span.duration,
+                  "depth": span.depth, "thread": span.thread, "attributes": span.attributes}
+                 for span in sorted(self.spans, key=lambda span: span.start)]
+        return {"spans": spans, "counters": dict(self.counters), "summary": self.summary()}
+
+    def to_chrome_trace(self) -> dict:
+        """
+        :return: The trace in the Chrome Trace Event format, complete events for the spans and counter events for
+        the counters, in microseconds.
+        """
+        pid = os.getpid()
+        events = [{"name": span.name, "ph": "X", "ts": (span.start - self.origin) / 1e3,
+                   "dur": (span.end - span.start) / 1e3, "pid": pid, "tid": span.thread,
+                   "args": {key: _jsonable(value) for key, value in span.attributes.items()}}
+                  for span in self.spans]
+        events += [{"name": name, "ph": "C", "ts": (timestamp - self.origin) / 1e3, "pid": pid,
+                    "args": {name: total}} for timestamp, name, total in self.samples]
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write_json(self, filename: str):
+        with open(filename, "w") as file:
+            json.dump(self.to_json(), file, indent=2, default=_jsonable)
+
+    def write_chrome_trace(self, filename: str):
+        with open(filename, "w") as file:
+            json.dump(self.to_chrome_trace(), file)
+
+
+def _jsonable(value):
+    """
+    NumPy scalars and other attribute values JSON doesn't know.
+    """
+    if hasattr(value, "item"):
+        return value.item()
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    return str(value)
+
+
+# %-------------------------- API of the pipeline    ---------------------------------------------------------------%
+def span(name: str, **attributes):
+    """
+    :param name: Name of the span, like "LP.solve".
+    :param attributes: Values that describe this span, like d.
+    :return: A context manager that measures the code in its block.
+    """
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name, attributes)
+
+
+def count(name: str, value: float = 1):
+    """
+    Adds value to the counter name.
+    """
+    if _tracer is not None:
+        _tracer.count(name, value)
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def enable(tracer: Tracer = None) -> Tracer:
+    """
+    Turns tracing on.
+    :param tracer: The Tracer that collects the spans. A new one by default.
+    :return: The enabled Tracer.
+    """
+    global _tracer
+    _tracer = tracer or Tracer()
+    return _tracer
+
+
+def disable() -> Tracer:
+    """
+    Turns tracing off.
+    :return: The Tracer that was enabled, with everything it collected.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+@contextmanager
+def tracing(tracer: Tracer = None):
+    """
+    Traces the code in its block.
+    :return: The Tracer.
+    """
+    previous = _tracer
+    tracer = enable(tracer)
+    try:
+        yield tracer
+    finally:
+        if previous:
+            enable(previous)
+        else:
+            disable()
+
+
+@contextmanager
+def profiling(filename: str = None, sort: str = "cumulative", limit: int = 30):
+    """
+    Runs the code in its block under cProfile.
+    :param filename: Where the stats are dumped, for pstats or snakeviz. None prints the top functions instead.
+    :param sort: The order of the printed functions.
+    :param limit: Number of printed functions.
+    :return: The cProfile.Profile.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        if filename:
+            profiler.dump_stats(filename)
+        else:
+            pstats.Stats(profiler).sort_stats(sort).print_stats(limit)
@@ -0,0 +1,30 @@
+"""Worker processes that can be killed together with the CBC processes they start.
+
+A worker calls own_process_group() first, so CBC, which PuLP starts as a child process, runs in the process group of
+the worker. kill_worker then kills the whole group, and no CBC keeps solving for a worker that is gone.
+Used by the parallel search of SearchProcedure.py, BatchSolver.py and SchedulingService.py.
+"""
+import os
+import signal
+
+
+def own_process_group():
+    """
+    Makes the calling worker process the leader of a process group of its own, where it is available.
+    """
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+
+
+def kill_worker(process):
+    """
+    Kills a worker process together with the CBC process it started, and waits for it.
+    """
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            process.kill()  # It hasn't made its own process group yet
+    else:
+        process.terminate()
+    process.join()
@@ -1,6 +1,13 @@
 import csv
 import os
 import random
+from itertools import islice
+import numpy as np
+
+
+# Range of the generated processing times
+MIN_PROCESSING_TIME = 1
+MAX_PROCESSING_TIME = 100
 
 
 def generate_random_value():
@@ -8,7 +15,7 @@ def generate_random_value():
     The way and the range where values are generated
     :return: The processing time of a job are between 1-100
     """
-    return random.randint(1, 100)
+    return random.randint(MIN_PROCESSING_TIME, MAX_PROCESSING_TIME)
 
 
 def generate_pij(m, n):
@@ -31,6 +38,7 @@ def generate_filedata(filename: [], m: int, n: int):
     """
     If the file exists, it reads it and returns its data
     Else it creates a new file and generates data
+    A .npy filename gets the binary format, anything else is CSV.
     :param filename: Name of the file
     :param m: Number of machine
     :param n: number of jobs
@@ -39,13 +47,91 @@ def generate_filedata(filename: [], m: int, n: int):
     # Check if the file already exists
     if os.path.isfile(filename):
         # Read and save the data from the existing file
-        data = read_csv_file(filename)
+        data = read_instance(filename)
+    elif is_npy_file(filename):
+        generate_npy_file(filename, m, n)
+        data = read_npy_file(filename)
     else:
         data = generate_pij(m, n)
         write_data_to_csv(filename, data)
     return data
 
 
+def read_instance(filename, mmap: bool = True):
+    """
+    Reads an instance in either format, according to the extension of the filename.
+    :param filename: Name of a .npy or .csv file
+    :param mmap: Memory-map a .npy file instead of loading it.
+    :return: 2d array Pij, None if the file doesn't exist
+    """
+    if is_npy_file(filename):
+        return read_npy_file(filename, mmap)
+    return read_csv_file(filename)
+
+
+# --------------   Binary Functions -------------------------------------------------
+# An instance is an int32 m x n matrix in NumPy's .npy format: a small header and the raw matrix.
+# Memory-mapped read-only, the pages of the file are shared by every process that opens it.
+
+
+def is_npy_file(filename) -> bool:
+    return str(filename).lower().endswith(".npy")
+
+
+def read_npy_file(filename, mmap: bool = True):
+    if os.path.isfile(filename):
+        return np.load(filename, mmap_mode="r" if mmap else None)
+    else:
+        print("File not Found")
+        return None
+
+
+def write_data_to_npy(filename, data):
+    np.save(filename, np.asarray(data, dtype=np.int32))
+
+
+def generate_npy_file(filename, m: int, n: int, chunk_rows: int = 1024):
+    """
+    Generates a binary instance with the range of generate_random_value, chunk_rows machines at a time, so the whole
+    matrix never has to fit in memory.
+    """
+    data = np.lib.format.open_memmap(filename, mode="w+", dtype=np.int32, shape=(m, n))
+    for start in range(0, m, chunk_rows):
+        rows = min(chunk_rows, m - start)
+        data[start:start + rows] = np.random.randint(MIN_PROCESSING_TIME, MAX_PROCESSING_TIME + 1, size=(rows, n),
+                                                     dtype=np.int32)
+    data.flush()
+    del data
+
+
+def convert_csv_to_npy(csv_filename, npy_filename=None, chunk_rows: int = 1024):
+    """
+    Converts a CSV instance to the binary format, parsing chunk_rows rows at a time.
+    :param csv_filename: Name of the CSV file
+    :param npy_filename: Name of the binary file, the CSV name with .npy by default
+    :param chunk_rows: Number of rows parsed at a time
+    :return: The name of the binary file
+    """
+    npy_filename = npy_filename or os.path.splitext(csv_filename)[0] + ".npy"
+    # First pass: the shape of the matrix
+    with open(csv_filename, 'r') as file:
+        first_row = file.readline()
+        m = 1 + sum(1 for line in file if line.strip()) if first_row.strip() else 0
+    n = len(first_row.split(",")) if m else 0
+
+    data = np.lib.format.open_memmap(npy_filename, mode="w+", dtype=np.int32, shape=(m, n))
+    with open(csv_filename, 'r') as file:
+        lines = (line for line in file if line.strip())
+        start = 0
+        while start < m:
+            chunk = np.loadtxt(islice(lines, chunk_rows), delimiter=",", dtype=np.int32, ndmin=2)
+            data[start:start + len(chunk)] = chunk
+            start += len(chunk)
+    data.flush()
+    del data
+    return npy_filename
+
+
 # --------------   CSV Functions -------------------------------------------------
 
 
@@ -1,6 +1,9 @@
-from generate_data import read_csv_file
+from generate_data import read_instance
 from SearchProcedure import *
-from OptimalSchedule import optimal_schedule
+from OptimalSchedule import improve_to_optimal
+from LocalSearch import improve_solution
+from Anytime import anytime_schedule
+import argparse
 import time
 
 
@@ -11,32 +14,79 @@ def run_ip_solution(sch_problem):
     """
     start_time = time.time()
     sch_problem.makespan, sch_problem.xij = IP(sch_problem.P, [sch_problem.d] * sch_problem.m, sch_problem.t)
+    sch_problem.stage = "ip"
     end_time = time.time()
     elapsed_time = end_time - start_time
-    print("\nWe use IP(Pij, d⃗,t) (from the Rounding Theorem) with the deadline d we got from Binary Search Procedure.")
+    print("\nWe use IP(Pij, d⃗,t) (from the Rounding Theorem) with the deadline d we got from Binary Search",
+          "Procedure.")
     print("We use this result for reference to the rounding of the LP solution we achieved using Bipartite Graphs.")
     print("IP Makespan = ", sch_problem.makespan)
     print(f"Time taken to solve IP(Pij,d⃗,t) with deadline d from Procedure: {elapsed_time:.4f} seconds")
     # sch_problem.print_schedule()
 
 
-def run_optimal_solution(sch_problem):
+def run_local_search(sch_problem, time_limit: float = 10):
+    """
+    Improve the rounded schedule with moves, swaps and ejection chains between machines.
+    """
+    start_time = time.time()
+    rounded_makespan = sch_problem.makespan
+    improve_solution(sch_problem, time_limit=time_limit, ejection_chains=True)
+    end_time = time.time()
+    elapsed_time = end_time - start_time
+    print("\nLocal search on the rounded schedule: Makespan = ", rounded_makespan, "->", sch_problem.makespan)
+    print(f"Time taken to improve the schedule: {elapsed_time:.4f} seconds")
+
+
+def run_optimal_solution(sch_problem, time_limit: float = 60):
     """
     Find the best schedule exploring every possible solution.
-    It takes time to complete for large data.
+    It takes time to complete for large data, so we start from our approximate schedule and stop after time_limit
+    seconds with the best schedule found and its optimality gap.
     """
     start_time = time.time()
-    sch_problem.makespan, sch_problem.xij = optimal_schedule(sch_problem.P)
+    result = improve_to_optimal(sch_problem, time_limit=time_limit)
     end_time = time.time()
     elapsed_time = end_time - start_time
+    if result is None:
+        print("\nNo schedule found exploring the possible solutions in", time_limit, "seconds")
+        return
+    sch_problem.makespan, sch_problem.xij, gap = result
+    sch_problem.stage = "exact"
     print("\nExploring all possible solution we find the best schedule", "Optimal Makespan = ", sch_problem.makespan)
+    if gap > 0:
+        print(f"Stopped after {time_limit} seconds, the makespan is within {gap:.2%} of the optimal")
     print(f"Time taken to find the best solution: {elapsed_time:.4f} seconds")
     # sch_problem.print_schedule()
 
 
-def run_main(filename):
-    P = read_csv_file(filename)
+def run_anytime_solution(P, budget: float):
+    """
+    Find the best schedule we can within a budget of seconds, printing every improvement.
+    """
+    def report(result):
+        print(f"{result.elapsed:8.3f}s  makespan = {result.makespan}  lower bound = {result.lower_bound}  "
+              f"gap = {result.gap:.2%}  ({result.stage})")
+
+    result = anytime_schedule(P, budget, progress=report)
+    print(f"\nWithin {budget} seconds: Makespan = {result.makespan}, lower bound = {result.lower_bound}"
+          + (" (optimal)" if result.optimal else f", gap = {result.gap:.2%}"))
+    print(f"Time taken: {result.elapsed:.4f} seconds")
+
+
+def run_main(filename, visualize: bool = False, budget: float = None):
+    """
+    Runs every stage on one instance and prints the results.
+    :param visualize: Draw the graphs G and G'. Every plot blocks until its window is closed, so it is off by default
+    and matplotlib is never imported without it.
+    :param budget: Seconds for the whole run. The anytime mode runs instead of the stages, which have no time limit.
+    """
+    P = read_instance(filename)
     print('|-----', filename, '-------------------------------------------------------------------------------------|')
+    if budget is not None:
+        run_anytime_solution(P, budget)
+        print('|--- End of ', filename, '-----------------------------------------------------------|')
+        return
     start_time = time.time()
     # Run Binary Search Procedure
     sch_problem = binary_search_procedure(P)
@@ -47,14 +97,18 @@ def run_main(filename):
         sch_problem.print_schedule()
         print("\nGraph G"), print_graph_info(sch_problem.bipartite_graphG)
         print("\nGraph G'"), print_graph_info(sch_problem.bipartite_graphG2)
-        sch_problem.visualize_graphG()
-        sch_problem.visualize_graphG2()
-        visualize_graph_components(sch_problem.bipartite_graphG2)
+        if visualize:
+            sch_problem.visualize_graphG()
+            sch_problem.visualize_graphG2()
+            visualize_graph_components(sch_problem.bipartite_graphG2)
     else:
         print("No feasible solution found during Binary Search Procedure")
         return
     print(f"Time taken to find approximate solution: {elapsed_time:.4f} seconds")
 
+    # Improve the approximate schedule
+    run_local_search(sch_problem)
+
     # Using IP(Pij,d⃗,t) to compare results
     run_ip_solution(sch_problem)
 
@@ -65,4 +119,9 @@ def run_main(filename):
 
 # Choose which data to run
 if __name__ == "__main__":
-    run_main('30x100.csv')
+    parser = argparse.ArgumentParser(description="Approximate and exact schedules of one instance")
+    parser.add_argument("filename", nargs="?", default="30x100.csv", help=".csv or .npy instance")
+    parser.add_argument("--visualize", action="store_true", help="draw the graphs G and G' (needs a display)")
+    parser.add_argument("--budget", type=float, default=None, help="seconds for the whole run, in the anytime mode")
+    args = parser.parse_args()
+    run_main(args.filename, args.visualize, args.budget)
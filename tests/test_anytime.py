@@ -0,0 +1,39 @@
+import time
+import unittest
+import numpy as np
+from Anytime import EXACT_MAX_PAIRS, anytime_schedule
+from SolverBackends import highs_available
+from Tracing import tracing
+from generate_data import read_instance
+
+
+class AnytimeTest(unittest.TestCase):
+    def assert_within_budget(self, backend: str, budget: float = 0.2):
+        P = np.array(read_instance("300x1000.csv"))
+        start = time.perf_counter()
+        with tracing() as tracer:
+            result = anytime_schedule(P, budget=budget, backend=backend)
+        self.assertLess(time.perf_counter() - start, budget + 0.1)
+        self.assertEqual(result.xij.makespan(P), result.makespan)
+        self.assertLessEqual(result.lower_bound, result.makespan)
+        self.assertGreater(P.size, EXACT_MAX_PAIRS)
+        self.assertNotIn("branch_and_bound", [s.name for s in tracer.spans])  # Large instance with a large gap
+
+    def test_budget_cbc(self):
+        # CBC does not stop at the deadline, the worker running it is killed
+        self.assert_within_budget("cbc")
+
+    @unittest.skipUnless(highs_available(), "highspy is not installed")
+    def test_budget_highs(self):
+        self.assert_within_budget("highs")
+
+    def test_small_instance_runs_branch_and_bound(self):
+        P = np.array(read_instance("3x10.csv"))
+        with tracing() as tracer:
+            result = anytime_schedule(P, budget=5, backend="cbc")
+        self.assertTrue(result.optimal)
+        self.assertEqual(result.xij.makespan(P), result.makespan)
+
+
+if __name__ == "__main__":
+    unittest.main()
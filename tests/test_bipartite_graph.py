@@ -0,0 +1,76 @@
+import unittest
+import networkx as nx
+import numpy as np
+from BipartiteGraph import BipartiteGraphG, BipartiteGraphG2, count_components, match_pseudoforest
+from RoundingTheorem import DecisionModel
+from SearchProcedure import processing_lower_bound
+
+
+def random_pseudoforest(rng: np.random.Generator, m: int, n: int):
+    """
+    :return: The edges of a random pseudoforest on m machines and at most n jobs, every job with 2 or 3 machines.
+    A job is only added if every component keeps at most as many edges as nodes.
+    """
+    machines, jobs = [], []
+    for j in range(n):
+        chosen = rng.choice(m, size=min(int(rng.integers(2, 4)), m), replace=False).tolist()
+        new_machines, new_jobs = np.array(machines + chosen), np.array(jobs + [len(set(jobs))] * len(chosen))
+        num_jobs = int(new_jobs.max()) + 1
+        _, nodes, edges = count_components(np.arange(m + num_jobs), new_machines, new_jobs + m)
+        if np.all(edges <= nodes):
+            machines, jobs = new_machines.tolist(), new_jobs.tolist()
+    return np.array(machines, dtype=np.int64), np.array(jobs, dtype=np.int64)
+
+
+def reference_matching_size(edge_machines: np.ndarray, edge_jobs: np.ndarray) -> int:
+    graph = nx.Graph()
+    jobs = {f"j{j}" for j in edge_jobs.tolist()}
+    graph.add_edges_from((f"m{i}", f"j{j}") for i, j in zip(edge_machines.tolist(), edge_jobs.tolist()))
+    return len(nx.bipartite.hopcroft_karp_matching(graph, top_nodes=jobs)) // 2
+
+
+class MatchPseudoforestTest(unittest.TestCase):
+    def assert_job_perfect(self, edge_machines: np.ndarray, edge_jobs: np.ndarray, matching: list):
+        edges = set(zip(edge_machines.tolist(), edge_jobs.tolist()))
+        self.assertTrue(set(matching) <= edges, "the matching uses an edge that is not in the graph")
+        self.assertEqual(len({i for i, _ in matching}), len(matching), "a machine is matched twice")
+        self.assertEqual({j for _, j in matching}, set(edge_jobs.tolist()), "a job is not matched")
+        self.assertEqual(len(matching), reference_matching_size(edge_machines, edge_jobs))
+
+    def test_random_pseudoforests(self):
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            m = int(rng.integers(2, 12))
+            edge_machines, edge_jobs = random_pseudoforest(rng, m, int(rng.integers(1, 12)))
+            n = int(edge_jobs.max()) + 1
+            self.assert_job_perfect(edge_machines, edge_jobs, match_pseudoforest(edge_machines, edge_jobs, m, n))
+
+    def test_even_cycle(self):
+        # m0 - j0 - m1 - j1 - m2 - j2 - m0
+        edge_machines, edge_jobs = np.array([0, 1, 1, 2, 2, 0]), np.array([0, 0, 1, 1, 2, 2])
+        self.assert_job_perfect(edge_machines, edge_jobs, match_pseudoforest(edge_machines, edge_jobs, 3, 3))
+
+    def test_cycle_with_trees(self):
+        # The cycle m0 - j0 - m1 - j1 - m0, with the tree j2 - m2, j2 - m3 - j3 - m4 hanging from m1
+        edge_machines = np.array([0, 1, 1, 0, 1, 2, 3, 3, 4])
+        edge_jobs = np.array([0, 0, 1, 1, 2, 2, 2, 3, 3])
+        self.assert_job_perfect(edge_machines, edge_jobs, match_pseudoforest(edge_machines, edge_jobs, 5, 4))
+
+    def test_lp_solutions(self):
+        # G' of extreme points of LP(P, d) on random instances
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            m, n = int(rng.integers(2, 6)), int(rng.integers(5, 40))
+            P = rng.integers(1, 30, size=(m, n))
+            d = processing_lower_bound(P) + int(rng.integers(0, 10))
+            solution = DecisionModel(P, d, backend="cbc").solve([d] * m, d)
+            if solution is None:
+                continue
+            graphG = BipartiteGraphG(solution[1], m, n)
+            self.assertTrue(graphG.is_pseudoforest)
+            graphG2 = BipartiteGraphG2(graphG)
+            self.assert_job_perfect(graphG2.edge_machines, graphG2.edge_jobs, graphG2.matching)
+
+
+if __name__ == "__main__":
+    unittest.main()
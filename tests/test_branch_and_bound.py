@@ -0,0 +1,100 @@
+import itertools
+import sys
+import unittest
+import numpy as np
+import BranchAndBound
+from BranchAndBound import branch_and_bound, branch_and_bound_schedule, dp_bytes, dp_schedule, exact_schedule
+from Tracing import tracing
+
+
+def brute_force_makespan(P: np.ndarray) -> int:
+    m, n = P.shape
+    jobs = np.arange(n)
+    return min(int(np.bincount(machines, weights=P[machines, jobs], minlength=m).max())
+               for machines in map(np.array, itertools.product(range(m), repeat=n)))
+
+
+def random_instances(seed: int, machines: range, count: int = 20):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        m, n = int(rng.choice(machines)), int(rng.integers(1, 8))
+        yield rng.integers(1, 30, size=(m, n))
+
+
+class ExactScheduleTest(unittest.TestCase):
+    def assert_optimal(self, P: np.ndarray, result: (int, object, float)):
+        makespan, xij, gap = result
+        self.assertEqual(makespan, brute_force_makespan(P))
+        self.assertEqual(xij.makespan(P), makespan)
+        self.assertEqual(gap, 0.0)
+
+    def test_dp_schedule(self):
+        for k, P in enumerate(random_instances(0, range(1, 4))):
+            with self.subTest(k, P=P.tolist()):
+                self.assert_optimal(P, dp_schedule(P))
+
+    def test_branch_and_bound_schedule(self):
+        for k, P in enumerate(random_instances(1, range(1, 5))):
+            for lp_bound in (True, False):
+                with self.subTest(k, lp_bound=lp_bound, P=P.tolist()):
+                    self.assert_optimal(P, branch_and_bound_schedule(P, lp_bound=lp_bound))
+
+    def test_branch_and_bound_lower_bound(self):
+        for k, P in enumerate(random_instances(5, range(2, 5))):
+            with self.subTest(k, P=P.tolist()):
+                makespan, xij, lower_bound = branch_and_bound(P)
+                self.assertEqual((makespan, lower_bound), (brute_force_makespan(P),) * 2)
+        P = np.random.default_rng(6).integers(1, 100, size=(6, 40))
+        makespan, xij, lower_bound = branch_and_bound(P, time_limit=0, lp_bound=False)
+        self.assertIsInstance(lower_bound, int)
+        self.assertLessEqual(lower_bound, makespan)
+        self.assertEqual(xij.makespan(P), makespan)
+
+    def test_deep_search(self):
+        # Deeper than the default recursion limit, which the search must leave as it is
+        P = np.random.default_rng(7).integers(1, 100, size=(4, 3000))
+        recursion_limit = sys.getrecursionlimit()
+        makespan, xij, gap = branch_and_bound_schedule(P, time_limit=1, lp_bound=False)
+        self.assertEqual(sys.getrecursionlimit(), recursion_limit)
+        self.assertEqual(xij.makespan(P), makespan)
+
+    def test_dp_schedule_time_limit(self):
+        P = np.random.default_rng(2).integers(1, 30, size=(3, 7))
+        self.assertIsNone(dp_schedule(P, time_limit=0))
+
+    def test_exact_schedule_falls_back(self):
+        P = np.random.default_rng(3).integers(1, 30, size=(3, 7))
+        cap = BranchAndBound.DP_MAX_BYTES
+        BranchAndBound.DP_MAX_BYTES = 0  # No layers fit
+        try:
+            self.assert_optimal(P, exact_schedule(P))
+        finally:
+            BranchAndBound.DP_MAX_BYTES = cap
+
+    def test_exact_schedule_out_of_time(self):
+        P = np.random.default_rng(4).integers(1, 30, size=(3, 7))
+        with tracing() as tracer:
+            makespan, xij, gap = exact_schedule(P, time_limit=0)
+        self.assertEqual(tracer.counters["dp_schedule.timeouts"], 1)
+        self.assertEqual(xij.makespan(P), makespan)
+        self.assertGreaterEqual(makespan, brute_force_makespan(P))
+
+    def test_seen_cap(self):
+        P = np.random.default_rng(9).integers(1, 30, size=(3, 7))
+        cap = BranchAndBound.BB_MAX_SEEN_BYTES
+        BranchAndBound.BB_MAX_SEEN_BYTES = 0  # No loads are kept, the search stays exact
+        try:
+            with tracing() as tracer:
+                self.assert_optimal(P, branch_and_bound_schedule(P, lp_bound=False))
+        finally:
+            BranchAndBound.BB_MAX_SEEN_BYTES = cap
+        self.assertEqual([s.attributes["seen"] for s in tracer.spans if "seen" in s.attributes], [0])
+
+    def test_dp_bytes(self):
+        P = np.full((3, 10), 30_000)
+        self.assertEqual(dp_bytes(P, 9_999), 11 * 10_000 ** 2 * 8)  # int64 cells
+        self.assertEqual(dp_bytes(P[:, :1] // 100, 999), 2 * 1_000 ** 2 * 2)  # int16 cells
+
+
+if __name__ == "__main__":
+    unittest.main()
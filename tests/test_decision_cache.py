@@ -0,0 +1,27 @@
+import unittest
+from DecisionCache import DecisionCache, decision_variant
+from SearchProcedure import binary_search_procedure, parallel_binary_search_procedure
+from SolverBackends import get_backend, select_backend
+from generate_data import read_instance
+
+
+class DecisionVariantTest(unittest.TestCase):
+    def test_auto_is_resolved(self):
+        name = select_backend()
+        self.assertEqual(decision_variant(), (name, False, None))
+        self.assertEqual(decision_variant("auto"), decision_variant(name))
+        self.assertEqual(decision_variant(get_backend("auto")), decision_variant(name))
+        self.assertEqual(decision_variant("cbc", None), ("cbc", False, None))
+
+    def test_searches_share_keys(self):
+        P = read_instance("30x100.csv")
+        cache = DecisionCache()
+        binary_search_procedure(P, cache=cache)
+        stores = cache.stores
+        parallel_binary_search_procedure(P, workers=2, cache=cache)
+        self.assertEqual(cache.stores, stores)  # Every deadline of the path was answered by the cache
+        self.assertGreaterEqual(cache.hits, stores)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import numpy as np
+from Decomposition import decomposition_schedule, partition
+from SearchProcedure import binary_search_procedure, processing_lower_bound
+from Tracing import tracing
+from generate_data import read_instance
+
+
+class DecompositionTest(unittest.TestCase):
+    def test_partition(self):
+        P = np.random.default_rng(0).integers(1, 100, size=(12, 200))
+        for job_blocks, machine_blocks in [(1, 1), (4, 1), (2, 3), (20, 2)]:
+            blocks = list(partition(P, job_blocks, machine_blocks))
+            with self.subTest(job_blocks=job_blocks, machine_blocks=machine_blocks):
+                self.assertLessEqual(len(blocks), job_blocks * machine_blocks)
+                machines = np.concatenate([block_machines for block_machines, _ in blocks])
+                jobs = np.concatenate([block_jobs for _, block_jobs in blocks])
+                self.assertEqual(len(np.unique(machines)), len(machines))  # No machine in two blocks
+                np.testing.assert_array_equal(np.sort(jobs), np.arange(P.shape[1]))
+                for block_machines, block_jobs in blocks:
+                    self.assertTrue(np.isin(P[:, block_jobs].argmin(axis=0), block_machines).all())
+
+    def test_block_bounds(self):
+        # The blocks share no machine, so the merged makespan is the largest makespan of a block, within twice its d
+        for instance, job_blocks, machine_blocks in [("100x100.csv", 4, 1), ("300x1000.csv", 2, 2)]:
+            P = np.array(read_instance(instance))
+            blocks = [binary_search_procedure(P[np.ix_(machines, jobs)], graphs="none")
+                      for machines, jobs in partition(P, job_blocks, machine_blocks)]
+            with tracing() as tracer:
+                makespan, xij, lower_bound = decomposition_schedule(P, job_blocks, machine_blocks, workers=1,
+                                                                    repair_time_limit=0)
+            merged = [s.attributes["merged"] for s in tracer.spans if s.name == "decomposition"][0]
+            with self.subTest(instance=instance):
+                self.assertEqual(merged, max(block.makespan for block in blocks))
+                self.assertLessEqual(merged, 2 * max(block.d for block in blocks))
+                self.assertEqual(xij.makespan(P), makespan)
+                self.assertLessEqual(makespan, merged)
+                self.assertLessEqual(lower_bound, makespan)
+                self.assertEqual(lower_bound, processing_lower_bound(P))
+
+
+if __name__ == "__main__":
+    unittest.main()
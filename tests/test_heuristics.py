@@ -0,0 +1,70 @@
+import unittest
+import numpy as np
+from Heuristics import capped_schedule, heuristic_schedule, portfolio, ranked_machines
+from LinearModel import EligibilityIndex
+from SearchProcedure import binary_search_procedure, finish_solution
+from generate_data import read_instance
+
+INSTANCES = ["3x10.csv", "2x100.csv", "30x100.csv", "100x30.csv", "100x100.csv"]
+
+
+class HeuristicsTest(unittest.TestCase):
+    def test_index(self):
+        # The index only saves work, the schedules are the same without it
+        for instance in INSTANCES:
+            P = np.array(read_instance(instance))
+            index = EligibilityIndex(P)
+            for ranks in range(1, min(P.shape[0], 4) + 1):
+                np.testing.assert_array_equal(ranked_machines(P, ranks), ranked_machines(P, ranks, index))
+            for name, heuristic in portfolio(loops=True).items():
+                with self.subTest(instance=instance, heuristic=name):
+                    np.testing.assert_array_equal(heuristic(P, None).machines, heuristic(P, index).machines)
+
+    def test_ranked_machines(self):
+        P = np.array([[3, 1, 2], [1, 1, 2], [2, 1, 1]])
+        np.testing.assert_array_equal(ranked_machines(P, 2), [[1, 2], [0, 1], [2, 0]])
+        np.testing.assert_array_equal(ranked_machines(P.astype(float), 3), [[1, 2, 0], [0, 1, 2], [2, 0, 1]])
+
+    def test_capped_schedule(self):
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            P = rng.integers(1, 50, size=(int(rng.integers(1, 8)), int(rng.integers(0, 40))))
+            fastest = P.min(axis=0)
+            for ranks in (1, 3):
+                xij = capped_schedule(P, lambda time, following: time - following, ranks=ranks)
+                self.assertEqual(len(xij.machines), P.shape[1])
+                # Never worse than every job on its fastest machine, where the search over the cap starts
+                self.assertLessEqual(xij.makespan(P) if P.size else 0,
+                                     np.bincount(P.argmin(axis=0), weights=fastest, minlength=P.shape[0]).max())
+
+    def test_default_portfolio(self):
+        P = np.array(read_instance("30x100.csv"))
+        self.assertEqual(set(portfolio()) & {"min_min", "max_min", "sufferage", "lpt"}, set())
+        makespan, xij = heuristic_schedule(P)
+        self.assertEqual(xij.makespan(P), makespan)
+        self.assertLessEqual(makespan, min(heuristic(P, None).makespan(P) for heuristic in portfolio().values()))
+
+
+class StageTest(unittest.TestCase):
+    def test_stage(self):
+        for instance, stage in [("30x100.csv", "heuristic"), ("100x100.csv", "rounding")]:
+            P = np.array(read_instance(instance))
+            sch_problem = binary_search_procedure(P)
+            with self.subTest(instance=instance):
+                self.assertEqual(sch_problem.stage, stage)
+                self.assertEqual(sch_problem.xij.makespan(P), sch_problem.makespan)
+                # The rounding only promises 2d; a heuristic schedule is kept when it beats every rounded one
+                if stage == "heuristic":
+                    self.assertEqual(sch_problem.makespan, sch_problem.t)
+
+    def test_finish_solution(self):
+        P = np.array(read_instance("100x100.csv"))
+        sch_problem = binary_search_procedure(P)
+        makespan, xij = sch_problem.makespan, sch_problem.xij
+        finish_solution(sch_problem, sch_problem.t, sch_problem.lower_bound, "none", (makespan, xij))
+        self.assertEqual(sch_problem.stage, "rounding")  # Not better
+        finish_solution(sch_problem, sch_problem.t, sch_problem.lower_bound, "none", (makespan - 1, xij))
+        self.assertEqual((sch_problem.stage, sch_problem.makespan), ("heuristic", makespan - 1))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import numpy as np
+from BipartiteGraph import BipartiteGraphG
+from JobTypes import AggregatedDecisionModel, JobTypes, decision_model
+from RoundingTheorem import DecisionModel
+from SearchProcedure import greedy_schedule, two_relaxed_decision_procedure
+
+
+def repeated_columns(rng: np.random.Generator, m: int, n: int, num_types: int) -> np.ndarray:
+    """
+    :return: An m x n instance whose columns are copies of num_types random columns.
+    """
+    columns = rng.integers(1, 20, size=(m, num_types))
+    return columns[:, rng.integers(0, num_types, size=n)]
+
+
+class JobTypesTest(unittest.TestCase):
+    def test_types(self):
+        P = repeated_columns(np.random.default_rng(0), 4, 50, 5)
+        types = JobTypes(P)
+        self.assertLessEqual(types.num_types, 5)
+        self.assertEqual(int(types.counts.sum()), 50)
+        np.testing.assert_array_equal(types.times[:, types.type_of_job], P)
+        for k in range(types.num_types):
+            jobs = types.jobs[types.type_ptr[k]:types.type_ptr[k + 1]]
+            self.assertTrue(np.all(types.type_of_job[jobs] == k))
+
+    def test_expand_round_trip(self):
+        rng = np.random.default_rng(1)
+        for k in range(20):
+            m, n = int(rng.integers(2, 6)), int(rng.integers(10, 60))
+            P = repeated_columns(rng, m, n, int(rng.integers(1, 6)))
+            types = JobTypes(P)
+            d = greedy_schedule(P)
+            model = DecisionModel(types.times, d, backend="cbc", counts=types.counts)
+            solution = model.solve([d] * m, d)
+            with self.subTest(k, m=m, n=n):
+                lp_xij = types.expand(solution[1])
+                self.assertTrue(lp_xij.validate(P))
+                # Every job keeps the times of its type, so the machines keep their loads
+                np.testing.assert_allclose(lp_xij.loads(P), solution[1].loads(types.times), atol=1e-6)
+                y = np.zeros((m, types.num_types))
+                np.add.at(y, (lp_xij.machines, types.type_of_job[lp_xij.jobs]), lp_xij.values)
+                np.testing.assert_allclose(y, solution[1].to_dense(), atol=1e-6)
+                self.assertTrue(BipartiteGraphG(lp_xij, m, n).is_pseudoforest)
+
+
+class AggregatedDecisionModelTest(unittest.TestCase):
+    def test_same_decisions(self):
+        rng = np.random.default_rng(2)
+        for k in range(10):
+            m, n = int(rng.integers(2, 5)), int(rng.integers(10, 40))
+            P = repeated_columns(rng, m, n, int(rng.integers(1, 5)))
+            t = greedy_schedule(P)
+            aggregated = AggregatedDecisionModel(P, t, warm_start=False, backend="cbc")
+            model = DecisionModel(P, t, warm_start=False, backend="cbc")
+            for d in range(max(1, t // 4), t + 1, max(1, t // 12)):
+                with self.subTest(k, d=d):
+                    expected = model.solve([d] * m, d)
+                    solution = aggregated.solve([d] * m, d)
+                    self.assertEqual(solution is None, expected is None)
+                    if expected is not None:
+                        self.assertAlmostEqual(solution[0], expected[0], places=5)
+                    result = two_relaxed_decision_procedure(P, d, aggregated, keep_graphs=True)
+                    self.assertEqual(result is None, two_relaxed_decision_procedure(P, d, model) is None)
+                    if result is not None:
+                        self.assertLessEqual(result.makespan, 2 * d)
+                        self.assertTrue(result.xij.is_complete())
+                        self.assertIs(result.bipartite_graphG, aggregated.last_graph)
+
+    def test_decision_model(self):
+        P = repeated_columns(np.random.default_rng(3), 3, 40, 4)
+        self.assertIsInstance(decision_model(P, 50, backend="cbc"), AggregatedDecisionModel)
+        self.assertIsInstance(decision_model(P, 50, backend="cbc", aggregate=False), DecisionModel)
+        P = np.random.default_rng(3).integers(1, 1000, size=(3, 40))
+        self.assertIsInstance(decision_model(P, 50, backend="cbc"), DecisionModel)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+import numpy as np
+from SearchProcedure import binary_search_procedure, parallel_binary_search_procedure
+from SolverBackends import HighsBackend, highs_available
+from Tracing import tracing
+from generate_data import read_instance
+
+INSTANCES = ["3x10.csv", "2x100.csv", "30x100.csv", "100x30.csv", "100x100.csv"]
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def assert_same_search(self, P, backend: str):
+        sequential = binary_search_procedure(P, warm_start=False, backend=backend)
+        parallel = parallel_binary_search_procedure(P, workers=3, backend=backend)
+        self.assertEqual((parallel.d, parallel.makespan, parallel.lower_bound, parallel.t),
+                         (sequential.d, sequential.makespan, sequential.lower_bound, sequential.t))
+        np.testing.assert_array_equal(parallel.xij.machines, sequential.xij.machines)
+        np.testing.assert_array_equal(parallel.lp_xij.values, sequential.lp_xij.values)
+
+    def test_instances_cbc(self):
+        for filename in INSTANCES:
+            with self.subTest(filename):
+                self.assert_same_search(read_instance(filename), "cbc")
+
+    def test_random_instances_cbc(self):
+        rng = np.random.default_rng(0)
+        for k in range(10):
+            P = rng.integers(1, 20, size=(int(rng.integers(2, 6)), int(rng.integers(3, 15))))
+            with self.subTest(k):
+                self.assert_same_search(P, "cbc")
+
+    @unittest.skipUnless(highs_available(), "needs highspy")
+    def test_random_instances_highs(self):
+        # HiGHS keeps its basis between solves unless warm start is off, which changed the LP solutions of these
+        for seed in (3, 7, 9, 40):
+            P = np.random.default_rng(seed).integers(1, 100, size=(7, 17 + seed % 20))
+            for backend in ("highs", "auto"):
+                with self.subTest(seed, backend=backend):
+                    self.assert_same_search(P, backend)
+
+    def test_last_probe_uses_backend(self):
+        # The heuristic schedule is optimal here, so the search has no deadline to test and probes d = t at the end
+        P = np.random.default_rng(3).integers(1, 20, size=(5, 4))
+        with tracing() as tracer:
+            solution = parallel_binary_search_procedure(P, workers=2, backend="cbc")
+        self.assertEqual(solution.d, solution.t)
+        backends = {span.attributes["backend"] for span in tracer.spans if span.name == "LP.solve"}
+        self.assertEqual(backends, {"cbc"})
+
+
+
+@unittest.skipUnless(highs_available(), "needs highspy")
+class StoppedSolveTest(unittest.TestCase):
+    # Every solve stops at once, so no 'no' of the search is proven
+    def test_sequential(self):
+        P = read_instance("30x100.csv")
+        lower_bounds = []
+        with tracing() as tracer:
+            solution = binary_search_procedure(P, backend=HighsBackend(time_limit=0.0),
+                                               progress=lambda stage, makespan, xij, lower: lower_bounds.append(lower))
+        self.assertIsNone(solution)
+        self.assertEqual(tracer.counters["probes.stopped"], 1)
+        self.assertEqual(len(set(lower_bounds)), 1)  # The lower limit never moved
+
+    def test_parallel(self):
+        with tracing() as tracer:
+            solution = parallel_binary_search_procedure(read_instance("30x100.csv"), workers=2,
+                                                        backend=HighsBackend(time_limit=0.0))
+        self.assertIsNone(solution)
+        self.assertEqual(tracer.counters["probes.stopped"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,28 @@
+import unittest
+from LinearModel import LinearModel
+from SolverBackends import CbcBackend, SolverBackend, get_backend
+
+
+class SolverBackendTest(unittest.TestCase):
+    def test_incomplete_backend(self):
+        class LpOnlyBackend(SolverBackend):
+            name = "lp_only"
+
+            def solve_lp(self, model: LinearModel, di: list[int]):
+                return None
+
+        with self.assertRaises(TypeError):
+            LpOnlyBackend()
+        with self.assertRaises(TypeError):
+            SolverBackend()
+
+    def test_get_backend(self):
+        self.assertIsInstance(get_backend("cbc"), CbcBackend)
+        backend = CbcBackend(threads=2)
+        self.assertIs(get_backend(backend), backend)
+        with self.assertRaises(ValueError):
+            get_backend("glpk")
+
+
+if __name__ == "__main__":
+    unittest.main()